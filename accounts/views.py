@@ -4,7 +4,8 @@ from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import UserRegistrationForm, ProfileUpdateForm
-from school.models import Student, Teacher, Attendance, BookIssue
+from school.dashboard import student_dashboard_context
+from school.models import Student, Teacher
 import random
 import string
 
@@ -163,31 +164,9 @@ def dashboard(request):
 
     if user_type == 'student':
         try:
-            student = Student.objects.get(user=request.user)
-
-            # Attendance calculation
-            try:
-                attendance_count = Attendance.objects.filter(student=student, status='Present').count()
-                total_days = Attendance.objects.filter(student=student).count()
-                attendance_percentage = (attendance_count / total_days * 100) if total_days > 0 else 0
-            except:
-                attendance_count = 0
-                total_days = 0
-                attendance_percentage = 0
-
-            # Books calculation
-            try:
-                total_books = BookIssue.objects.filter(student=student, returned=False).count()
-            except:
-                total_books = 0
-
-            context = {
-                'student': student,
-                'attendance_percentage': round(attendance_percentage, 2),
-                'attendance_count': attendance_count,
-                'total_days': total_days,
-                'total_books': total_books,
-            }
+            student = Student.objects.select_related('user').get(user=request.user)
+            # Same cached data as the student dashboard page
+            context = student_dashboard_context(student)
             return render(request, 'school/student_dashboard.html', context)
         except Student.DoesNotExist:
             messages.error(request, 'Student profile not found!')
@@ -1,5 +1,9 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from .book_search import search_books
 from .models import *
+from .report_cards import REPORT_CARD_ADMIN_LIMIT, generate_report_cards
+from .timetable_generator import generate_timetable
 
 @admin.register(SchoolInfo)
 class SchoolInfoAdmin(admin.ModelAdmin):
@@ -28,10 +32,50 @@ class ClassAdmin(admin.ModelAdmin):
     list_display = ['name', 'section', 'class_teacher']
     list_filter = ['name', 'section']
 
+    def generate_routines(self, request, queryset):
+        result = generate_timetable(class_ids=list(queryset.values_list('id', flat=True)))
+        if not result['classes']:
+            self.message_user(request, "None of the selected classes have subjects with weekly periods.",
+                              messages.WARNING)
+            return
+
+        missing = sum(result['unplaced'].values())
+        self.message_user(request, f"Generated {len(result['routines'])} routines for "
+                                   f"{len(result['classes'])} classes.")
+        if missing:
+            self.message_user(request, f"{missing} period(s) could not be placed without a clash.", messages.WARNING)
+
+    generate_routines.short_description = "Generate routines for selected classes"
+
+    def generate_class_report_cards(self, request, queryset):
+        class_ids = list(queryset.values_list('id', flat=True))
+        exam_name = Result.objects.filter(subject__class_name_id__in=class_ids).order_by('-id').values_list(
+            'exam_name', flat=True).first()
+        if exam_name is None:
+            self.message_user(request, "The selected classes have no results yet.", messages.WARNING)
+            return
+
+        students = Result.objects.filter(exam_name=exam_name, subject__class_name_id__in=class_ids).values(
+            'student_id').distinct().count()
+        if students > REPORT_CARD_ADMIN_LIMIT:
+            ids = ' '.join(f'--class {class_id}' for class_id in class_ids)
+            self.message_user(request, f"{students} report cards are too many to render here. Run "
+                                       f"\"python manage.py generate_report_cards '{exam_name}' {ids}\" instead.",
+                              messages.WARNING)
+            return
+
+        count = generate_report_cards(exam_name, class_ids, workers=1)
+        self.message_user(request, f"Wrote {count} report cards for {exam_name} to {settings.MEDIA_URL}report_cards/.")
+
+    generate_class_report_cards.short_description = "Generate report cards (latest exam) for selected classes"
+
+    actions = [generate_routines, generate_class_report_cards]
+
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
-    list_display = ['name', 'class_name', 'teacher']
+    list_display = ['name', 'class_name', 'teacher', 'weekly_periods']
     list_filter = ['class_name', 'teacher']
+    list_editable = ['weekly_periods']
 
 @admin.register(ClassRoutine)
 class ClassRoutineAdmin(admin.ModelAdmin):
@@ -39,6 +83,17 @@ class ClassRoutineAdmin(admin.ModelAdmin):
     list_filter = ['class_name', 'day', 'teacher']
     search_fields = ['class_name__name', 'subject__name', 'teacher__user__first_name', 'teacher__user__last_name']
 
+@admin.register(RoutineVersion)
+class RoutineVersionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    readonly_fields = ['is_active']
+
+@admin.register(TeacherUnavailability)
+class TeacherUnavailabilityAdmin(admin.ModelAdmin):
+    list_display = ['teacher', 'day', 'period']
+    list_filter = ['day', 'teacher']
+
 @admin.register(Notice)
 class NoticeAdmin(admin.ModelAdmin):
     list_display = ['title', 'target_audience', 'created_at']
@@ -50,21 +105,71 @@ class AttendanceAdmin(admin.ModelAdmin):
     list_display = ['student', 'date', 'status', 'class_name']
     list_filter = ['date', 'status', 'class_name']
 
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'period_type', 'period', 'present', 'absent']
+    list_filter = ['period_type', 'period']
+    search_fields = ['student__student_id', 'student__user__first_name', 'student__user__last_name']
+
 @admin.register(Result)
 class ResultAdmin(admin.ModelAdmin):
     list_display = ['student', 'subject', 'exam_name', 'marks', 'grade']
     list_filter = ['exam_name', 'grade']
 
+@admin.register(ExamRank)
+class ExamRankAdmin(admin.ModelAdmin):
+    list_display = ['student', 'exam_name', 'class_name', 'obtained_marks', 'percentage', 'section_rank', 'class_rank']
+    list_filter = ['exam_name', 'class_name']
+
 @admin.register(Fee)
 class FeeAdmin(admin.ModelAdmin):
-    list_display = ['student', 'amount', 'due_date', 'paid']
-    list_filter = ['paid', 'due_date']
+    list_display = ['student', 'term', 'amount', 'due_date', 'paid']
+    list_filter = ['paid', 'term', 'due_date']
+    list_select_related = ['student__user']
+
+@admin.register(PaymentIntent)
+class PaymentIntentAdmin(admin.ModelAdmin):
+    list_display = ['gateway_reference', 'fee', 'amount', 'status', 'created_at', 'paid_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['gateway_reference', 'idempotency_key', 'fee__student__student_id']
+    list_select_related = ['fee__student__user']
+    readonly_fields = ['idempotency_key', 'gateway_reference', 'created_at', 'paid_at']
+
+@admin.register(Reminder)
+class ReminderAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'channel', 'fee', 'book_issue', 'sent_at']
+    list_filter = ['channel', 'sent_at']
+    search_fields = ['recipient']
+    raw_id_fields = ['fee', 'book_issue']
+
+@admin.register(BankStatement)
+class BankStatementAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'imported_at', 'uploaded_by', 'lines', 'matched', 'review', 'skipped']
+
+@admin.register(StatementLine)
+class StatementLineAdmin(admin.ModelAdmin):
+    list_display = ['transaction_date', 'reference', 'amount', 'status', 'fee', 'statement']
+    list_filter = ['status', 'transaction_date']
+    search_fields = ['reference', 'description']
+    raw_id_fields = ['fee']
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'intent', 'outcome', 'received_at']
+    list_filter = ['event_type', 'outcome']
+    search_fields = ['event_id', 'intent__gateway_reference']
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'isbn', 'quantity', 'available']
     search_fields = ['title', 'author', 'isbn']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Same matching as the library search: FTS index with typo correction, LIKE without FTS5
+        if not search_term.strip():
+            return queryset, False
+        return search_books(search_term).filter(queryset), False
+
 @admin.register(BookIssue)
 class BookIssueAdmin(admin.ModelAdmin):
     list_display = ['book', 'student', 'issue_date', 'return_date', 'returned']
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class SchoolConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'school'
-    verbose_name = 'School Management'
\ No newline at end of file
+    verbose_name = 'School Management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,160 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+
+from .attendance_bits import apply_bitmap_changes
+from .dashboard import invalidate_all_student_dashboards, invalidate_student_dashboards
+from .models import Attendance, AttendanceSummary, Student
+from .routines import get_routine_classes, student_class_ids
+
+
+ATTENDANCE_STATUSES = [value for value, label in Attendance._meta.get_field('status').choices]
+# First month of each term; months before the first one belong to the last term of the previous year
+TERM_START_MONTHS = getattr(settings, 'SCHOOL_TERM_START_MONTHS', (1, 5, 9))
+
+
+def month_key(day):
+    return day.strftime('%Y-%m')
+
+
+def term_key(day):
+    term = sum(1 for month in TERM_START_MONTHS if month <= day.month)
+    if term == 0:
+        return f'{day.year - 1}-T{len(TERM_START_MONTHS)}'
+    return f'{day.year}-T{term}'
+
+
+def summary_periods(day):
+    """(period_type, period) of every AttendanceSummary row a date counts towards"""
+    return [('total', ''), ('month', month_key(day)), ('term', term_key(day))]
+
+
+def mark_attendance(date, statuses, class_obj=None, allowed_class_ids=None):
+    """
+    Save the register of one date with a single upsert.
+
+    ``statuses`` maps Student ids to 'Present' / 'Absent'. With ``class_obj``
+    every student must belong to that class, otherwise each student's class is
+    taken from their class name and section. ``allowed_class_ids`` limits the
+    classes the caller may mark. Existing rows of the same (student, date) are
+    updated in place (INSERT ... ON CONFLICT), so nothing is written if any row
+    is invalid and no row is read back per student.
+    Returns (saved, errors).
+    """
+    students = Student.objects.only('id', 'class_name', 'section').in_bulk(statuses)
+    classes = get_routine_classes()
+
+    rows = []
+    errors = []
+    for student_id, status in statuses.items():
+        student = students.get(student_id)
+        class_ids = student_class_ids(student, classes) if student else []
+        if class_obj is not None:
+            class_ids = [class_obj.id] if class_obj.id in class_ids else []
+
+        if student is None:
+            errors.append(f'Unknown student {student_id}.')
+        elif status not in ATTENDANCE_STATUSES:
+            errors.append(f'Invalid status "{status}" for {student}.')
+        elif not class_ids:
+            errors.append(f'{student} is not in {class_obj or "any class"}.')
+        elif allowed_class_ids is not None and class_ids[0] not in allowed_class_ids:
+            errors.append(f"You can't mark attendance for {student}'s class.")
+        else:
+            rows.append(Attendance(student_id=student_id, date=date, status=status, class_name_id=class_ids[0]))
+
+    if errors:
+        return 0, errors
+
+    with transaction.atomic():
+        # Lock the students (attendance rows that do not exist yet cannot be locked) so
+        # concurrent submissions of a register read the old statuses one after the other
+        # instead of both applying their deltas to the summaries
+        list(Student.objects.select_for_update().filter(id__in=statuses).order_by('id').values_list('id', flat=True))
+        previous = dict(Attendance.objects.filter(student_id__in=statuses, date=date)
+                        .values_list('student_id', 'status'))
+        Attendance.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['student', 'date'],
+            update_fields=['status', 'class_name'],
+        )
+        apply_attendance_changes([(row.student_id, row.class_name_id, date, previous.get(row.student_id), row.status)
+                                  for row in rows])
+    return len(rows), []
+
+
+def apply_attendance_changes(changes):
+    """
+    Keep AttendanceSummary and the AttendanceMonth bitmaps in step with Attendance writes.
+
+    ``changes`` are (student_id, class_id, date, old_status, new_status) with
+    None for a row that did not exist / was deleted. Students with the same date
+    and the same change are updated together with one
+    ``UPDATE ... SET present = present + n``, so a whole register costs a few statements.
+    """
+    apply_bitmap_changes([(student_id, class_id, day, new_status)
+                          for student_id, class_id, day, old_status, new_status in changes])
+
+    groups = defaultdict(set)
+    for student_id, class_id, day, old_status, new_status in changes:
+        present = (new_status == 'Present') - (old_status == 'Present')
+        absent = (new_status == 'Absent') - (old_status == 'Absent')
+        if present or absent:
+            groups[day, present, absent].add(student_id)
+    if not groups:
+        return
+
+    with transaction.atomic():
+        # Only new attendance rows can need new summary rows
+        AttendanceSummary.objects.bulk_create(
+            [AttendanceSummary(student_id=student_id, period_type=period_type, period=period)
+             for (day, present, absent), student_ids in groups.items() if present + absent > 0
+             for student_id in student_ids
+             for period_type, period in summary_periods(day)],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        for (day, present, absent), student_ids in groups.items():
+            periods = Q()
+            for period_type, period in summary_periods(day):
+                periods |= Q(period_type=period_type, period=period)
+            AttendanceSummary.objects.filter(periods, student_id__in=student_ids).update(
+                present=F('present') + present, absent=F('absent') + absent)
+        transaction.on_commit(lambda: invalidate_student_dashboards(*{change[0] for change in changes}))
+
+
+def rebuild_attendance_summaries():
+    """Recount every AttendanceSummary from Attendance with one grouped query (repair)"""
+    monthly = (Attendance.objects.order_by()
+               .annotate(month=TruncMonth('date'))
+               .values('student_id', 'month')
+               .annotate(present=Count('id', filter=Q(status='Present')),
+                         absent=Count('id', filter=Q(status='Absent'))))
+
+    totals = defaultdict(lambda: [0, 0])
+    for row in monthly.iterator():
+        for key in summary_periods(row['month']):
+            totals[(row['student_id'],) + key][0] += row['present']
+            totals[(row['student_id'],) + key][1] += row['absent']
+
+    with transaction.atomic():
+        AttendanceSummary.objects.all().delete()
+        AttendanceSummary.objects.bulk_create(
+            (AttendanceSummary(student_id=student_id, period_type=period_type, period=period,
+                               present=present, absent=absent)
+             for (student_id, period_type, period), (present, absent) in totals.items()),
+            batch_size=1000,
+        )
+        transaction.on_commit(invalidate_all_student_dashboards)
+    return len(totals)
+
+
+def attendance_summary(student, period_type='total', period=''):
+    """Attendance totals of a student from the rollup (one indexed lookup)"""
+    summary = AttendanceSummary.objects.filter(student=student, period_type=period_type, period=period).first()
+    return summary or AttendanceSummary(student=student, period_type=period_type, period=period)
@@ -0,0 +1,154 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Attendance, AttendanceMonth
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def day_mask(day):
+    return 1 << (day.day - 1)
+
+
+def set_bits(bits):
+    """Day numbers (1-31) whose bit is set"""
+    days = []
+    while bits:
+        low = bits & -bits
+        days.append(low.bit_length())
+        bits ^= low
+    return days
+
+
+def apply_bitmap_changes(changes):
+    """
+    Set or clear the day bits of Attendance writes.
+
+    ``changes`` are (student_id, class_id, date, new_status) with None for a
+    deleted row. Rows with the same date and status are written with one
+    ``UPDATE ... SET present = present | mask``; clears run first so an edit
+    that keeps the date ends with the new status.
+    """
+    groups = defaultdict(set)
+    for student_id, class_id, day, status in changes:
+        groups[day, status, class_id].add(student_id)
+    if not groups:
+        return
+
+    with transaction.atomic():
+        AttendanceMonth.objects.bulk_create(
+            [AttendanceMonth(student_id=student_id, class_name_id=class_id, month=month_start(day))
+             for (day, status, class_id), student_ids in groups.items() if status
+             for student_id in student_ids],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        for (day, status, class_id), student_ids in sorted(groups.items(), key=lambda item: item[0][1] is not None):
+            mask = day_mask(day)
+            months = AttendanceMonth.objects.filter(student_id__in=student_ids, month=month_start(day))
+            if status is None:
+                months.update(marked=F('marked').bitand(~mask), present=F('present').bitand(~mask))
+            elif status == 'Present':
+                months.update(marked=F('marked').bitor(mask), present=F('present').bitor(mask),
+                              class_name_id=class_id)
+            else:
+                months.update(marked=F('marked').bitor(mask), present=F('present').bitand(~mask),
+                              class_name_id=class_id)
+
+
+def rebuild_attendance_bitmaps():
+    """Rebuild every AttendanceMonth from Attendance in one pass (repair)"""
+    months = {}
+    rows = Attendance.objects.order_by('date').values_list('student_id', 'class_name_id', 'date', 'status')
+    for student_id, class_id, day, status in rows.iterator(chunk_size=5000):
+        key = (student_id, month_start(day))
+        month = months.get(key)
+        if month is None:
+            month = months[key] = AttendanceMonth(student_id=student_id, month=key[1])
+        month.class_name_id = class_id
+        month.marked |= day_mask(day)
+        if status == 'Present':
+            month.present |= day_mask(day)
+
+    with transaction.atomic():
+        AttendanceMonth.objects.all().delete()
+        AttendanceMonth.objects.bulk_create(months.values(), batch_size=1000)
+    return len(months)
+
+
+def student_months(student_id, start, end):
+    """AttendanceMonth rows of a student between two dates, oldest first (one query, one row per month)"""
+    return list(AttendanceMonth.objects.filter(student_id=student_id, month__gte=month_start(start),
+                                               month__lte=month_start(end)).order_by('month'))
+
+
+def monthly_percentages(months):
+    """{month: (present days, school days, percentage)} from popcounts"""
+    percentages = {}
+    for month in months:
+        present = bin(month.present & month.marked).count('1')
+        total = bin(month.marked).count('1')
+        percentages[month.month] = (present, total, round(present / total * 100, 2) if total else 0)
+    return percentages
+
+
+def attendance_streaks(months):
+    """
+    (current, longest) runs of consecutive present school days.
+
+    Unmarked days (holidays, weekends) neither break nor extend a streak.
+    """
+    current = longest = 0
+    for month in months:
+        present = month.present
+        for day in set_bits(month.marked):
+            if present >> (day - 1) & 1:
+                current += 1
+                longest = max(longest, current)
+            else:
+                current = 0
+    return current, longest
+
+
+def student_attendance_history(student_id, year=None):
+    """Per-month percentages, totals and streaks of one student for a year"""
+    year = year or timezone.localdate().year
+    months = student_months(student_id, date(year, 1, 1), date(year, 12, 31))
+    percentages = monthly_percentages(months)
+    present = sum(row[0] for row in percentages.values())
+    total = sum(row[1] for row in percentages.values())
+    current_streak, longest_streak = attendance_streaks(months)
+    return {
+        'months': percentages,
+        'present': present,
+        'absent': total - present,
+        'total_days': total,
+        'percentage': round(present / total * 100, 2) if total else 0,
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+    }
+
+
+def class_daily_counts(class_id, month):
+    """
+    {day: (present, marked)} of a class for one month.
+
+    Only the set bits of each student's bitfields are visited, so the whole
+    class costs one query and a few bit operations per student.
+    """
+    present_counts = defaultdict(int)
+    marked_counts = defaultdict(int)
+    rows = AttendanceMonth.objects.filter(class_name_id=class_id, month=month_start(month)).values_list(
+        'marked', 'present')
+    for marked, present in rows:
+        for day in set_bits(marked):
+            marked_counts[day] += 1
+        for day in set_bits(present & marked):
+            present_counts[day] += 1
+    return {day: (present_counts[day], marked_counts[day]) for day in sorted(marked_counts)}
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+
+from .models import Attendance
+
+
+# Start of the week / month a date falls in (weeks start on Monday)
+REPORT_PERIODS = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1),
+}
+
+PRESENT = Count('id', filter=Q(status='Present'))
+
+
+def _attendance(start, end, class_ids=None):
+    attendance = Attendance.objects.filter(date__gte=start, date__lte=end).order_by()
+    if class_ids is not None:
+        attendance = attendance.filter(class_name_id__in=class_ids)
+    return attendance
+
+
+def class_attendance_rates(start, end, period='day', class_ids=None):
+    """
+    Attendance rate of every class per day, week or month.
+
+    One grouped query counts present / total per (class, date) using the
+    (class_name, date, status) index; days are then rolled up into weeks or
+    months (at most classes x school days rows, never one row per student).
+    Returns {class_id: [{'period', 'present', 'total', 'rate'}, ...]} in date order.
+    """
+    rows = (_attendance(start, end, class_ids)
+            .values('class_name_id', 'date')
+            .annotate(present=PRESENT, total=Count('id')))
+
+    bucket = REPORT_PERIODS[period]
+    counts = defaultdict(lambda: [0, 0])
+    for row in rows:
+        key = (row['class_name_id'], bucket(row['date']))
+        counts[key][0] += row['present']
+        counts[key][1] += row['total']
+
+    rates = defaultdict(list)
+    for (class_id, period_start), (present, total) in sorted(counts.items()):
+        rates[class_id].append({
+            'period': period_start,
+            'present': present,
+            'total': total,
+            'rate': round(present * 100 / total, 2),
+        })
+    return rates
+
+
+def class_attendance_totals(start, end, class_ids=None):
+    """{class_id: {'present', 'total', 'rate'}} over the whole range"""
+    rows = (_attendance(start, end, class_ids)
+            .values('class_name_id')
+            .annotate(present=PRESENT, total=Count('id')))
+    return {
+        row['class_name_id']: {
+            'present': row['present'],
+            'total': row['total'],
+            'rate': round(row['present'] * 100 / row['total'], 2),
+        }
+        for row in rows
+    }
+
+
+def chronic_absentees(start, end, threshold=75, class_ids=None, limit=100):
+    """
+    Students whose attendance rate is below ``threshold`` percent, worst first.
+
+    The rate is computed and filtered in the database (HAVING), so only the
+    listed students are returned.
+    """
+    return list(
+        _attendance(start, end, class_ids)
+        .values('student_id', 'class_name_id')
+        .annotate(
+            present=PRESENT,
+            total=Count('id'),
+            rate=Cast(PRESENT, FloatField()) * 100 / Cast(Count('id'), FloatField()),
+            student_code=F('student__student_id'),
+            first_name=F('student__user__first_name'),
+            last_name=F('student__user__last_name'),
+        )
+        .filter(rate__lt=threshold)
+        .order_by('rate', 'student_id')[:limit]
+    )
@@ -0,0 +1,181 @@
+import difflib
+import re
+import unicodedata
+from functools import reduce
+from operator import and_
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Book
+
+
+FTS_TABLE = 'school_book_fts'
+VOCAB_TABLE = 'school_book_fts_vocab'
+# bm25 column weights: a hit in the title counts more than one in the author or ISBN
+RANK = f'bm25({FTS_TABLE}, 10.0, 4.0, 1.0)'
+# Words shorter than this are never typo-corrected
+FUZZY_MIN_LENGTH = 4
+FUZZY_MATCHES = 3
+AUTOCOMPLETE_LIMIT = 8
+
+_fts_available = {}
+
+
+def fts_available():
+    """Whether the FTS5 index exists (created by migration 0022 on SQLite builds with FTS5)"""
+    if connection.alias not in _fts_available:
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                available = cursor.fetchone() is not None
+        _fts_available[connection.alias] = available
+    return _fts_available[connection.alias]
+
+
+def _fold(text):
+    """Lower case without diacritics, like the unicode61 tokenizer"""
+    return ''.join(character for character in unicodedata.normalize('NFKD', text.lower())
+                   if not unicodedata.combining(character))
+
+
+def query_terms(query):
+    return re.findall(r'\w+', _fold(query))
+
+
+def _isbn(query):
+    """The query as a bare ISBN (digits and X) if it looks like one"""
+    compact = re.sub(r'[\s-]', '', query).upper()
+    return compact if re.fullmatch(r'\d{9}[\dX]|\d{13}', compact) else None
+
+
+def _vocabulary(cursor, term):
+    """
+    (has_prefix_match, close_terms) of a query term from the index vocabulary.
+
+    Only vocabulary terms sharing the first letter and of a similar length
+    are compared, so a lookup reads a small slice of the vocabulary.
+    """
+    cursor.execute(f'SELECT 1 FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s LIMIT 1', [term, term + '\uffff'])
+    if cursor.fetchone() is not None or len(term) < FUZZY_MIN_LENGTH:
+        return True, []
+    cursor.execute(
+        f'SELECT term FROM {VOCAB_TABLE} WHERE term >= %s AND term < %s AND length(term) BETWEEN %s AND %s',
+        [term[0], chr(ord(term[0]) + 1), len(term) - 2, len(term) + 2])
+    candidates = [row[0] for row in cursor.fetchall()]
+    return False, difflib.get_close_matches(term, candidates, n=FUZZY_MATCHES, cutoff=0.75)
+
+
+def match_expression(query):
+    """
+    FTS5 MATCH expression of a search box query.
+
+    Every word is a prefix query, so "harr pot" finds "Harry Potter". A
+    word of 4 or more letters that is not the start of any indexed term is
+    replaced by the closest indexed terms, so "hary pottr" finds it too.
+    Returns '' when nothing searchable is left.
+    """
+    parts = []
+    with connection.cursor() as cursor:
+        for term in query_terms(query):
+            found, corrections = _vocabulary(cursor, term)
+            if found:
+                parts.append(f'"{term}"*')
+            elif corrections:
+                parts.append('(' + ' OR '.join(f'"{correction}"' for correction in corrections) + ')')
+            else:
+                return ''  # Every word must match something
+    return ' AND '.join(parts)
+
+
+class BookSearchResults:
+    """
+    Ranked search results, sliceable and countable so Django's Paginator can page them.
+
+    With FTS5 only the ids of the requested page are read from the index
+    (ordered by bm25) and the books are then loaded by primary key; other
+    backends get a LIKE query ordered by a simple relevance score.
+    """
+
+    def __init__(self, query):
+        self.query = query.strip()
+        self.isbn = _isbn(self.query)
+        self.expression = match_expression(self.query) if fts_available() and not self.isbn else None
+        self._count = None
+
+    def fallback_queryset(self):
+        if self.isbn:
+            return Book.objects.filter(Q(isbn__iexact=self.query) | Q(isbn__iexact=self.isbn)).order_by('title')
+        terms = self.query.split()
+        if not terms:
+            return Book.objects.none()
+        matches = reduce(and_, (Q(title__icontains=term) | Q(author__icontains=term) | Q(isbn__istartswith=term)
+                                for term in terms))
+        return Book.objects.filter(matches).annotate(relevance=Case(
+            When(title__istartswith=self.query, then=Value(0)),
+            When(title__icontains=self.query, then=Value(1)),
+            When(author__icontains=self.query, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        )).order_by('relevance', 'title', 'id')
+
+    def count(self):
+        if self._count is None:
+            if self.expression is None:
+                self._count = self.fallback_queryset().count()
+            elif not self.expression:
+                self._count = 0
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [self.expression])
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def filter(self, queryset):
+        """``queryset`` narrowed to the matching books, in its own order (e.g. the admin changelist)"""
+        if self.expression is None:
+            return queryset.filter(id__in=self.fallback_queryset().values('id'))
+        if not self.expression:
+            return queryset.none()
+        return queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                                             [self.expression]))
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        if self.expression is None:
+            return list(self.fallback_queryset()[start:stop])
+        if not self.expression or stop <= start:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY {RANK} LIMIT %s OFFSET %s',
+                [self.expression, stop - start, start])
+            ids = [row[0] for row in cursor.fetchall()]
+        books = Book.objects.in_bulk(ids)
+        return [books[book_id] for book_id in ids if book_id in books]
+
+
+def search_books(query):
+    return BookSearchResults(query)
+
+
+def autocomplete_books(query, limit=AUTOCOMPLETE_LIMIT):
+    """Best matches of a partly typed query for the search box"""
+    return search_books(query)[:limit]
+
+
+def rebuild_book_search_index():
+    """Rebuild the FTS index from school_book (repair); returns False without FTS5"""
+    if not fts_available():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
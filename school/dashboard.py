@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import AttendanceSummary, BookIssue, Fee, Notice, Result, Student
+
+
+# Dashboard data is cached per student in the shared cache (settings.CACHES)
+# until a signal (see school/signals.py) or a bulk write drops it, for at most
+# a few minutes. Keys include the date because "overdue" moves with it.
+DASHBOARD_CACHE_TIMEOUT = 60 * 5
+RECENT_RESULTS = 3
+RECENT_NOTICES = 3
+
+
+def dashboard_key(student_id):
+    return f'dashboard:{student_id}:{timezone.localdate().isoformat()}'
+
+
+def _student_aggregate(model, aggregate, output_field=IntegerField()):
+    """Correlated subquery computing ``aggregate`` over the student's rows of ``model``"""
+    rows = (model.objects.filter(student=OuterRef('pk')).order_by()
+            .values('student').annotate(value=aggregate).values('value'))
+    return Coalesce(Subquery(rows), Value(0), output_field=output_field)
+
+
+def _summary(field):
+    rows = AttendanceSummary.objects.filter(student=OuterRef('pk'), period_type='total', period='').values(field)
+    return Coalesce(Subquery(rows[:1]), Value(0), output_field=IntegerField())
+
+
+def student_kpis(student_id):
+    """
+    Attendance, fee and library figures of a student in one query.
+
+    Each figure is a conditional aggregate in a correlated subquery of the
+    student row, so the whole set is a single round trip.
+    """
+    today = timezone.localdate()
+    return Student.objects.filter(pk=student_id).values('pk').annotate(
+        present=_summary('present'),
+        absent=_summary('absent'),
+        total_fees=_student_aggregate(Fee, Count('id')),
+        paid_fees=_student_aggregate(Fee, Count('id', filter=Q(paid=True))),
+        due_amount=_student_aggregate(Fee, Sum('amount', filter=Q(paid=False)),
+                                        DecimalField(max_digits=12, decimal_places=2)),
+        overdue_fees=_student_aggregate(Fee, Count('id', filter=Q(paid=False, due_date__lt=today))),
+        total_books=_student_aggregate(BookIssue, Count('id', filter=Q(returned=False))),
+        overdue_books=_student_aggregate(BookIssue, Count('id', filter=Q(returned=False, return_date__lt=today))),
+    ).first()
+
+
+def get_student_dashboard(student_id):
+    """KPIs and recent results of a student, cached (two queries on a miss, none on a hit)"""
+    key = dashboard_key(student_id)
+    data = cache.get(key)
+    if data is None:
+        data = student_kpis(student_id) or {}
+        data['recent_results'] = list(Result.objects.filter(student_id=student_id)
+                                      .select_related('subject').order_by('-id')[:RECENT_RESULTS])
+        cache.set(key, data, DASHBOARD_CACHE_TIMEOUT)
+    return data
+
+
+def get_recent_notices(audience):
+    """Latest notices for an audience ('Students', 'Teachers', ...), shared by every user"""
+    return cache.get_or_set(
+        f'dashboard:notices:{audience}',
+        lambda: list(Notice.objects.filter(target_audience__in=[audience, 'All']).order_by('-created_at')[:RECENT_NOTICES]),
+        DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
+def student_dashboard_context(student):
+    """Template context of the student dashboard (used by both dashboard views)"""
+    data = get_student_dashboard(student.id)
+    present = data.get('present', 0)
+    total_days = present + data.get('absent', 0)
+    total_fees = data.get('total_fees', 0)
+    paid_fees = data.get('paid_fees', 0)
+    return {
+        'student': student,
+        'attendance_percentage': round(present / total_days * 100, 2) if total_days else 0,
+        'attendance_count': present,
+        'total_days': total_days,
+        'recent_results': data['recent_results'],
+        'recent_notices': get_recent_notices('Students'),
+        'total_books': data.get('total_books', 0),
+        'overdue_books': data.get('overdue_books', 0),
+        'total_fees': total_fees,
+        'paid_fees': paid_fees,
+        'pending_fees': total_fees - paid_fees,
+        'overdue_fees': data.get('overdue_fees', 0),
+        'due_amount': data.get('due_amount', 0),
+    }
+
+
+def invalidate_student_dashboards(*student_ids):
+    cache.delete_many([dashboard_key(student_id) for student_id in student_ids])
+
+
+def invalidate_all_student_dashboards():
+    invalidate_student_dashboards(*Student.objects.values_list('id', flat=True))
+
+
+def invalidate_notices():
+    cache.delete_many([f'dashboard:notices:{audience}'
+                       for audience, label in Notice._meta.get_field('target_audience').choices])
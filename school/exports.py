@@ -0,0 +1,92 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+from .models import Attendance, Fee, Result
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object that returns what is written, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, filename):
+    """
+    Stream rows as a CSV download.
+
+    ``rows`` is an iterable (usually a generator reading the database in
+    chunks), so every row is written to the client as soon as it is read.
+    """
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def attendance_export_rows(attendance):
+    yield ['Date', 'Student ID', 'Student Name', 'Class', 'Section', 'Status']
+    attendance = attendance.select_related('student__user', 'class_name').order_by('date', 'id')
+    for record in attendance.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            record.date.isoformat(),
+            record.student.student_id,
+            record.student.user.get_full_name(),
+            record.class_name.name,
+            record.class_name.section,
+            record.status,
+        ]
+
+
+def result_export_rows(results):
+    yield ['Student ID', 'Student Name', 'Class', 'Section', 'Subject', 'Exam', 'Marks', 'Total Marks', 'Grade']
+    results = results.select_related('student__user', 'subject__class_name').order_by('exam_name', 'subject_id', 'id')
+    for result in results.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            result.student.student_id,
+            result.student.user.get_full_name(),
+            result.subject.class_name.name,
+            result.subject.class_name.section,
+            result.subject.name,
+            result.exam_name,
+            result.marks,
+            result.total_marks,
+            result.grade,
+        ]
+
+
+def fee_export_rows(fees):
+    yield ['Student ID', 'Student Name', 'Class', 'Section', 'Term', 'Amount', 'Due Date', 'Paid',
+           'Payment Date']
+    fees = fees.select_related('student__user').order_by('due_date', 'id')
+    for fee in fees.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            fee.student.student_id,
+            fee.student.user.get_full_name(),
+            fee.student.class_name,
+            fee.student.section,
+            fee.term,
+            fee.amount,
+            fee.due_date.isoformat(),
+            'Yes' if fee.paid else 'No',
+            fee.payment_date.isoformat() if fee.payment_date else '',
+        ]
+
+
+def export_attendance_csv(attendance=None):
+    attendance = Attendance.objects.all() if attendance is None else attendance
+    return stream_csv(attendance_export_rows(attendance), 'attendance.csv')
+
+
+def export_results_csv(results=None):
+    results = Result.objects.all() if results is None else results
+    return stream_csv(result_export_rows(results), 'results.csv')
+
+
+def export_fees_csv(fees=None):
+    fees = Fee.objects.all() if fees is None else fees
+    return stream_csv(fee_export_rows(fees), 'fees.csv')
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .dashboard import invalidate_student_dashboards
+from .models import Fee, Student
+
+
+DUE_SOON_DAYS = 30
+
+
+def generate_term_fees(term, amount, due_date, class_name=None, section=None):
+    """
+    Create the invoice of a term for every student (or the students of a class / section).
+
+    Students that already have an invoice for the term are skipped, so a run
+    can be repeated; the new invoices are written with batched INSERTs.
+    Returns the number of invoices created.
+    """
+    students = Student.objects.order_by('id')
+    if class_name:
+        students = students.filter(class_name=class_name)
+    if section:
+        students = students.filter(section=section)
+
+    with transaction.atomic():
+        # Locking the students serializes overlapping runs, so the count below is this run's
+        candidates = list(students.select_for_update().values_list('id', flat=True))
+        invoiced = set(Fee.objects.filter(term=term, student__in=students).values_list('student_id', flat=True))
+        student_ids = [student_id for student_id in candidates if student_id not in invoiced]
+        # The (student, term) constraint still guards invoices created outside a run
+        Fee.objects.bulk_create(
+            (Fee(student_id=student_id, term=term, amount=amount, due_date=due_date) for student_id in student_ids),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts does not report skipped rows; count what the term has now
+        created = Fee.objects.filter(term=term, student__in=students).count() - len(invoiced)
+        # Bulk inserts skip the Fee signals
+        transaction.on_commit(lambda: invalidate_student_dashboards(*student_ids))
+    return created
+
+
+def _ledger_sums():
+    today = timezone.localdate()
+    return {
+        'invoices': Count('id'),
+        'unpaid': Count('id', filter=Q(paid=False)),
+        'paid_amount': Sum('amount', filter=Q(paid=True)),
+        'outstanding': Sum('amount', filter=Q(paid=False)),
+        'due_soon': Sum('amount', filter=Q(paid=False, due_date__gte=today,
+                                           due_date__lte=today + timedelta(days=DUE_SOON_DAYS))),
+    }
+
+
+def _totals(row):
+    return {
+        'invoices': row['invoices'],
+        'settled': row['invoices'] - row['unpaid'],
+        'unpaid': row['unpaid'],
+        'paid': row['paid_amount'] or Decimal(0),
+        'outstanding': row['outstanding'] or Decimal(0),
+        'due_soon': row['due_soon'] or Decimal(0),
+    }
+
+
+def fee_ledger(fees=None, breakdown=True):
+    """
+    Paid / outstanding totals overall and, with ``breakdown``, per class and due month.
+
+    Every rollup is one grouped query with conditional sums, so the cost
+    follows the number of classes and months, not the number of invoices.
+    Returns {'total', 'classes', 'months'}; classes are keyed by
+    (class_name, section) and months by their first day.
+    """
+    fees = (Fee.objects.all() if fees is None else fees).order_by()
+    ledger = {'total': _totals(fees.aggregate(**_ledger_sums())), 'classes': {}, 'months': {}}
+    if breakdown:
+        rows = (fees.values('student__class_name', 'student__section').annotate(**_ledger_sums())
+                .order_by('student__class_name', 'student__section'))
+        ledger['classes'] = {(row['student__class_name'], row['student__section']): _totals(row) for row in rows}
+        rows = fees.annotate(month=TruncMonth('due_date')).values('month').annotate(**_ledger_sums()).order_by('month')
+        ledger['months'] = {row['month']: _totals(row) for row in rows}
+    return ledger
+
+
+def top_defaulters(fees=None, limit=10):
+    """Students with the most outstanding, highest first (grouped, ordered and limited in the database)"""
+    fees = Fee.objects.all() if fees is None else fees
+    rows = (fees.filter(paid=False).order_by()
+            .values('student_id')
+            .annotate(
+                outstanding=Sum('amount'),
+                student_code=F('student__student_id'),
+                class_name=F('student__class_name'),
+                section=F('student__section'),
+                first_name=F('student__user__first_name'),
+                last_name=F('student__user__last_name'),
+            )
+            .filter(outstanding__gt=0)
+            .order_by('-outstanding', 'student_id')[:limit])
+    return [
+        {'student_id': row['student_code'], 'class_name': row['class_name'], 'section': row['section'],
+         'name': f"{row['first_name']} {row['last_name']}".strip(), 'outstanding': row['outstanding']}
+        for row in rows
+    ]
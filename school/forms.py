@@ -2,7 +2,7 @@ from django import forms
 from .models import (
     Student, Teacher, Notice, Attendance, Result, Fee,
     Book, BookIssue, ClassRoutine, Class, Subject,
-    Gallery, Contact, AdmissionApplication, RoutinePeriod
+    Gallery, Contact, AdmissionApplication, RoutinePeriod, RoutineVersion
 )
 
 
@@ -138,47 +138,211 @@ class ClassRoutineForm(forms.ModelForm):
 
 
 class BulkRoutineForm(forms.Form):
-    """Form for adding multiple routines at once"""
+    """Form for adding a class's routines for the whole week at once (a day x period grid)"""
     class_name = forms.ModelChoiceField(
         queryset=Class.objects.all(),
         widget=forms.Select(attrs={'class': 'form-select', 'id': 'bulk_class_name'})
     )
-    day = forms.ChoiceField(
-        choices=[
-            ('', 'Select Day'),
-            ('Sunday', 'Sunday'),
-            ('Monday', 'Monday'),
-            ('Tuesday', 'Tuesday'),
-            ('Wednesday', 'Wednesday'),
-            ('Thursday', 'Thursday'),
-        ],
-        widget=forms.Select(attrs={'class': 'form-select', 'id': 'bulk_day'})
-    )
 
-    # Dynamic fields for each period
+    # Dynamic fields for each day and period
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         periods = RoutinePeriod.objects.filter(is_break=False).order_by('order')
+        self.days = [day for day, label in ClassRoutine.DAY_CHOICES]
+
+        for day in self.days:
+            for period in periods:
+                # ✅ Subject field text input করুন
+                self.fields[f'day_{day}_period_{period.id}_subject'] = forms.CharField(
+                    required=False,
+                    widget=forms.TextInput(attrs={
+                        'class': 'form-control form-control-sm subject-input',
+                        'data-day': day,
+                        'data-period': period.id,
+                        'placeholder': 'Subject'
+                    })
+                )
+                self.fields[f'day_{day}_period_{period.id}_teacher'] = forms.ModelChoiceField(
+                    queryset=Teacher.objects.all(),
+                    required=False,
+                    widget=forms.Select(attrs={
+                        'class': 'form-select form-select-sm teacher-select',
+                        'data-day': day,
+                        'data-period': period.id,
+                    })
+                )
+        self.periods = periods
+
+    def get_entries(self):
+        """(day, period, subject_name, teacher) for every filled cell of the grid"""
+        entries = []
+        for day in self.days:
+            for period in self.periods:
+                subject_name = self.cleaned_data.get(f'day_{day}_period_{period.id}_subject')
+                teacher = self.cleaned_data.get(f'day_{day}_period_{period.id}_teacher')
+                entries.append((day, period, subject_name, teacher))
+        return entries
+
+
+class RoutineImportForm(forms.Form):
+    """Upload a whole school timetable as CSV or XLSX"""
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+    replace = forms.BooleanField(
+        required=False,
+        label='Replace existing routines of the imported classes',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError("Please upload a .csv or .xlsx file.")
+        return file
+
+
+class RoutineVersionForm(forms.Form):
+    """Save the live timetable, or copy an existing version, under a new name"""
+    name = forms.CharField(
+        max_length=100,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. 2025 Term 1'})
+    )
+    source = forms.ModelChoiceField(
+        queryset=RoutineVersion.objects.all(),
+        required=False,
+        empty_label='Current live routine',
+        label='Copy from',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    notes = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Optional notes'})
+    )
+
+    def clean_name(self):
+        name = self.cleaned_data['name'].strip()
+        if RoutineVersion.objects.filter(name=name).exists():
+            raise forms.ValidationError("A routine version with this name already exists.")
+        return name
+
+
+class AttendanceReportForm(forms.Form):
+    """Date range and options of the class attendance report"""
+    PERIOD_CHOICES = (
+        ('day', 'Daily'),
+        ('week', 'Weekly'),
+        ('month', 'Monthly'),
+    )
+    start = forms.DateField(widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    end = forms.DateField(widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    period = forms.ChoiceField(
+        choices=PERIOD_CHOICES,
+        initial='week',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    class_name = forms.ModelChoiceField(
+        queryset=Class.objects.all(),
+        required=False,
+        empty_label='All classes',
+        label='Class',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    threshold = forms.IntegerField(
+        min_value=1,
+        max_value=100,
+        initial=75,
+        label='Absentee threshold (%)',
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start')
+        end = cleaned_data.get('end')
+        if start and end and start > end:
+            raise forms.ValidationError("The start date must be before the end date.")
+        return cleaned_data
+
+
+class AttendanceFilterForm(forms.Form):
+    """Filters of the attendance records list"""
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    class_name = forms.ModelChoiceField(
+        queryset=Class.objects.all(),
+        required=False,
+        empty_label='All classes',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    status = forms.ChoiceField(
+        choices=(('', 'Any status'),) + Attendance._meta.get_field('status').choices,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+
+class MarksEntryForm(forms.Form):
+    """Subject and exam whose marks are entered in the marks grid"""
+    subject = forms.ModelChoiceField(
+        queryset=Subject.objects.select_related('class_name'),
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    exam_name = forms.CharField(
+        max_length=100,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. Half Yearly 2024'})
+    )
+    total_marks = forms.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=1,
+        initial=100,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['subject'].label_from_instance = lambda subject: f"{subject.name} ({subject.class_name})"
+
+
+class FeeRunForm(forms.Form):
+    """Amount and due date of a term's fee invoices"""
+    amount = forms.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        min_value=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    due_date = forms.DateField(widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    term = forms.CharField(
+        max_length=20,
+        required=False,
+        help_text="Leave blank to use the term of the due date",
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. 2024-T2'})
+    )
+    class_name = forms.CharField(
+        max_length=50,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'All classes'})
+    )
+    section = forms.CharField(
+        max_length=10,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'All sections'})
+    )
+
+
+class BankStatementForm(forms.Form):
+    """Upload a bank statement CSV to reconcile against the unpaid fees"""
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'})
+    )
 
-        for period in periods:
-            # ✅ Subject field text input করুন
-            self.fields[f'period_{period.id}_subject'] = forms.CharField(
-                required=False,
-                widget=forms.TextInput(attrs={
-                    'class': 'form-control subject-input',
-                    'data-period': period.id,
-                    'placeholder': 'Enter subject name'
-                })
-            )
-            self.fields[f'period_{period.id}_teacher'] = forms.ModelChoiceField(
-                queryset=Teacher.objects.all(),
-                required=False,
-                widget=forms.Select(attrs={
-                    'class': 'form-select teacher-select',
-                    'data-period': period.id,
-                    'placeholder': 'Select Teacher'
-                })
-            )
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith('.csv'):
+            raise forms.ValidationError("Please upload a .csv file.")
+        return file
 
 
 class GalleryForm(forms.ModelForm):
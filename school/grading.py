@@ -0,0 +1,43 @@
+from bisect import bisect_right
+
+from django.conf import settings
+
+
+# (minimum percentage, grade), highest first
+DEFAULT_GRADE_SCALE = [
+    (80, 'A+'),
+    (70, 'A'),
+    (60, 'A-'),
+    (50, 'B'),
+    (40, 'C'),
+    (33, 'D'),
+    (0, 'F'),
+]
+
+
+def grade_scale():
+    """Grade scale from settings.SCHOOL_GRADE_SCALE, as ascending (thresholds, grades)"""
+    scale = sorted(getattr(settings, 'SCHOOL_GRADE_SCALE', DEFAULT_GRADE_SCALE))
+    return [minimum for minimum, grade in scale], [grade for minimum, grade in scale]
+
+
+def assign_grades(percentages):
+    """
+    Grades of many percentages in one pass.
+
+    The scale is read once and each percentage is placed with a binary search,
+    so a whole class costs O(n log g).
+    """
+    thresholds, grades = grade_scale()
+    return [grades[max(bisect_right(thresholds, percentage) - 1, 0)] for percentage in percentages]
+
+
+def grade_for(marks, total_marks):
+    percentage = float(marks) * 100 / float(total_marks) if total_marks else 0
+    return assign_grades([percentage])[0]
+
+
+def pass_percentage():
+    """Lowest passing percentage: settings.SCHOOL_PASS_PERCENTAGE or the lowest grade above the failing one"""
+    thresholds, grades = grade_scale()
+    return getattr(settings, 'SCHOOL_PASS_PERCENTAGE', thresholds[1] if len(thresholds) > 1 else 0)
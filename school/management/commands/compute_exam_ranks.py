@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from school.ranking import update_all_exam_ranks, update_exam_ranks
+
+
+class Command(BaseCommand):
+    help = 'Recompute exam totals and merit positions (all exams by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', help='Only recompute this exam name')
+
+    def handle(self, *args, **options):
+        if options['exam']:
+            count = update_exam_ranks(options['exam'])
+        else:
+            count = update_all_exam_ranks()
+        self.stdout.write(self.style.SUCCESS(f'✅ Ranked {count} exam results'))
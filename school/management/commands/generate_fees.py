@@ -0,0 +1,31 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from school.attendance import term_key
+from school.fees import generate_term_fees
+
+
+class Command(BaseCommand):
+    help = "Create a term's fee invoices for every student (or one class) with batched inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('amount', help='Invoice amount, e.g. 1500')
+        parser.add_argument('due_date', help='Due date (YYYY-MM-DD)')
+        parser.add_argument('--term', help='Term label (default: the term of the due date, e.g. 2024-T2)')
+        parser.add_argument('--class', dest='class_name', help='Only students of this class, e.g. "Class 9"')
+        parser.add_argument('--section', help='Only students of this section')
+
+    def handle(self, *args, **options):
+        try:
+            amount = Decimal(options['amount'])
+            due_date = date.fromisoformat(options['due_date'])
+        except (InvalidOperation, ValueError):
+            raise CommandError('Give the amount as a number and the due date as YYYY-MM-DD.')
+        if amount <= 0:
+            raise CommandError('The amount must be positive.')
+
+        term = options['term'] or term_key(due_date)
+        count = generate_term_fees(term, amount, due_date, options['class_name'], options['section'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Created {count} fee invoices for {term}'))
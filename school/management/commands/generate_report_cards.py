@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from school.report_cards import generate_report_cards
+
+
+class Command(BaseCommand):
+    help = 'Render report-card PDFs of an exam into MEDIA_ROOT/report_cards/ using every CPU core'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam', help='Exam name, e.g. "Annual 2024"')
+        parser.add_argument('--class', dest='class_ids', type=int, action='append',
+                            help='Class id to render (repeatable, default: every class)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (default: number of CPUs)')
+
+    def handle(self, *args, **options):
+        def progress(done, queued):
+            self.stdout.write(f'Rendered {done}/{queued} report cards')
+            self.stdout.flush()
+
+        count = generate_report_cards(options['exam'], options['class_ids'], options['workers'], progress)
+        if not count:
+            self.stdout.write(self.style.WARNING(f'No results found for {options["exam"]}. Nothing to render.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'✅ Wrote {count} report cards to MEDIA_ROOT/report_cards/'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from school.models import Subject
+from school.timetable_generator import generate_timetable
+
+
+class Command(BaseCommand):
+    help = 'Generate class routines from Subject.weekly_periods, avoiding teacher clashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--class', dest='class_ids', type=int, action='append',
+                            help='Class id to generate (repeatable, default: every class with requirements)')
+        parser.add_argument('--time-budget', type=float, default=5.0,
+                            help='Seconds the solver may spend searching (default: 5)')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible timetables')
+        parser.add_argument('--dry-run', action='store_true', help='Solve without saving the routines')
+
+    def handle(self, *args, **options):
+        result = generate_timetable(
+            class_ids=options['class_ids'],
+            time_budget=options['time_budget'],
+            seed=options['seed'],
+            commit=not options['dry_run'],
+        )
+
+        if not result['classes']:
+            self.stdout.write(self.style.WARNING('No subjects with weekly periods found. Nothing to generate.'))
+            return
+
+        subjects = Subject.objects.select_related('class_name').in_bulk(
+            {subject_id for class_id, subject_id, teacher_id in result['unplaced']})
+        for (class_id, subject_id, teacher_id), missing in result['unplaced'].items():
+            subject = subjects[subject_id]
+            self.stdout.write(self.style.WARNING(
+                f'Could not place {missing} period(s) of {subject} for {subject.class_name}'))
+
+        action = 'Planned' if options['dry_run'] else 'Created'
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {action} {len(result["routines"])} routines for {len(result["classes"])} classes')
+        )
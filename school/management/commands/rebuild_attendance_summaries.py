@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from school.attendance import rebuild_attendance_summaries
+from school.attendance_bits import rebuild_attendance_bitmaps
+
+
+class Command(BaseCommand):
+    help = 'Recount the attendance summaries (overall, monthly and per term) and monthly bitmaps from the attendance records'
+
+    def handle(self, *args, **options):
+        count = rebuild_attendance_summaries()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt {count} attendance summaries'))
+        count = rebuild_attendance_bitmaps()
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt {count} monthly attendance bitmaps'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from school.book_search import rebuild_book_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text index of the library catalogue (SQLite FTS5)'
+
+    def handle(self, *args, **options):
+        if not rebuild_book_search_index():
+            self.stdout.write(self.style.WARNING('No full-text index on this database; book search uses LIKE queries.'))
+            return
+        self.stdout.write(self.style.SUCCESS('✅ Rebuilt the book search index'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from school.reminders import send_overdue_reminders
+
+
+class Command(BaseCommand):
+    help = ('Email / text parents one digest of their overdue fees and library books '
+            '(schedule it daily, e.g. with cron; reruns skip parents already reminded)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channel', choices=['email', 'sms', 'all'], default='all')
+        parser.add_argument('--limit', type=int, help='Send at most this many digests per channel')
+        parser.add_argument('--rate', type=float, help='Messages per second (default: SCHOOL_REMINDER_RATE)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the digests that would be sent')
+
+    def handle(self, *args, **options):
+        channels = ['email', 'sms'] if options['channel'] == 'all' else [options['channel']]
+        for channel in channels:
+            label = 'email' if channel == 'email' else 'SMS'
+
+            def progress(sent, total):
+                self.stdout.write(f'Sent {sent}/{total} {label} reminders')
+                self.stdout.flush()
+
+            sent, failed = send_overdue_reminders(channel, options['limit'], options['rate'], options['dry_run'],
+                                                  progress)
+            if options['dry_run']:
+                self.stdout.write(f'{sent} {label} reminders would be sent')
+                continue
+            self.stdout.write(self.style.SUCCESS(f'✅ Sent {sent} {label} reminders'))
+            if failed:
+                self.stdout.write(self.style.WARNING(f'{failed} {label} reminders failed and will be retried next run'))
@@ -0,0 +1,94 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .dashboard import invalidate_student_dashboards
+from .grading import assign_grades
+from .models import Result, Student
+from .ranking import update_exam_ranks
+from .result_stats import invalidate_result_stats
+from .routines import get_routine_classes, student_class_ids
+
+
+def class_students(class_obj):
+    """Students of a class (matched on name and section like the routines, falling back to the name)"""
+    students = Student.objects.filter(class_name=class_obj.name, section=class_obj.section)
+    if not students.exists():
+        students = Student.objects.filter(class_name=class_obj.name)
+    return students.select_related('user').order_by('roll_number', 'id')
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def save_marks(subject, exam_name, total_marks, marks):
+    """
+    Save the marks of one exam of a subject for many students at once.
+
+    ``marks`` maps Student ids to marks; a mark of None clears the student's
+    result. Every row is validated and graded first (one pass over the grade
+    scale); then existing results are updated with one batched UPDATE, new
+    ones inserted with one batched INSERT and cleared ones deleted in a
+    single transaction, the class is re-ranked for the exam and the cached
+    subject statistics and student dashboards are dropped. Nothing is written
+    if any row is invalid.
+    Returns (created, updated, cleared, errors); cleared holds the ids of the
+    students whose result was deleted.
+    """
+    errors = []
+    total = _decimal(total_marks)
+    if total is None or total <= 0:
+        return [], [], [], ['Total marks must be a positive number.']
+
+    students = Student.objects.only('id', 'class_name', 'section').in_bulk(marks)
+    classes = get_routine_classes()
+    rows = {}
+    clear = []
+    for student_id, value in marks.items():
+        student = students.get(student_id)
+        mark = _decimal(value)
+        if student is None:
+            errors.append(f'Unknown student {student_id}.')
+        elif subject.class_name_id not in student_class_ids(student, classes):
+            errors.append(f'Student {student.student_id} is not in {subject.class_name}.')
+        elif value is None:
+            clear.append(student_id)
+        elif mark is None or not 0 <= mark <= total:
+            errors.append(f'Marks of {student.student_id} must be between 0 and {total}.')
+        else:
+            rows[student_id] = mark
+    if errors:
+        return [], [], [], errors
+
+    grades = dict(zip(rows, assign_grades([float(mark * 100 / total) for mark in rows.values()])))
+
+    created = []
+    updated = []
+    with transaction.atomic():
+        existing = {result.student_id: result for result in Result.objects.select_for_update().filter(
+            subject=subject, exam_name=exam_name, student_id__in=rows)}
+        for student_id, mark in rows.items():
+            result = existing.get(student_id)
+            if result is None:
+                created.append(Result(student_id=student_id, subject=subject, exam_name=exam_name,
+                                      marks=mark, total_marks=total, grade=grades[student_id]))
+            else:
+                result.marks = mark
+                result.total_marks = total
+                result.grade = grades[student_id]
+                updated.append(result)
+        Result.objects.bulk_update(updated, ['marks', 'total_marks', 'grade'], batch_size=500)
+        Result.objects.bulk_create(created, batch_size=500)
+        cleared = list(Result.objects.filter(subject=subject, exam_name=exam_name, student_id__in=clear)
+                       .values_list('student_id', flat=True))
+        if cleared:
+            Result.objects.filter(subject=subject, exam_name=exam_name, student_id__in=cleared).delete()
+        update_exam_ranks(exam_name, [subject.class_name.name])
+        # Bulk writes skip the Result signals
+        transaction.on_commit(lambda: invalidate_result_stats((subject.id, exam_name)))
+        transaction.on_commit(lambda: invalidate_student_dashboards(*rows))
+    return created, updated, cleared, []
@@ -0,0 +1,241 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    replaces = [
+        ('school', '0003_admissionapplication_contact_and_more'),
+        ('school', '0004_student_area_village_student_district_and_more'),
+        ('school', '0005_alter_teacher_joining_date'),
+        ('school', '0006_alter_classroutine_options_classroutine_break_type_and_more'),
+        ('school', '0007_alter_classroutine_options_and_more'),
+        ('school', '0008_routineperiod_alter_classroutine_options_and_more'),
+        ('school', '0009_alter_classroutine_day'),
+    ]
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('school', '0002_alter_student_class_name_alter_student_date_of_birth_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdmissionApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('date_of_birth', models.DateField()),
+                ('gender', models.CharField(choices=[('Male', 'Male'), ('Female', 'Female'), ('Other', 'Other')], max_length=10)),
+                ('class_applying', models.CharField(max_length=50)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=15)),
+                ('address', models.TextField()),
+                ('father_name', models.CharField(max_length=100)),
+                ('mother_name', models.CharField(max_length=100)),
+                ('parent_phone', models.CharField(max_length=15)),
+                ('parent_email', models.EmailField(blank=True, max_length=254)),
+                ('previous_school', models.CharField(blank=True, max_length=200)),
+                ('last_class', models.CharField(blank=True, max_length=50)),
+                ('last_result', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('birth_certificate', models.FileField(blank=True, null=True, upload_to='admission_documents/birth_certificates/')),
+                ('father_nid', models.FileField(blank=True, null=True, upload_to='admission_documents/nid_cards/')),
+                ('mother_nid', models.FileField(blank=True, null=True, upload_to='admission_documents/nid_cards/')),
+                ('student_photo', models.ImageField(blank=True, null=True, upload_to='admission_documents/student_photos/')),
+                ('previous_result_card', models.FileField(blank=True, null=True, upload_to='admission_documents/result_cards/')),
+                ('application_date', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('reviewed', 'Reviewed'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('notes', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Admission Applications',
+                'ordering': ['-application_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Contact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=15)),
+                ('subject', models.CharField(choices=[('admission', 'Admission Inquiry'), ('academic', 'Academic Information'), ('fee', 'Fee Structure'), ('general', 'General Inquiry'), ('complaint', 'Complaint'), ('suggestion', 'Suggestion'), ('other', 'Other')], default='general', max_length=20)),
+                ('message', models.TextField()),
+                ('submitted_at', models.DateTimeField(auto_now_add=True)),
+                ('is_read', models.BooleanField(default=False)),
+                ('responded', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name_plural': 'Contact Messages',
+                'ordering': ['-submitted_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoutinePeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('is_break', models.BooleanField(default=False)),
+                ('break_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('order', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Routine Period',
+                'verbose_name_plural': 'Routine Periods',
+                'ordering': ['order', 'start_time'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='classroutine',
+            options={'ordering': ['class_name', 'day', 'period__order'], 'verbose_name': 'Class Routine', 'verbose_name_plural': 'Class Routines'},
+        ),
+        migrations.RemoveField(
+            model_name='student',
+            name='parent_name',
+        ),
+        migrations.AddField(
+            model_name='classroutine',
+            name='teacher',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, to='school.teacher'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='area_village',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='district',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='division',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='father_name',
+            field=models.CharField(blank=True, max_length=100, verbose_name="Father's Name"),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='house_details',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='mother_name',
+            field=models.CharField(blank=True, max_length=100, verbose_name="Mother's Name"),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='parent_address',
+            field=models.TextField(blank=True, verbose_name="Parent's Address"),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='parent_email',
+            field=models.EmailField(blank=True, max_length=254, verbose_name="Parent's Email"),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='postal_code',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='thana',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='area_village',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='district',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='division',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='house_details',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='postal_code',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='thana',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='classroutine',
+            name='class_name',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.class', verbose_name='Class'),
+        ),
+        migrations.AlterField(
+            model_name='classroutine',
+            name='day',
+            field=models.CharField(choices=[('Sunday', 'Sunday'), ('Monday', 'Monday'), ('Tuesday', 'Tuesday'), ('Wednesday', 'Wednesday'), ('Thursday', 'Thursday')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='parent_phone',
+            field=models.CharField(blank=True, max_length=15, verbose_name="Parent's Phone"),
+        ),
+        migrations.AlterField(
+            model_name='teacher',
+            name='joining_date',
+            field=models.DateField(),
+        ),
+        migrations.CreateModel(
+            name='Gallery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('image', models.ImageField(upload_to='gallery/')),
+                ('category', models.CharField(choices=[('school', 'School Campus'), ('events', 'School Events'), ('sports', 'Sports'), ('cultural', 'Cultural Programs'), ('classroom', 'Classroom Activities'), ('teachers', 'Teachers'), ('students', 'Students')], default='school', max_length=20)),
+                ('upload_date', models.DateTimeField(auto_now_add=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Gallery',
+                'ordering': ['-upload_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='classroutine',
+            name='period',
+            field=models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, to='school.routineperiod', verbose_name='Time Period'),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(
+            name='classroutine',
+            unique_together={('class_name', 'day', 'period')},
+        ),
+        migrations.RemoveField(
+            model_name='classroutine',
+            name='end_time',
+        ),
+        migrations.RemoveField(
+            model_name='classroutine',
+            name='start_time',
+        ),
+    ]
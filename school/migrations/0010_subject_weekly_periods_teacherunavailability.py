@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0003_squashed_0009_alter_classroutine_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='weekly_periods',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TeacherUnavailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.CharField(choices=[('Sunday', 'Sunday'), ('Monday', 'Monday'), ('Tuesday', 'Tuesday'), ('Wednesday', 'Wednesday'), ('Thursday', 'Thursday')], max_length=10)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.routineperiod', verbose_name='Time Period')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.teacher')),
+            ],
+            options={
+                'verbose_name': 'Teacher Unavailability',
+                'verbose_name_plural': 'Teacher Unavailability',
+                'unique_together': {('teacher', 'day', 'period')},
+            },
+        ),
+    ]
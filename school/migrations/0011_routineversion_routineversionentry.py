@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0010_subject_weekly_periods_teacherunavailability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoutineVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('is_active', models.BooleanField(default=False)),
+                ('notes', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Routine Version',
+                'verbose_name_plural': 'Routine Versions',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoutineVersionEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.CharField(choices=[('Sunday', 'Sunday'), ('Monday', 'Monday'), ('Tuesday', 'Tuesday'), ('Wednesday', 'Wednesday'), ('Thursday', 'Thursday')], max_length=10)),
+                ('class_name', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.class', verbose_name='Class')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.routineperiod', verbose_name='Time Period')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.subject')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.teacher')),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='school.routineversion')),
+            ],
+            options={
+                'unique_together': {('version', 'class_name', 'day', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:34
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+import django.db.models.deletion
+
+
+def backfill_attendance_summaries(apps, schema_editor):
+    Attendance = apps.get_model('school', 'Attendance')
+    AttendanceSummary = apps.get_model('school', 'AttendanceSummary')
+    term_start_months = getattr(settings, 'SCHOOL_TERM_START_MONTHS', (1, 5, 9))
+
+    def term_key(day):
+        term = sum(1 for month in term_start_months if month <= day.month)
+        if term == 0:
+            return f'{day.year - 1}-T{len(term_start_months)}'
+        return f'{day.year}-T{term}'
+
+    monthly = (Attendance.objects.order_by()
+               .annotate(month=TruncMonth('date'))
+               .values('student_id', 'month')
+               .annotate(present=Count('id', filter=Q(status='Present')),
+                         absent=Count('id', filter=Q(status='Absent'))))
+
+    totals = defaultdict(lambda: [0, 0])
+    for row in monthly.iterator():
+        month = row['month']
+        for key in (('total', ''), ('month', month.strftime('%Y-%m')), ('term', term_key(month))):
+            totals[(row['student_id'],) + key][0] += row['present']
+            totals[(row['student_id'],) + key][1] += row['absent']
+
+    AttendanceSummary.objects.bulk_create(
+        (AttendanceSummary(student_id=student_id, period_type=period_type, period=period,
+                           present=present, absent=absent)
+         for (student_id, period_type, period), (present, absent) in totals.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0011_routineversion_routineversionentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_type', models.CharField(choices=[('total', 'Overall'), ('month', 'Month'), ('term', 'Term')], max_length=5)),
+                ('period', models.CharField(blank=True, max_length=7)),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='school.student')),
+            ],
+            options={
+                'verbose_name': 'Attendance Summary',
+                'verbose_name_plural': 'Attendance Summaries',
+                'unique_together': {('student', 'period_type', 'period')},
+            },
+        ),
+        migrations.RunPython(backfill_attendance_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_attendance_months(apps, schema_editor):
+    Attendance = apps.get_model('school', 'Attendance')
+    AttendanceMonth = apps.get_model('school', 'AttendanceMonth')
+
+    months = {}
+    rows = Attendance.objects.order_by('date').values_list('student_id', 'class_name_id', 'date', 'status')
+    for student_id, class_id, day, status in rows.iterator(chunk_size=5000):
+        key = (student_id, day.replace(day=1))
+        month = months.get(key)
+        if month is None:
+            month = months[key] = AttendanceMonth(student_id=student_id, month=key[1])
+        mask = 1 << (day.day - 1)
+        month.class_name_id = class_id
+        month.marked |= mask
+        if status == 'Present':
+            month.present |= mask
+
+    AttendanceMonth.objects.bulk_create(months.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0012_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('marked', models.IntegerField(default=0)),
+                ('present', models.IntegerField(default=0)),
+                ('class_name', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='school.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['class_name', 'month'], name='school_atte_class_n_639760_idx')],
+                'unique_together': {('student', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_attendance_months, migrations.RunPython.noop),
+    ]
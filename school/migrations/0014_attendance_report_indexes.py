@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0013_attendancemonth'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['class_name', 'date', 'status'], name='school_atte_class_n_0f24e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'student', 'status'], name='school_atte_date_ed3e74_idx'),
+        ),
+    ]
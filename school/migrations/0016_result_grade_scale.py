@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0015_attendance_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='result',
+            name='grade',
+            field=models.CharField(blank=True, help_text='Leave blank to compute it from the grade scale', max_length=5),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['subject', 'exam_name'], name='school_resu_subject_728a6a_idx'),
+        ),
+    ]
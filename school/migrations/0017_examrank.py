@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0016_result_grade_scale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exam_name', models.CharField(max_length=100)),
+                ('obtained_marks', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('total_marks', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('section_rank', models.PositiveIntegerField(help_text='Dense rank within the class and section')),
+                ('class_rank', models.PositiveIntegerField(help_text='Dense rank across all sections of the class')),
+                ('class_name', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='school.class')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_ranks', to='school.student')),
+            ],
+            options={
+                'verbose_name': 'Exam Rank',
+                'verbose_name_plural': 'Exam Ranks',
+                'indexes': [models.Index(fields=['exam_name', 'class_name', 'section_rank'], name='school_exam_exam_na_9d37e4_idx')],
+                'unique_together': {('student', 'exam_name')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0017_examrank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fee',
+            name='term',
+            field=models.CharField(blank=True, help_text='Term of a fee run, e.g. 2024-T2', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['due_date', 'id'], name='school_fee_due_dat_dd0915_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='fee',
+            constraint=models.UniqueConstraint(condition=models.Q(('term', ''), _negated=True), fields=('student', 'term'), name='unique_fee_per_student_term'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('school', '0018_fee_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('idempotency_key', models.CharField(max_length=64, unique=True)),
+                ('gateway_reference', models.CharField(max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('duplicate', 'Duplicate (refund due)')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('fee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_intents', to='school.fee')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=64, unique=True)),
+                ('event_type', models.CharField(max_length=50)),
+                ('outcome', models.CharField(blank=True, max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('intent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='school.paymentintent')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='paymentintent',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'succeeded')), fields=('fee',), name='one_successful_payment_per_fee'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('school', '0019_payments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255)),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+                ('lines', models.PositiveIntegerField(default=0)),
+                ('matched', models.PositiveIntegerField(default=0)),
+                ('review', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0, help_text='Unreadable and already imported lines')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-imported_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.PositiveIntegerField()),
+                ('transaction_date', models.DateField()),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('matched', 'Matched'), ('review', 'Needs review'), ('unmatched', 'Unmatched'), ('resolved', 'Resolved'), ('ignored', 'Ignored')], max_length=10)),
+                ('candidate_fee_ids', models.JSONField(blank=True, default=list)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('fee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_lines', to='school.fee')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statement_lines', to='school.bankstatement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'transaction_date', 'id'], name='school_stat_status_824e28_idx')],
+            },
+        ),
+    ]
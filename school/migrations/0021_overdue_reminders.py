@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0020_bank_statements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS')], max_length=5)),
+                ('recipient', models.CharField(max_length=254)),
+                ('sent_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bookissue',
+            index=models.Index(fields=['returned', 'return_date'], name='school_book_returne_ed2812_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['paid', 'due_date'], name='school_fee_paid_791adb_idx'),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='book_issue',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='school.bookissue'),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='fee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='school.fee'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['fee', 'channel', 'sent_at'], name='school_remi_fee_id_2c1aca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['book_issue', 'channel', 'sent_at'], name='school_remi_book_is_291050_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+
+# SQLite FTS5 index of the book catalogue, kept in step with school_book by
+# triggers (so bulk writes and raw SQL are indexed too). The fts5vocab table
+# lists the indexed terms for typo correction. Other databases, or SQLite
+# builds without FTS5, use the LIKE fallback of school.book_search.
+CREATE_BOOK_SEARCH = [
+    """CREATE VIRTUAL TABLE school_book_fts USING fts5(
+        title, author, isbn,
+        content='school_book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    "CREATE VIRTUAL TABLE school_book_fts_vocab USING fts5vocab(school_book_fts, 'row')",
+    """CREATE TRIGGER school_book_fts_insert AFTER INSERT ON school_book BEGIN
+        INSERT INTO school_book_fts(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn);
+    END""",
+    """CREATE TRIGGER school_book_fts_delete AFTER DELETE ON school_book BEGIN
+        INSERT INTO school_book_fts(school_book_fts, rowid, title, author, isbn)
+        VALUES ('delete', old.id, old.title, old.author, old.isbn);
+    END""",
+    """CREATE TRIGGER school_book_fts_update AFTER UPDATE OF title, author, isbn ON school_book BEGIN
+        INSERT INTO school_book_fts(school_book_fts, rowid, title, author, isbn)
+        VALUES ('delete', old.id, old.title, old.author, old.isbn);
+        INSERT INTO school_book_fts(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn);
+    END""",
+    "INSERT INTO school_book_fts(school_book_fts) VALUES ('rebuild')",
+]
+
+DROP_BOOK_SEARCH = [
+    'DROP TRIGGER IF EXISTS school_book_fts_update',
+    'DROP TRIGGER IF EXISTS school_book_fts_delete',
+    'DROP TRIGGER IF EXISTS school_book_fts_insert',
+    'DROP TABLE IF EXISTS school_book_fts_vocab',
+    'DROP TABLE IF EXISTS school_book_fts',
+]
+
+
+def _has_fts5(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def create_book_search(apps, schema_editor):
+    if _has_fts5(schema_editor):
+        for statement in CREATE_BOOK_SEARCH:
+            schema_editor.execute(statement)
+
+
+def drop_book_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_BOOK_SEARCH:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('school', '0021_overdue_reminders'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_book_search, drop_book_search),
+    ]
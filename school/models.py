@@ -1,6 +1,7 @@
 from django.db import models
 from accounts.models import User
 from django.utils import timezone
+from .grading import grade_for
 
 
 class SchoolInfo(models.Model):
@@ -148,6 +149,8 @@ class Subject(models.Model):
     name = models.CharField(max_length=100)
     class_name = models.ForeignKey(Class, on_delete=models.CASCADE)
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    # Used by the timetable generator (0 = not scheduled automatically)
+    weekly_periods = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -173,14 +176,16 @@ class RoutinePeriod(models.Model):
 
 
 class ClassRoutine(models.Model):
-    class_name = models.ForeignKey(Class, on_delete=models.CASCADE, verbose_name="Class")
-    day = models.CharField(max_length=10, choices=(
+    DAY_CHOICES = (
         ('Sunday', 'Sunday'),
         ('Monday', 'Monday'),
         ('Tuesday', 'Tuesday'),
         ('Wednesday', 'Wednesday'),
         ('Thursday', 'Thursday'),
-    ))
+    )
+
+    class_name = models.ForeignKey(Class, on_delete=models.CASCADE, verbose_name="Class")
+    day = models.CharField(max_length=10, choices=DAY_CHOICES)
     period = models.ForeignKey(RoutinePeriod, on_delete=models.CASCADE, verbose_name="Time Period")
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
@@ -199,6 +204,53 @@ class ClassRoutine(models.Model):
         return str(self.period)
 
 
+class RoutineVersion(models.Model):
+    """A named snapshot of the whole timetable (e.g. a term)"""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    is_active = models.BooleanField(default=False)
+    notes = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Routine Version"
+        verbose_name_plural = "Routine Versions"
+
+    def __str__(self):
+        return self.name
+
+
+class RoutineVersionEntry(models.Model):
+    """One routine slot stored in a version; kept apart from ClassRoutine so live queries never scan history"""
+    version = models.ForeignKey(RoutineVersion, on_delete=models.CASCADE, related_name='entries')
+    class_name = models.ForeignKey(Class, on_delete=models.CASCADE, verbose_name="Class")
+    day = models.CharField(max_length=10, choices=ClassRoutine.DAY_CHOICES)
+    period = models.ForeignKey(RoutinePeriod, on_delete=models.CASCADE, verbose_name="Time Period")
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('version', 'class_name', 'day', 'period')
+
+    def __str__(self):
+        return f"{self.version} - {self.class_name} - {self.day} - {self.period}"
+
+
+class TeacherUnavailability(models.Model):
+    """A period in which a teacher must not be scheduled by the timetable generator"""
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    day = models.CharField(max_length=10, choices=ClassRoutine.DAY_CHOICES)
+    period = models.ForeignKey(RoutinePeriod, on_delete=models.CASCADE, verbose_name="Time Period")
+
+    class Meta:
+        unique_together = ('teacher', 'day', 'period')
+        verbose_name = "Teacher Unavailability"
+        verbose_name_plural = "Teacher Unavailability"
+
+    def __str__(self):
+        return f"{self.teacher} - {self.day} - {self.period}"
+
+
 class Notice(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -225,34 +277,228 @@ class Attendance(models.Model):
 
     class Meta:
         unique_together = ('student', 'date')
+        # Covering indexes for the grouped attendance reports (per class / per student over a date range)
+        indexes = [
+            models.Index(fields=['class_name', 'date', 'status']),
+            models.Index(fields=['date', 'student', 'status']),
+            # Keyset pagination of the attendance list
+            models.Index(fields=['date', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.date}"
 
 
+class AttendanceSummary(models.Model):
+    """Present/absent totals of a student overall, per month ('2024-03') and per term ('2024-T1')"""
+    PERIOD_CHOICES = (
+        ('total', 'Overall'),
+        ('month', 'Month'),
+        ('term', 'Term'),
+    )
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_summaries')
+    period_type = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period = models.CharField(max_length=7, blank=True)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('student', 'period_type', 'period')
+        verbose_name = "Attendance Summary"
+        verbose_name_plural = "Attendance Summaries"
+
+    def __str__(self):
+        return f"{self.student} - {self.get_period_type_display()} {self.period}"
+
+    @property
+    def total_days(self):
+        return self.present + self.absent
+
+    @property
+    def percentage(self):
+        return round(self.present / self.total_days * 100, 2) if self.total_days else 0
+
+
+class AttendanceMonth(models.Model):
+    """One month of a student's attendance as bitfields: bit (day - 1) is set if the day was marked / present"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_months')
+    class_name = models.ForeignKey(Class, on_delete=models.CASCADE)
+    month = models.DateField(help_text="First day of the month")
+    marked = models.IntegerField(default=0)
+    present = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('student', 'month')
+        indexes = [models.Index(fields=['class_name', 'month'])]
+
+    def __str__(self):
+        return f"{self.student} - {self.month:%B %Y}"
+
+
 class Result(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     exam_name = models.CharField(max_length=100)
     marks = models.DecimalField(max_digits=5, decimal_places=2)
     total_marks = models.DecimalField(max_digits=5, decimal_places=2, default=100)
-    grade = models.CharField(max_length=5)
+    grade = models.CharField(max_length=5, blank=True, help_text="Leave blank to compute it from the grade scale")
+
+    class Meta:
+        indexes = [models.Index(fields=['subject', 'exam_name'])]
 
     def __str__(self):
         return f"{self.student} - {self.subject}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_scores = (instance.__dict__.get('marks'), instance.__dict__.get('total_marks'),
+                                   instance.__dict__.get('grade'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Regrade when the marks change, unless the grade was edited along with them
+        stored = getattr(self, '_stored_scores', None)
+        rescored = stored is not None and (self.marks, self.total_marks) != stored[:2] and self.grade == stored[2]
+        if not self.grade or rescored:
+            self.grade = grade_for(self.marks, self.total_marks)
+        super().save(*args, **kwargs)
+        self._stored_scores = (self.marks, self.total_marks, self.grade)
+
+
+class ExamRank(models.Model):
+    """Precomputed exam totals and merit positions of a student (kept up to date by school.ranking)"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='exam_ranks')
+    exam_name = models.CharField(max_length=100)
+    class_name = models.ForeignKey(Class, on_delete=models.CASCADE)
+    obtained_marks = models.DecimalField(max_digits=8, decimal_places=2)
+    total_marks = models.DecimalField(max_digits=8, decimal_places=2)
+    percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    section_rank = models.PositiveIntegerField(help_text="Dense rank within the class and section")
+    class_rank = models.PositiveIntegerField(help_text="Dense rank across all sections of the class")
+
+    class Meta:
+        unique_together = ('student', 'exam_name')
+        indexes = [models.Index(fields=['exam_name', 'class_name', 'section_rank'])]
+        verbose_name = "Exam Rank"
+        verbose_name_plural = "Exam Ranks"
+
+    def __str__(self):
+        return f"{self.student} - {self.exam_name} - #{self.section_rank}"
+
 
 class Fee(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    term = models.CharField(max_length=20, blank=True, help_text="Term of a fee run, e.g. 2024-T2")
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     due_date = models.DateField()
     paid = models.BooleanField(default=False)
     payment_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        # One invoice per student and term, so a fee run can be repeated safely
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'term'], condition=~models.Q(term=''),
+                                    name='unique_fee_per_student_term'),
+        ]
+        # Keyset pagination of the fee list and the grouped ledger; overdue reminders
+        indexes = [models.Index(fields=['due_date', 'id']), models.Index(fields=['paid', 'due_date'])]
+
     def __str__(self):
         return f"{self.student} - {self.amount}"
 
 
+class PaymentIntent(models.Model):
+    """An online payment attempt for a fee (see school.payments)"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('duplicate', 'Duplicate (refund due)'),
+    )
+
+    fee = models.ForeignKey(Fee, on_delete=models.CASCADE, related_name='payment_intents')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    idempotency_key = models.CharField(max_length=64, unique=True)
+    gateway_reference = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # A fee can only be settled by one payment
+        constraints = [
+            models.UniqueConstraint(fields=['fee'], condition=models.Q(status='succeeded'),
+                                    name='one_successful_payment_per_fee'),
+        ]
+
+    def __str__(self):
+        return f"{self.fee} - {self.gateway_reference} ({self.status})"
+
+
+class PaymentEvent(models.Model):
+    """A processed gateway webhook, stored so repeated deliveries are applied once"""
+    event_id = models.CharField(max_length=64, unique=True)
+    event_type = models.CharField(max_length=50)
+    intent = models.ForeignKey(PaymentIntent, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='events')
+    outcome = models.CharField(max_length=20, blank=True)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id}"
+
+
+class BankStatement(models.Model):
+    """An imported bank statement CSV (see school.reconciliation)"""
+    file_name = models.CharField(max_length=255)
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    imported_at = models.DateTimeField(auto_now_add=True)
+    lines = models.PositiveIntegerField(default=0)
+    matched = models.PositiveIntegerField(default=0)
+    review = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0, help_text="Unreadable and already imported lines")
+
+    class Meta:
+        ordering = ['-imported_at']
+
+    def __str__(self):
+        return f"{self.file_name} ({self.imported_at:%Y-%m-%d})"
+
+
+class StatementLine(models.Model):
+    """A credit of a bank statement and the fee it was matched to (or why it needs review)"""
+    STATUS_CHOICES = (
+        ('matched', 'Matched'),
+        ('review', 'Needs review'),
+        ('unmatched', 'Unmatched'),
+        ('resolved', 'Resolved'),
+        ('ignored', 'Ignored'),
+    )
+
+    statement = models.ForeignKey(BankStatement, on_delete=models.CASCADE, related_name='statement_lines')
+    line_number = models.PositiveIntegerField()
+    transaction_date = models.DateField()
+    description = models.CharField(max_length=255, blank=True)
+    reference = models.CharField(max_length=100, blank=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Hash of the line, so importing an overlapping statement again skips the lines already seen
+    fingerprint = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    fee = models.ForeignKey(Fee, on_delete=models.SET_NULL, null=True, blank=True, related_name='statement_lines')
+    candidate_fee_ids = models.JSONField(default=list, blank=True)
+    note = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        # Review queue, newest first
+        indexes = [models.Index(fields=['status', 'transaction_date', 'id'])]
+
+    def __str__(self):
+        return f"{self.transaction_date} {self.reference or self.description} {self.amount}"
+
+
 class Book(models.Model):
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=100)
@@ -271,10 +517,38 @@ class BookIssue(models.Model):
     return_date = models.DateField()
     returned = models.BooleanField(default=False)
 
+    class Meta:
+        # Overdue reminders
+        indexes = [models.Index(fields=['returned', 'return_date'])]
+
     def __str__(self):
         return f"{self.book} - {self.student}"
 
 
+class Reminder(models.Model):
+    """An overdue reminder sent for a fee or a book issue (see school.reminders)"""
+    CHANNEL_CHOICES = (
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    )
+
+    fee = models.ForeignKey(Fee, on_delete=models.CASCADE, null=True, blank=True, related_name='reminders')
+    book_issue = models.ForeignKey(BookIssue, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='reminders')
+    channel = models.CharField(max_length=5, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=254)
+    sent_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fee', 'channel', 'sent_at']),
+            models.Index(fields=['book_issue', 'channel', 'sent_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_channel_display()} to {self.recipient} ({self.sent_at:%Y-%m-%d})"
+
+
 class Gallery(models.Model):
     CATEGORY_CHOICES = (
         ('school', 'School Campus'),
@@ -0,0 +1,72 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    One page of a queryset ordered newest first by (field, id).
+
+    Pages are addressed by the (field, id) of a boundary row instead of an
+    OFFSET, so every page costs one indexed query however deep it is.
+    ``after`` pages towards older rows and ``before`` back towards newer ones;
+    cursors look like ``2024-03-01.123``.
+    """
+
+    def __init__(self, queryset, field, after=None, before=None, per_page=50):
+        self.field = field
+        self.per_page = per_page
+        self.has_previous = self.has_next = False
+
+        backwards = False
+        boundary = self.decode(queryset.model, after)
+        if boundary is None:
+            boundary = self.decode(queryset.model, before)
+            backwards = boundary is not None
+        else:
+            self.has_previous = True
+
+        if backwards:
+            value, pk = boundary
+            queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+            rows = list(queryset.order_by(field, 'id')[:per_page + 1])
+            self.has_previous = len(rows) > per_page
+            self.has_next = True
+            self.object_list = rows[:per_page][::-1]
+        else:
+            if boundary is not None:
+                value, pk = boundary
+                queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+            rows = list(queryset.order_by(f'-{field}', '-id')[:per_page + 1])
+            self.has_next = len(rows) > per_page
+            self.object_list = rows[:per_page]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+    def encode(self, row):
+        value = getattr(row, self.field)
+        return f'{value.isoformat() if hasattr(value, "isoformat") else value}.{row.id}'
+
+    def decode(self, model, cursor):
+        if not cursor:
+            return None
+        value, _, pk = cursor.rpartition('.')
+        try:
+            return model._meta.get_field(self.field).to_python(value), int(pk)
+        except (ValidationError, ValueError):
+            return None
+
+    @property
+    def previous_cursor(self):
+        return self.encode(self.object_list[0]) if self.has_previous and self.object_list else None
+
+    @property
+    def next_cursor(self):
+        return self.encode(self.object_list[-1]) if self.has_next and self.object_list else None
@@ -0,0 +1,185 @@
+import hashlib
+import hmac
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .dashboard import invalidate_student_dashboards
+from .models import Fee, PaymentEvent, PaymentIntent
+
+
+def webhook_secret():
+    """settings.SCHOOL_PAYMENT_WEBHOOK_SECRET, shared with the gateway (never SECRET_KEY)"""
+    return getattr(settings, 'SCHOOL_PAYMENT_WEBHOOK_SECRET', '')
+
+
+def sign_payload(body):
+    """HMAC-SHA256 signature of a webhook body (sent in the X-Payment-Signature header)"""
+    secret = webhook_secret()
+    if not secret:
+        raise ImproperlyConfigured('SCHOOL_PAYMENT_WEBHOOK_SECRET must be set to sign payment webhooks.')
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body, signature):
+    return bool(webhook_secret()) and hmac.compare_digest(sign_payload(body), signature or '')
+
+
+class MockGateway:
+    """
+    Local stand-in for a payment gateway.
+
+    Only available when settings.SCHOOL_PAYMENT_MOCK_GATEWAY is on: its
+    checkout page (views.mock_gateway_checkout) lets the payer succeed or fail
+    a payment without paying anything. ``event`` builds the webhook payload
+    the checkout applies and ``webhook`` the signed request body for tests.
+    """
+
+    def new_reference(self):
+        return f'mock_{uuid.uuid4().hex}'
+
+    def checkout_url(self, intent):
+        return reverse('mock_gateway_checkout', args=[intent.gateway_reference])
+
+    def event(self, intent, status, event_id=None):
+        """Payload of a payment.succeeded / payment.failed event"""
+        return {
+            'id': event_id or f'evt_{uuid.uuid4().hex}',
+            'type': f'payment.{status}',
+            'data': {'reference': intent.gateway_reference, 'amount': str(intent.amount)},
+        }
+
+    def webhook(self, intent, status, event_id=None):
+        """(body, signature) of a payment.succeeded / payment.failed event"""
+        body = json.dumps(self.event(intent, status, event_id)).encode()
+        return body, sign_payload(body)
+
+
+def mock_gateway_enabled():
+    """The mock gateway settles fees without payment, so it must be switched on explicitly"""
+    return getattr(settings, 'SCHOOL_PAYMENT_MOCK_GATEWAY', False)
+
+
+def payment_gateway():
+    """
+    Gateway from settings.SCHOOL_PAYMENT_GATEWAY (dotted path of a class).
+
+    Falls back to the mock gateway when SCHOOL_PAYMENT_MOCK_GATEWAY is on;
+    returns None when online payments are not configured.
+    """
+    path = getattr(settings, 'SCHOOL_PAYMENT_GATEWAY', None)
+    if not path:
+        if not mock_gateway_enabled():
+            return None
+        path = 'school.payments.MockGateway'
+    return import_string(path)()
+
+
+def create_payment_intent(fee, idempotency_key, user=None):
+    """
+    Start an online payment of a fee.
+
+    Retrying with the same idempotency key (double clicks, refreshed pages,
+    client retries) returns the intent created the first time instead of a
+    new one. Returns (intent, error).
+    """
+    idempotency_key = (idempotency_key or '').strip()[:64]
+    if not idempotency_key:
+        return None, 'A payment key is required.'
+    gateway = payment_gateway()
+    if gateway is None:
+        return None, 'Online payments are not available.'
+
+    intent = PaymentIntent.objects.filter(idempotency_key=idempotency_key).first()
+    if intent is None:
+        if fee.paid:
+            return None, 'This fee is already paid.'
+        try:
+            with transaction.atomic():
+                intent = PaymentIntent.objects.create(
+                    fee=fee, amount=fee.amount, idempotency_key=idempotency_key,
+                    gateway_reference=gateway.new_reference(), created_by=user)
+        except IntegrityError:
+            # A concurrent request with the same key won the insert
+            intent = PaymentIntent.objects.get(idempotency_key=idempotency_key)
+
+    if intent.fee_id != fee.id:
+        return None, 'This payment key was already used for another fee.'
+    return intent, None
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        return None
+
+
+def apply_payment_event(event_id, event_type, reference, amount, payload=None):
+    """
+    Apply one gateway webhook event and return its outcome.
+
+    The event id is inserted first, in the same transaction: a repeated
+    delivery fails on its unique constraint and returns 'duplicate' without
+    touching the fee (and starting with the write lets concurrent deliveries
+    queue on the lock instead of failing). Only the intent row is locked, and
+    the fee is flipped with a conditional ``UPDATE ... WHERE paid = false`` so
+    two payments of the same fee cannot both settle it; the second one is
+    marked 'duplicate' (refund due).
+    """
+    try:
+        with transaction.atomic():
+            event = PaymentEvent.objects.create(event_id=event_id, event_type=event_type, payload=payload or {})
+            intent = (PaymentIntent.objects.select_for_update().filter(gateway_reference=reference)
+                      .select_related('fee').first())
+            if intent is None:
+                outcome = 'unknown'
+            elif intent.status != 'pending':
+                outcome = 'ignored'
+            elif event_type == 'payment.failed':
+                intent.status = outcome = 'failed'
+            elif event_type != 'payment.succeeded':
+                outcome = 'ignored'
+            elif _decimal(amount) != intent.amount:
+                intent.status = 'failed'
+                outcome = 'amount_mismatch'
+            else:
+                settled = Fee.objects.filter(pk=intent.fee_id, paid=False).update(
+                    paid=True, payment_date=timezone.localdate())
+                intent.status = outcome = 'succeeded' if settled else 'duplicate'
+                intent.paid_at = timezone.now()
+                # Fee.update() skips the Fee signals
+                transaction.on_commit(lambda: invalidate_student_dashboards(intent.fee.student_id))
+
+            if intent is not None and intent.status != 'pending':
+                intent.save(update_fields=['status', 'paid_at'])
+            event.intent = intent
+            event.outcome = outcome
+            event.save(update_fields=['intent', 'outcome'])
+    except IntegrityError:
+        return 'duplicate'
+    return outcome
+
+
+def process_webhook(body, signature):
+    """Verify and apply a webhook request body. Returns (outcome, error)."""
+    if not webhook_secret():
+        return None, 'Payment webhooks are not configured.'
+    if not verify_signature(body, signature):
+        return None, 'Invalid signature.'
+    try:
+        payload = json.loads(body)
+        event_id = str(payload['id'])
+        event_type = str(payload['type'])
+        reference = str(payload['data']['reference'])
+        amount = payload['data'].get('amount')
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None, 'Invalid webhook payload.'
+    return apply_payment_event(event_id, event_type, reference, amount, payload), None
@@ -0,0 +1,166 @@
+"""
+Report card PDFs, laid out with fpdf2.
+
+Cards whose text fits the standard Helvetica fonts (Windows-1252) use them,
+so nothing is embedded and rendering stays cheap. Cards with other scripts,
+such as Bengali names, embed subsets of the TrueType fonts in ``fonts``: the
+first (regular, bold) pair is the main font and the others are fallbacks for
+the scripts it lacks. Marks tables longer than a page continue on the next
+one. This module does not import Django, so it can run in worker processes
+without setting Django up.
+"""
+import io
+import os
+
+from fpdf import FPDF
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 50
+ROW_HEIGHT = 20
+SUMMARY_HEIGHT = 150  # Summary block and the gap above it
+SIGNATURE_TOP = PAGE_HEIGHT - 90
+
+CORE_FONT_ENCODING = 'windows-1252'
+
+
+def fits_core_fonts(texts):
+    """Whether the standard PDF fonts can print every text"""
+    try:
+        for text in texts:
+            str(text).encode(CORE_FONT_ENCODING)
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class ReportCardPDF(FPDF):
+    """An A4 page measured in points from the top left, with the drawing helpers of the report card"""
+
+    def __init__(self, fonts=(), unicode_text=False):
+        super().__init__(unit='pt', format='A4')
+        self.set_auto_page_break(False)
+        self.core_fonts_encoding = CORE_FONT_ENCODING
+        self.family = 'Helvetica'
+        if unicode_text and fonts:
+            families = []
+            for index, (regular, bold) in enumerate(fonts):
+                family = f'ReportFont{index}'
+                self.add_font(family, '', regular)
+                self.add_font(family, 'B', bold or regular)
+                families.append(family)
+            self.family = families[0]
+            self.set_fallback_fonts(families[1:])
+            self.set_text_shaping(True)
+
+    def write_text(self, x, y, text, size=10, bold=False):
+        """Text with its baseline at ``y``"""
+        text = str(text)
+        if self.family == 'Helvetica':
+            # No Unicode font configured: unknown characters print as "?"
+            text = text.encode(CORE_FONT_ENCODING, errors='replace').decode(CORE_FONT_ENCODING)
+        self.set_font(self.family, 'B' if bold else '', size)
+        self.text(x, y, text)
+
+    def rule(self, x1, y1, x2, y2, width=0.5):
+        self.set_line_width(width)
+        self.line(x1, y1, x2, y2)
+
+    def shade(self, x, y, width, height, gray=0.9):
+        self.set_fill_color(round(gray * 255))
+        self.rect(x, y, width, height, style='F')
+
+    def jpeg(self, data, x, y, width, height):
+        self.image(io.BytesIO(data), x, y, width, height)
+
+
+def _card_texts(school, exam_name, class_label, student):
+    yield from (school['name'], school['address'], school['phone'], school['email'], exam_name, class_label)
+    yield from (student['name'], student['student_id'], student['roll_number'])
+    yield from (row[0] for row in student['results'])
+
+
+def render_report_card(school, exam_name, class_label, student, fonts=()):
+    """Lay out one report card from plain data (see school.report_cards.class_bundle)"""
+    pdf = ReportCardPDF(fonts, not fits_core_fonts(_card_texts(school, exam_name, class_label, student)))
+    pdf.add_page()
+
+    # School header
+    text_x = MARGIN
+    if school.get('logo'):
+        logo_width, logo_height = school['logo_size']
+        width = min(60 * logo_width / logo_height, 120)
+        height = width * logo_height / logo_width
+        pdf.jpeg(school['logo'], MARGIN, 110 - height, width, height)
+        text_x = MARGIN + 15 + width
+    pdf.write_text(text_x, 65, school['name'], size=18, bold=True)
+    pdf.write_text(text_x, 83, school['address'], size=9)
+    pdf.write_text(text_x, 97, f"Phone: {school['phone']}   Email: {school['email']}", size=9)
+    pdf.rule(MARGIN, 120, PAGE_WIDTH - MARGIN, 120, width=1.5)
+
+    pdf.write_text(MARGIN, 150, f'Report Card - {exam_name}', size=14, bold=True)
+    y = 180
+    for label, value in (('Name', student['name']), ('Student ID', student['student_id']),
+                         ('Class', class_label), ('Roll', student['roll_number'])):
+        pdf.write_text(MARGIN, y, f'{label}:', size=10, bold=True)
+        pdf.write_text(130, y, value, size=10)
+        y += 16
+
+    # Marks table, continued on the next page (header repeated) when it runs out of room
+    columns = [(50, 'Subject'), (260, 'Marks'), (330, 'Total'), (400, 'Percentage'), (490, 'Grade')]
+
+    def table_header(y):
+        pdf.shade(MARGIN - 5, y - 15, PAGE_WIDTH - 2 * (MARGIN - 5), ROW_HEIGHT)
+        for x, title in columns:
+            pdf.write_text(x, y, title, size=10, bold=True)
+
+    def continue_on_new_page():
+        pdf.add_page()
+        pdf.write_text(MARGIN, MARGIN + 10, f"Report Card - {exam_name} - {student['name']} (continued)", size=9)
+        return MARGIN + 45
+
+    y += 14
+    table_header(y)
+    for subject, marks, total, percentage, grade in student['results']:
+        y += ROW_HEIGHT
+        if y > PAGE_HEIGHT - MARGIN:
+            y = continue_on_new_page()
+            table_header(y)
+            y += ROW_HEIGHT
+        for (x, title), value in zip(columns, (subject, marks, total, f'{percentage}%', grade)):
+            pdf.write_text(x, y, value, size=10)
+        pdf.rule(MARGIN - 5, y + 6, PAGE_WIDTH - MARGIN + 5, y + 6, width=0.3)
+
+    # Summary and signatures stay together at the end
+    if y + SUMMARY_HEIGHT > SIGNATURE_TOP - 20:
+        y = continue_on_new_page() - 40
+    y += 40
+    summary = [
+        ('Total Marks', f"{student['obtained']} / {student['possible']}"),
+        ('Percentage', f"{student['percentage']}%"),
+        ('Overall Grade', student['grade']),
+        ('Section Position', student['section_rank'] or '-'),
+        ('Class Rank', student['class_rank'] or '-'),
+        ('Attendance', f"{student['attendance']}%"),
+    ]
+    for label, value in summary:
+        pdf.write_text(MARGIN, y, f'{label}:', size=11, bold=True)
+        pdf.write_text(170, y, value, size=11)
+        y += 18
+
+    pdf.rule(MARGIN, SIGNATURE_TOP, 200, SIGNATURE_TOP)
+    pdf.write_text(80, SIGNATURE_TOP + 15, 'Class Teacher', size=9)
+    pdf.rule(PAGE_WIDTH - 200, SIGNATURE_TOP, PAGE_WIDTH - MARGIN, SIGNATURE_TOP)
+    pdf.write_text(PAGE_WIDTH - 160, SIGNATURE_TOP + 15, 'Head Teacher', size=9)
+    return bytes(pdf.output())
+
+
+def write_report_cards(job):
+    """Worker entry point: render a batch of report cards and write them to ``job['directory']``"""
+    os.makedirs(job['directory'], exist_ok=True)
+    for student in job['students']:
+        path = os.path.join(job['directory'], f"{student['student_id']}.pdf")
+        with open(path, 'wb') as output:
+            output.write(render_report_card(job['school'], job['exam_name'], job['class_label'], student,
+                                            job.get('fonts', ())))
+    return len(job['students'])
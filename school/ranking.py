@@ -0,0 +1,91 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import ExamRank, Result
+from .routines import get_routine_classes
+
+
+def dense_ranks(scores):
+    """{key: score} -> {key: rank}, highest score first; equal scores share a rank and no rank is skipped"""
+    ranks = {}
+    rank = 0
+    previous = None
+    for key, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+        if score != previous:
+            rank += 1
+            previous = score
+        ranks[key] = rank
+    return ranks
+
+
+def update_exam_ranks(exam_name, class_names=None):
+    """
+    Recompute the totals and merit positions of one exam.
+
+    Totals per student come from one grouped query; section and class
+    positions are then dense-ranked in a single in-memory pass and upserted
+    into ExamRank. Positions only depend on students of the same class, so
+    when marks of one class change only ``class_names`` (e.g. ['Class 6'],
+    all sections) need to be recomputed.
+    """
+    results = Result.objects.filter(exam_name=exam_name).order_by()
+    if class_names is not None:
+        results = results.filter(subject__class_name__name__in=class_names)
+    rows = results.values('student_id', 'subject__class_name_id').annotate(
+        obtained=Sum('marks'), possible=Sum('total_marks'))
+
+    classes = {class_obj.id: class_obj for class_obj in get_routine_classes()}
+    totals = {}
+    for row in rows:
+        student_id = row['student_id']
+        class_id, obtained, possible = totals.get(student_id, (row['subject__class_name_id'], 0, 0))
+        totals[student_id] = (class_id, obtained + row['obtained'], possible + row['possible'])
+
+    by_section = defaultdict(dict)
+    by_class = defaultdict(dict)
+    for student_id, (class_id, obtained, possible) in totals.items():
+        by_section[class_id][student_id] = obtained
+        by_class[classes[class_id].name][student_id] = obtained
+    section_ranks = {}
+    for scores in by_section.values():
+        section_ranks.update(dense_ranks(scores))
+    class_ranks = {}
+    for scores in by_class.values():
+        class_ranks.update(dense_ranks(scores))
+
+    ranks = [
+        ExamRank(
+            student_id=student_id,
+            exam_name=exam_name,
+            class_name_id=class_id,
+            obtained_marks=obtained,
+            total_marks=possible,
+            percentage=(obtained * 100 / possible).quantize(Decimal('0.01')) if possible else 0,
+            section_rank=section_ranks[student_id],
+            class_rank=class_ranks[student_id],
+        )
+        for student_id, (class_id, obtained, possible) in totals.items()
+    ]
+
+    with transaction.atomic():
+        stale = ExamRank.objects.filter(exam_name=exam_name).exclude(student_id__in=totals)
+        if class_names is not None:
+            stale = stale.filter(class_name__name__in=class_names)
+        stale.delete()
+        ExamRank.objects.bulk_create(
+            ranks,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['student', 'exam_name'],
+            update_fields=['class_name', 'obtained_marks', 'total_marks', 'percentage', 'section_rank', 'class_rank'],
+        )
+    return len(ranks)
+
+
+def update_all_exam_ranks():
+    """Recompute every exam (repair)"""
+    exam_names = Result.objects.order_by().values_list('exam_name', flat=True).distinct()
+    return sum(update_exam_ranks(exam_name) for exam_name in exam_names)
@@ -0,0 +1,219 @@
+import csv
+import hashlib
+import io
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .dashboard import invalidate_student_dashboards
+from .models import BankStatement, Fee, StatementLine, Student
+
+
+# Accepted header names (lower case) of each statement column
+STATEMENT_COLUMNS = {
+    'date': ('date', 'transaction date', 'txn date', 'value date', 'posting date'),
+    'amount': ('amount', 'credit', 'credit amount', 'deposit', 'deposits', 'paid in'),
+    'reference': ('reference', 'ref', 'ref no', 'reference no', 'cheque/ref no'),
+    'description': ('description', 'narration', 'details', 'particulars', 'remarks'),
+}
+STATEMENT_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d %b %Y', '%d-%b-%Y')
+# Words of a reference / description that can be a Student ID
+REFERENCE_TOKEN = re.compile(r'[A-Z0-9][A-Z0-9/_-]*[A-Z0-9]|[A-Z0-9]')
+UPDATE_BATCH_SIZE = 500
+
+
+def _parse_date(value):
+    for date_format in STATEMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value):
+    try:
+        return Decimal(re.sub(r'[^\d.\-]', '', value)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def read_statement(uploaded_file):
+    """
+    Yield (line_number, date, amount, reference, description, error) for every credit of a bank CSV.
+
+    The file is read row by row; debits and empty rows are skipped and rows
+    that cannot be read are yielded with an error message.
+    """
+    reader = csv.reader(io.TextIOWrapper(uploaded_file, encoding='utf-8-sig'))
+    header = [column.strip().lower() for column in next(reader, [])]
+    positions = {}
+    for field, names in STATEMENT_COLUMNS.items():
+        positions[field] = next((header.index(name) for name in names if name in header), None)
+    if positions['date'] is None or positions['amount'] is None:
+        yield 1, None, None, '', '', 'The statement needs a Date and an Amount (or Credit) column.'
+        return
+
+    def cell(row, field):
+        position = positions[field]
+        return row[position].strip() if position is not None and position < len(row) else ''
+
+    for line_number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        raw_amount = cell(row, 'amount')
+        if not raw_amount:
+            continue  # Debit rows leave the credit column empty
+        day = _parse_date(cell(row, 'date'))
+        amount = _parse_amount(raw_amount)
+        reference = cell(row, 'reference')[:100]
+        description = cell(row, 'description')[:255]
+        if day is None:
+            yield line_number, None, None, reference, description, f"Line {line_number}: unreadable date {cell(row, 'date')}."
+        elif amount is None:
+            yield line_number, None, None, reference, description, f"Line {line_number}: unreadable amount {raw_amount}."
+        elif amount > 0:
+            yield line_number, day, amount, reference, description, None
+
+
+def line_fingerprint(day, amount, reference, description, occurrence):
+    """Hash of a statement line; ``occurrence`` tells identical lines of one statement apart"""
+    text = '|'.join([day.isoformat(), str(amount), reference.upper(), description.upper(), str(occurrence)])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _existing_fingerprints(fingerprints):
+    existing = set()
+    for start in range(0, len(fingerprints), UPDATE_BATCH_SIZE):
+        existing.update(StatementLine.objects.filter(
+            fingerprint__in=fingerprints[start:start + UPDATE_BATCH_SIZE]).values_list('fingerprint', flat=True))
+    return existing
+
+
+def import_bank_statement(uploaded_file, user=None):
+    """
+    Reconcile a bank statement CSV against the unpaid fees.
+
+    Student IDs and unpaid fees are loaded once into hash indexes:
+    {STUDENT-ID: student} and {(student, amount): [fees, oldest due first]}.
+    Each credit is then matched in O(1) by the Student IDs found in its
+    reference / description and its amount. A line with exactly one match
+    settles that fee; lines with no or several candidates go to the review
+    queue. Only the matched fees are locked (the index is read without locks,
+    so online payments are not held up by an import); a matched fee that was
+    paid in the meantime sends its line to review. Matched fees are paid with
+    one UPDATE per transaction date and the lines are written with batched
+    INSERTs, all in one transaction. Lines already imported from an earlier
+    statement are skipped.
+    Returns (statement, errors) with errors for unreadable lines.
+    """
+    errors = []
+    lines = []
+    occurrences = Counter()
+    for line_number, day, amount, reference, description, error in read_statement(uploaded_file):
+        if error:
+            errors.append(error)
+            continue
+        key = (day, amount, reference.upper(), description.upper())
+        occurrences[key] += 1
+        lines.append(StatementLine(
+            line_number=line_number, transaction_date=day, amount=amount, reference=reference,
+            description=description, fingerprint=line_fingerprint(day, amount, reference, description,
+                                                                   occurrences[key])))
+
+    seen = _existing_fingerprints([line.fingerprint for line in lines])
+    new_lines = [line for line in lines if line.fingerprint not in seen]
+
+    with transaction.atomic():
+        students = {student_id.upper(): pk for pk, student_id in Student.objects.values_list('id', 'student_id')}
+        unpaid = defaultdict(list)
+        student_fees = defaultdict(list)
+        for fee_id, student_id, amount in (Fee.objects.filter(paid=False).order_by('due_date', 'id')
+                                           .values_list('id', 'student_id', 'amount')):
+            unpaid[student_id, amount].append(fee_id)
+            student_fees[student_id].append(fee_id)
+
+        settled_fees = set()
+        for line in new_lines:
+            text = f'{line.reference} {line.description}'.upper()
+            candidates = {students[token] for token in REFERENCE_TOKEN.findall(text) if token in students}
+            matches = [student_id for student_id in candidates if unpaid.get((student_id, line.amount))]
+            if len(matches) == 1:
+                line.fee_id = unpaid[matches[0], line.amount].pop(0)
+                line.status = 'matched'
+                settled_fees.add(line.fee_id)
+            elif matches:
+                line.status = 'review'
+                line.candidate_fee_ids = [unpaid[student_id, line.amount][0] for student_id in sorted(matches)]
+                line.note = 'Several students match this reference and amount.'
+            elif candidates:
+                line.status = 'review'
+                line.candidate_fee_ids = [fee_id for student_id in sorted(candidates)
+                                          for fee_id in student_fees[student_id] if fee_id not in settled_fees]
+                line.note = 'No unpaid fee of this amount for the student.'
+            else:
+                line.status = 'unmatched'
+                line.note = 'No Student ID found in the reference.'
+
+        # Lock the matched fees; any paid since they were read (e.g. by a payment webhook) go to review
+        still_unpaid = {}
+        matched_fees = sorted(settled_fees)
+        for start in range(0, len(matched_fees), UPDATE_BATCH_SIZE):
+            still_unpaid.update(Fee.objects.select_for_update().filter(
+                id__in=matched_fees[start:start + UPDATE_BATCH_SIZE], paid=False).values_list('id', 'student_id'))
+        settled = defaultdict(list)
+        for line in new_lines:
+            if line.status != 'matched':
+                continue
+            if line.fee_id in still_unpaid:
+                settled[line.transaction_date].append(line.fee_id)
+            else:
+                line.status = 'review'
+                line.candidate_fee_ids = [line.fee_id]
+                line.fee_id = None
+                line.note = 'The matching fee was paid while the statement was imported.'
+        settled_students = {still_unpaid[fee_id] for fee_ids in settled.values() for fee_id in fee_ids}
+
+        for day, fee_ids in settled.items():
+            for start in range(0, len(fee_ids), UPDATE_BATCH_SIZE):
+                Fee.objects.filter(id__in=fee_ids[start:start + UPDATE_BATCH_SIZE]).update(
+                    paid=True, payment_date=day)
+
+        statement = BankStatement.objects.create(
+            file_name=getattr(uploaded_file, 'name', 'statement.csv')[:255],
+            uploaded_by=user,
+            lines=len(new_lines),
+            matched=sum(line.status == 'matched' for line in new_lines),
+            review=sum(line.status != 'matched' for line in new_lines),
+            skipped=len(errors) + len(lines) - len(new_lines),
+        )
+        for line in new_lines:
+            line.statement = statement
+        StatementLine.objects.bulk_create(new_lines, batch_size=1000)
+        # Fee.update() skips the Fee signals
+        transaction.on_commit(lambda: invalidate_student_dashboards(*settled_students))
+    return statement, errors
+
+
+def resolve_statement_line(line, fee):
+    """Settle a fee from a line of the review queue. Returns an error message or None."""
+    if line.status not in ('review', 'unmatched'):
+        return 'This line is not waiting for review.'
+    with transaction.atomic():
+        if not Fee.objects.filter(pk=fee.pk, paid=False).update(paid=True, payment_date=line.transaction_date):
+            return 'This fee is already paid.'
+        line.status = 'resolved'
+        line.fee = fee
+        line.save(update_fields=['status', 'fee'])
+        transaction.on_commit(lambda: invalidate_student_dashboards(fee.student_id))
+    return None
+
+
+def ignore_statement_line(line, note=''):
+    """Take a line that is not a fee payment out of the review queue"""
+    line.status = 'ignored'
+    line.note = (note or line.note)[:200]
+    line.save(update_fields=['status', 'note'])
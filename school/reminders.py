@@ -0,0 +1,179 @@
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import BookIssue, Fee, Reminder, SchoolInfo
+from .sms import get_sms_backend
+
+
+# A parent is reminded again about the same item after this many days
+REMINDER_INTERVAL_DAYS = getattr(settings, 'SCHOOL_REMINDER_INTERVAL_DAYS', 7)
+# Messages per second per channel (0 sends as fast as the backend allows)
+REMINDER_RATE = getattr(settings, 'SCHOOL_REMINDER_RATE', 5)
+# Sent reminders are logged in batches of this many digests
+REMINDER_LOG_BATCH = 50
+
+CONTACT_FIELDS = {'email': 'parent_email', 'sms': 'parent_phone'}
+
+
+def _recipient(student, channel):
+    contact = getattr(student, CONTACT_FIELDS[channel]).strip()
+    if channel == 'email':
+        return contact.lower()
+    return ''.join(character for character in contact if character.isdigit() or character == '+')
+
+
+def _not_reminded(channel, field, cutoff):
+    """Items without a reminder on this channel since ``cutoff``"""
+    return ~Exists(Reminder.objects.filter(**{field: OuterRef('pk')}, channel=channel, sent_at__gte=cutoff))
+
+
+def collect_digests(channel, today=None):
+    """
+    Overdue fees and book issues grouped into one digest per parent contact.
+
+    Two indexed queries (unpaid fees past due_date, unreturned books past
+    return_date) load the items with their students, skipping items reminded
+    on this channel in the last REMINDER_INTERVAL_DAYS days. Siblings sharing
+    a parent email / phone get a single digest.
+    Returns [{'recipient', 'students', 'fees', 'books'}] ordered by recipient.
+    """
+    today = today or timezone.localdate()
+    cutoff = timezone.now() - timedelta(days=REMINDER_INTERVAL_DAYS)
+    has_contact = {f'student__{CONTACT_FIELDS[channel]}__gt': ''}
+
+    fees = (Fee.objects.filter(paid=False, due_date__lt=today, **has_contact)
+            .filter(_not_reminded(channel, 'fee', cutoff))
+            .select_related('student__user').order_by('due_date', 'id'))
+    books = (BookIssue.objects.filter(returned=False, return_date__lt=today, **has_contact)
+             .filter(_not_reminded(channel, 'book_issue', cutoff))
+             .select_related('student__user', 'book').order_by('return_date', 'id'))
+
+    digests = {}
+    for kind, items in (('fees', fees), ('books', books)):
+        for item in items:
+            recipient = _recipient(item.student, channel)
+            if not recipient:
+                continue
+            digest = digests.get(recipient)
+            if digest is None:
+                digest = digests[recipient] = {'recipient': recipient, 'students': {}, 'fees': [], 'books': []}
+            digest['students'][item.student_id] = item.student
+            digest[kind].append(item)
+    return [digests[recipient] for recipient in sorted(digests)]
+
+
+def _names(digest):
+    return ', '.join(student.user.get_full_name() or student.student_id for student in digest['students'].values())
+
+
+def digest_email(digest, school_name, today):
+    """(subject, body) of a reminder email"""
+    lines = ['Dear Parent,', '', f'This is a reminder from {school_name} about {_names(digest)}.', '']
+    if digest['fees']:
+        lines.append('Overdue fees:')
+        for fee in digest['fees']:
+            term = f' ({fee.term})' if fee.term else ''
+            lines.append(f'  - {fee.student.student_id}{term}: ₹{fee.amount}, due {fee.due_date:%d %b %Y} '
+                         f'({(today - fee.due_date).days} days overdue)')
+        lines.append('')
+    if digest['books']:
+        lines.append('Library books to return:')
+        for issue in digest['books']:
+            lines.append(f'  - {issue.student.student_id}: "{issue.book.title}", due {issue.return_date:%d %b %Y} '
+                         f'({(today - issue.return_date).days} days overdue)')
+        lines.append('')
+    lines += ['Please contact the school office if you have already settled these.', '', 'Regards,', school_name]
+    return f'{school_name}: overdue fees and library books', '\n'.join(lines)
+
+
+def digest_sms(digest, school_name, today):
+    parts = []
+    if digest['fees']:
+        parts.append(f"{len(digest['fees'])} overdue fee(s) of ₹{sum(fee.amount for fee in digest['fees'])}")
+    if digest['books']:
+        parts.append(f"{len(digest['books'])} overdue library book(s)")
+    return f"{school_name}: {' and '.join(parts)} for {_names(digest)}. Please contact the school office."
+
+
+class Throttle:
+    """Spaces calls to wait() at least 1/rate seconds apart"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+
+
+def send_overdue_reminders(channel, limit=None, rate=None, dry_run=False, progress=None):
+    """
+    Send one reminder digest per parent over a single reused connection.
+
+    Email goes through one SMTP connection (settings.EMAIL_BACKEND) and SMS
+    through one SMS backend session (settings.SCHOOL_SMS_BACKEND), throttled
+    to ``rate`` messages per second. Every item of a sent digest is logged as
+    a Reminder in batches, and the log is flushed even if the run stops, so a
+    rerun (or the next scheduled run, with ``limit``) resumes with the
+    parents not reminded yet. ``progress(sent, total)`` is called after each
+    logged batch. Returns (sent, failed).
+    """
+    today = timezone.localdate()
+    digests = collect_digests(channel, today)[:limit]
+    if dry_run or not digests:
+        return len(digests), 0
+
+    school = SchoolInfo.objects.first()
+    school_name = school.name if school else 'School Management System'
+    throttle = Throttle(REMINDER_RATE if rate is None else rate)
+    connection = get_connection() if channel == 'email' else get_sms_backend()
+    sent = failed = 0
+    log = []
+
+    def flush():
+        Reminder.objects.bulk_create(log, batch_size=500)
+        log.clear()
+        if progress:
+            progress(sent, len(digests))
+
+    connection.open()
+    try:
+        for digest in digests:
+            throttle.wait()
+            try:
+                if channel == 'email':
+                    subject, body = digest_email(digest, school_name, today)
+                    EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [digest['recipient']],
+                                 connection=connection).send()
+                else:
+                    connection.send_messages([(digest['recipient'], digest_sms(digest, school_name, today))])
+            except (smtplib.SMTPException, OSError):
+                # Replace a broken connection and go on with the next parent
+                failed += 1
+                connection.close()
+                connection.open()
+                continue
+
+            sent += 1
+            now = timezone.now()
+            log.extend(Reminder(fee=fee, channel=channel, recipient=digest['recipient'], sent_at=now)
+                       for fee in digest['fees'])
+            log.extend(Reminder(book_issue=issue, channel=channel, recipient=digest['recipient'], sent_at=now)
+                       for issue in digest['books'])
+            if sent % REMINDER_LOG_BATCH == 0:
+                flush()
+    finally:
+        connection.close()
+        flush()
+    return sent, failed
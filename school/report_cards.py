@@ -0,0 +1,165 @@
+import io
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.utils.text import slugify
+from PIL import Image
+
+from .grading import grade_for
+from .marks import class_students
+from .models import AttendanceSummary, Class, ExamRank, Result, SchoolInfo
+from .pdf import write_report_cards
+
+
+REPORT_CARD_BATCH_SIZE = 50
+# The admin action renders in the web request; bigger runs go through the generate_report_cards command
+REPORT_CARD_ADMIN_LIMIT = 200
+
+# TrueType (regular, bold) font pairs for text outside Windows-1252: the main
+# font first, then fallbacks for other scripts. Debian / Ubuntu: fonts-noto-core.
+DEFAULT_REPORT_CARD_FONTS = [
+    ('/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf', '/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf'),
+    ('/usr/share/fonts/truetype/noto/NotoSansBengali-Regular.ttf',
+     '/usr/share/fonts/truetype/noto/NotoSansBengali-Bold.ttf'),
+]
+
+
+def report_card_fonts():
+    """Font pairs of settings.SCHOOL_REPORT_CARD_FONTS whose files exist (bold falls back to regular)"""
+    fonts = getattr(settings, 'SCHOOL_REPORT_CARD_FONTS', DEFAULT_REPORT_CARD_FONTS)
+    return [(regular, bold if bold and os.path.exists(bold) else regular)
+            for regular, bold in fonts if os.path.exists(regular)]
+
+
+def school_branding():
+    """School name, contact details and the logo as JPEG bytes (read once per run)"""
+    school = SchoolInfo.objects.first()
+    if school is None:
+        return {'name': 'School Management System', 'address': '', 'phone': '', 'email': ''}
+
+    branding = {'name': school.name, 'address': school.address, 'phone': school.phone, 'email': school.email}
+    if school.logo:
+        try:
+            with Image.open(school.logo.path) as image:
+                image = image.convert('RGB')
+                image.thumbnail((300, 300))
+                output = io.BytesIO()
+                image.save(output, format='JPEG', quality=85)
+            branding['logo'] = output.getvalue()
+            branding['logo_size'] = image.size
+        except (OSError, ValueError):
+            pass
+    return branding
+
+
+def class_bundle(class_obj, exam_name):
+    """
+    Everything the report cards of one class need, as plain picklable data.
+
+    Four queries per class (students, results, ranks, attendance) whatever
+    the class size; the worker processes never touch the database.
+    """
+    students = list(class_students(class_obj))
+    student_ids = [student.id for student in students]
+
+    results = defaultdict(list)
+    rows = (Result.objects.filter(exam_name=exam_name, subject__class_name=class_obj, student_id__in=student_ids)
+            .select_related('subject').order_by('subject__name'))
+    for result in rows:
+        percentage = round(result.marks * 100 / result.total_marks, 2) if result.total_marks else 0
+        results[result.student_id].append(
+            (result.subject.name, result.marks, result.total_marks, percentage, result.grade))
+
+    ranks = {rank.student_id: rank for rank in ExamRank.objects.filter(exam_name=exam_name, student_id__in=student_ids)}
+    attendance = {summary.student_id: summary.percentage for summary in AttendanceSummary.objects.filter(
+        student_id__in=student_ids, period_type='total', period='')}
+
+    bundle = []
+    for student in students:
+        if not results[student.id]:
+            continue
+        obtained = sum(row[1] for row in results[student.id])
+        possible = sum(row[2] for row in results[student.id])
+        rank = ranks.get(student.id)
+        bundle.append({
+            'student_id': student.student_id,
+            'name': student.user.get_full_name(),
+            'roll_number': student.roll_number,
+            'results': results[student.id],
+            'obtained': obtained,
+            'possible': possible,
+            'percentage': round(obtained * 100 / possible, 2) if possible else 0,
+            'grade': grade_for(obtained, possible),
+            'section_rank': rank.section_rank if rank else None,
+            'class_rank': rank.class_rank if rank else None,
+            'attendance': attendance.get(student.id, 0),
+        })
+    return bundle
+
+
+def report_card_directory(exam_name, class_obj):
+    return os.path.join(settings.MEDIA_ROOT, 'report_cards', slugify(exam_name),
+                        slugify(f'{class_obj.name}-{class_obj.section}'))
+
+
+def report_card_jobs(exam_name, classes):
+    """Batches of report cards to render, loaded class by class"""
+    school = school_branding()
+    fonts = report_card_fonts()
+    for class_obj in classes:
+        students = class_bundle(class_obj, exam_name)
+        for start in range(0, len(students), REPORT_CARD_BATCH_SIZE):
+            yield {
+                'school': school,
+                'fonts': fonts,
+                'exam_name': exam_name,
+                'class_label': str(class_obj),
+                'directory': report_card_directory(exam_name, class_obj),
+                'students': students[start:start + REPORT_CARD_BATCH_SIZE],
+            }
+
+
+def generate_report_cards(exam_name, class_ids=None, workers=None, progress=None):
+    """
+    Render the report cards of an exam as PDFs under MEDIA_ROOT/report_cards/.
+
+    Class bundles are loaded in this process and handed, in batches, to a
+    process pool that renders and writes the PDFs on every CPU core while the
+    next class is being loaded; ``workers=1`` renders in this process instead
+    (small runs such as the admin action). ``progress(done, queued)`` is
+    called after each finished batch. Returns the number of report cards written.
+    """
+    classes = Class.objects.order_by('name', 'section')
+    if class_ids:
+        classes = classes.filter(id__in=class_ids)
+
+    done = queued = 0
+    if workers == 1:
+        for job in report_card_jobs(exam_name, classes):
+            queued += len(job['students'])
+            done += write_report_cards(job)
+            if progress:
+                progress(done, queued)
+        return done
+
+    def collect(futures):
+        nonlocal done
+        for future in futures:
+            done += future.result()
+            if progress:
+                progress(done, queued)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for job in report_card_jobs(exam_name, classes):
+            pending.append(pool.submit(write_report_cards, job))
+            queued += len(job['students'])
+            # Report batches finished while the next ones are loaded
+            finished = [future for future in pending if future.done()]
+            pending = [future for future in pending if future not in finished]
+            collect(finished)
+
+        collect(as_completed(pending))
+    return done
@@ -0,0 +1,93 @@
+import hashlib
+import statistics
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .grading import pass_percentage
+from .models import Result
+
+
+# Statistics are cached per (subject, exam) in the shared cache (settings.CACHES)
+# and dropped when a result of the group changes (see school/signals.py and
+# school.marks.save_marks). The timeout bounds staleness should an
+# invalidation be missed.
+RESULT_STATS_CACHE_TIMEOUT = 60 * 60
+HISTOGRAM_BINS = 10  # 0-10%, 10-20%, ... 90-100%
+
+
+def result_stats_key(subject_id, exam_name):
+    # Exam names are free text; hash them so the key is valid for every cache backend
+    return f'result_stats:{subject_id}:{hashlib.md5(exam_name.encode()).hexdigest()}'
+
+
+def compute_result_stats(percentages):
+    """
+    Mean, median, standard deviation, pass rate and histogram of a list of percentages.
+
+    Everything is computed in memory from the one list, never a query per
+    result: a few passes of the statistics module (pure Python; the median
+    sorts a copy, pstdev makes two passes) plus one loop for the histogram.
+    """
+    count = len(percentages)
+    width = 100 / HISTOGRAM_BINS
+    histogram = [0] * HISTOGRAM_BINS
+    for percentage in percentages:
+        histogram[min(int(percentage // width), HISTOGRAM_BINS - 1)] += 1
+    passing = pass_percentage()
+    passed = sum(percentage >= passing for percentage in percentages)
+    return {
+        'count': count,
+        'mean': round(statistics.fmean(percentages), 2) if count else 0,
+        'median': round(statistics.median(percentages), 2) if count else 0,
+        'std_dev': round(statistics.pstdev(percentages), 2) if count else 0,
+        'highest': round(max(percentages), 2) if count else 0,
+        'lowest': round(min(percentages), 2) if count else 0,
+        'pass_percentage': passing,
+        'passed': passed,
+        'pass_rate': round(passed * 100 / count, 2) if count else 0,
+        'histogram': [
+            {'lower': round(index * width), 'upper': round((index + 1) * width), 'count': histogram[index]}
+            for index in range(HISTOGRAM_BINS)
+        ],
+    }
+
+
+def _percentages(results):
+    return [float(marks) * 100 / float(total) if total else 0 for marks, total in results]
+
+
+def get_result_stats_many(groups):
+    """
+    Statistics {(subject_id, exam_name): stats} of many (subject, exam) groups.
+
+    Cached groups cost nothing; the missing ones are computed together from a
+    single query of (marks, total_marks) pairs and cached.
+    """
+    keys = {group: result_stats_key(*group) for group in groups}
+    cached = cache.get_many(keys.values())
+    stats = {group: cached[key] for group, key in keys.items() if key in cached}
+
+    missing = [group for group in keys if group not in stats]
+    if missing:
+        results = defaultdict(list)
+        rows = Result.objects.filter(
+            subject_id__in={subject_id for subject_id, exam_name in missing},
+            exam_name__in={exam_name for subject_id, exam_name in missing},
+        ).order_by().values_list('subject_id', 'exam_name', 'marks', 'total_marks')
+        for subject_id, exam_name, marks, total in rows:
+            results[subject_id, exam_name].append((marks, total))
+        built = {group: compute_result_stats(_percentages(results[group])) for group in missing}
+        cache.set_many({keys[group]: group_stats for group, group_stats in built.items()},
+                       RESULT_STATS_CACHE_TIMEOUT)
+        stats.update(built)
+
+    return {group: stats[group] for group in keys}
+
+
+def get_result_stats(subject_id, exam_name):
+    return get_result_stats_many([(subject_id, exam_name)])[subject_id, exam_name]
+
+
+def invalidate_result_stats(*groups):
+    cache.delete_many([result_stats_key(subject_id, exam_name) for subject_id, exam_name in groups])
@@ -0,0 +1,117 @@
+from datetime import date, datetime, timedelta
+
+from django.core import signing
+from django.core.cache import cache
+
+from .routines import (
+    TIMETABLE_CACHE_TIMEOUT, get_class_timetable, get_routine_classes, get_routine_periods,
+    get_teacher_timetable, routine_last_modified, timetable_key
+)
+
+
+CALENDAR_TOKEN_SALT = 'school.routine_calendar'
+ICS_WEEKDAYS = {'Sunday': 'SU', 'Monday': 'MO', 'Tuesday': 'TU', 'Wednesday': 'WE', 'Thursday': 'TH'}
+
+
+def calendar_token(user):
+    """Signed token identifying the user in their calendar subscription URL"""
+    return signing.Signer(salt=CALENDAR_TOKEN_SALT).sign(str(user.pk))
+
+
+def user_id_from_token(token):
+    try:
+        return int(signing.Signer(salt=CALENDAR_TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def _escape(text):
+    return str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Fold content lines longer than 75 characters (RFC 5545)"""
+    parts = []
+    while len(line) > 75:
+        parts.append(line[:75])
+        line = ' ' + line[75:]
+    parts.append(line)
+    return '\r\n'.join(parts)
+
+
+def _first_dates(days):
+    """First date of each weekday from the start of the current year, used as DTSTART"""
+    start = date(date.today().year, 1, 1)
+    first = {}
+    for offset in range(7):
+        day = start + timedelta(days=offset)
+        first[day.strftime('%A')] = day
+    return {day: first[day] for day in days}
+
+
+def render_calendar(name, timetables):
+    """
+    Render weekly recurring events as an iCalendar document.
+
+    ``timetables`` is a list of (class_label, {day: {period_id: cell or None}}).
+    Times are floating local times, so calendar clients show them in the
+    school's local time.
+    """
+    periods = {period.id: period for period in get_routine_periods()}
+    first_dates = _first_dates(ICS_WEEKDAYS)
+    stamp = routine_last_modified().strftime('%Y%m%dT%H%M%SZ')
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//School Management//Class Routine//EN',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    for class_label, timetable in timetables:
+        for day, cells in timetable.items():
+            for period_id, cell in cells.items():
+                if not cell or period_id not in periods:
+                    continue
+                period = periods[period_id]
+                start = datetime.combine(first_dates[day], period.start_time)
+                end = datetime.combine(first_dates[day], period.end_time)
+                lines += [
+                    'BEGIN:VEVENT',
+                    f'UID:routine-{cell["id"]}@school',
+                    f'DTSTAMP:{stamp}',
+                    f'DTSTART:{start.strftime("%Y%m%dT%H%M%S")}',
+                    f'DTEND:{end.strftime("%Y%m%dT%H%M%S")}',
+                    f'RRULE:FREQ=WEEKLY;BYDAY={ICS_WEEKDAYS[day]}',
+                    f'SUMMARY:{_escape(cell["subject"])} ({_escape(class_label)})',
+                    f'DESCRIPTION:{_escape("Teacher: " + cell["teacher"])}',
+                    'END:VEVENT',
+                ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def get_class_calendar(class_id):
+    """Cached ICS feed of one class (cleared with the class timetable)"""
+    key = timetable_key('class-ics', class_id)
+    calendar = cache.get(key)
+    if calendar is None:
+        class_obj = next((class_obj for class_obj in get_routine_classes() if class_obj.id == class_id), None)
+        if class_obj is None:
+            return None
+        calendar = render_calendar(f'{class_obj} Routine', [(str(class_obj), get_class_timetable(class_id))])
+        cache.set(key, calendar, TIMETABLE_CACHE_TIMEOUT)
+    return calendar
+
+
+def get_teacher_calendar(teacher):
+    """Cached ICS feed of one teacher (cleared with the teacher timetable)"""
+    key = timetable_key('teacher-ics', teacher.id)
+    calendar = cache.get(key)
+    if calendar is None:
+        classes = {class_obj.id: str(class_obj) for class_obj in get_routine_classes()}
+        timetables = [(classes.get(class_id, ''), timetable)
+                      for class_id, timetable in get_teacher_timetable(teacher.id).items()]
+        calendar = render_calendar(f'{teacher.user.get_full_name()} Routine', timetables)
+        cache.set(key, calendar, TIMETABLE_CACHE_TIMEOUT)
+    return calendar
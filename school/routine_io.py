@@ -0,0 +1,137 @@
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+from django.db import transaction
+from django.http import FileResponse
+
+from .exports import stream_csv
+from .models import Class, ClassRoutine, RoutinePeriod, Teacher
+from .routines import ROUTINE_DAYS, write_routines
+
+
+ROUTINE_COLUMNS = ['Class', 'Section', 'Day', 'Start Time', 'End Time', 'Subject', 'Teacher ID', 'Teacher Name']
+
+
+def routine_export_rows():
+    """Yield the header and one row per routine, reading the routines in chunks"""
+    yield ROUTINE_COLUMNS
+    routines = ClassRoutine.objects.select_related('class_name', 'period', 'subject', 'teacher__user').order_by(
+        'class_name__name', 'class_name__section', 'day', 'period__order', 'period__start_time')
+    for routine in routines.iterator(chunk_size=1000):
+        yield [
+            routine.class_name.name,
+            routine.class_name.section,
+            routine.day,
+            routine.period.start_time.strftime('%H:%M'),
+            routine.period.end_time.strftime('%H:%M'),
+            routine.subject.name,
+            routine.teacher.teacher_id,
+            routine.teacher.user.get_full_name(),
+        ]
+
+
+def export_routines_csv():
+    return stream_csv(routine_export_rows(), 'class_routines.csv')
+
+
+def export_routines_xlsx():
+    from openpyxl import Workbook
+
+    # Write-only workbooks keep rows out of memory; the file is spooled to disk and streamed
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Class Routine')
+    for row in routine_export_rows():
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename='class_routines.xlsx',
+                        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+def read_routine_rows(uploaded_file):
+    """Yield (row_number, {column: value}) from an uploaded CSV or XLSX routine sheet"""
+    if uploaded_file.name.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value or '').strip() for value in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            yield row_number, {column: _cell_text(value) for column, value in zip(header, values)}
+        workbook.close()
+    else:
+        text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig')
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, {(column or '').strip(): (value or '').strip() for column, value in row.items()}
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%H:%M')
+    return str(value).strip()
+
+
+def _parse_time(value):
+    for time_format in ('%H:%M', '%H:%M:%S', '%I:%M %p'):
+        try:
+            return datetime.strptime(value, time_format).time()
+        except ValueError:
+            continue
+    return None
+
+
+def import_routines(uploaded_file, replace=False):
+    """
+    Validate a routine sheet and write it in one transaction.
+
+    Classes, periods and teachers are looked up from dictionaries loaded once.
+    Nothing is written if any row is invalid or any slot conflicts with an
+    existing routine or teacher booking. Returns (created, errors) where
+    errors are messages for invalid rows or conflicting slots.
+    """
+    classes = {(class_obj.name, class_obj.section): class_obj for class_obj in Class.objects.all()}
+    periods = {period.start_time: period for period in RoutinePeriod.objects.filter(is_break=False)}
+    teachers = {teacher.teacher_id: teacher for teacher in Teacher.objects.select_related('user')}
+
+    entries = []
+    errors = []
+    for row_number, row in read_routine_rows(uploaded_file):
+        if not any(row.values()):
+            continue
+
+        class_obj = classes.get((row.get('Class', ''), row.get('Section', '')))
+        day = row.get('Day', '').capitalize()
+        start_time = _parse_time(row.get('Start Time', ''))
+        period = periods.get(start_time)
+        teacher = teachers.get(row.get('Teacher ID', ''))
+        subject_name = row.get('Subject', '')
+
+        if class_obj is None:
+            errors.append(f"Row {row_number}: unknown class {row.get('Class')} - {row.get('Section')}.")
+        elif day not in ROUTINE_DAYS:
+            errors.append(f"Row {row_number}: invalid day {row.get('Day')}.")
+        elif period is None:
+            errors.append(f"Row {row_number}: no class period starts at {row.get('Start Time')}.")
+        elif teacher is None:
+            errors.append(f"Row {row_number}: unknown teacher ID {row.get('Teacher ID')}.")
+        elif not subject_name:
+            errors.append(f"Row {row_number}: subject is missing.")
+        else:
+            entries.append((class_obj, day, period, subject_name, teacher))
+
+    if errors:
+        return [], errors
+
+    with transaction.atomic():
+        created, conflicts = write_routines(entries, replace=replace)
+        if conflicts:
+            # Roll back the rows that did fit (and the replaced routines) too
+            transaction.set_rollback(True)
+            return [], [conflict['reason'] for conflict in conflicts]
+    return created, []
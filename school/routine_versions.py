@@ -0,0 +1,125 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Class, ClassRoutine, RoutinePeriod, RoutineVersion, RoutineVersionEntry, Subject, Teacher
+)
+from .routines import invalidate_all_timetables
+
+
+SLOT_FIELDS = ('class_name_id', 'day', 'period_id', 'subject_id', 'teacher_id')
+BATCH_SIZE = 1000
+
+
+def _copy_rows(version, rows):
+    RoutineVersionEntry.objects.bulk_create(
+        (RoutineVersionEntry(version=version, class_name_id=class_id, day=day, period_id=period_id,
+                             subject_id=subject_id, teacher_id=teacher_id)
+         for class_id, day, period_id, subject_id, teacher_id in rows),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def save_live_routines(version):
+    """Replace the entries of ``version`` with the live ClassRoutine rows"""
+    with transaction.atomic():
+        version.entries.all().delete()
+        _copy_rows(version, ClassRoutine.objects.values_list(*SLOT_FIELDS).iterator(chunk_size=BATCH_SIZE))
+
+
+def snapshot_live_routines(name, notes=''):
+    """Store the live routines as a new version"""
+    with transaction.atomic():
+        version = RoutineVersion.objects.create(name=name, notes=notes)
+        save_live_routines(version)
+    return version
+
+
+def clone_version(source, name, notes=''):
+    """Copy every entry of ``source`` into a new version with batched inserts"""
+    with transaction.atomic():
+        version = RoutineVersion.objects.create(name=name, notes=notes)
+        _copy_rows(version, source.entries.values_list(*SLOT_FIELDS).iterator(chunk_size=BATCH_SIZE))
+    return version
+
+
+def activate_version(version):
+    """
+    Make ``version`` the live timetable in one transaction.
+
+    The live routines are first saved back into the currently active version
+    (so edits made during the term are kept), or into a new version when none
+    is active, then ClassRoutine is replaced with the entries of ``version``.
+    Activating the active version does nothing (its entries may be older than
+    the live routines). Returns whether the live routines were replaced.
+    """
+    with transaction.atomic():
+        current = RoutineVersion.objects.select_for_update().filter(is_active=True).first()
+        if current and current.pk == version.pk:
+            return False
+        if current:
+            save_live_routines(current)
+        elif ClassRoutine.objects.exists():
+            snapshot_live_routines(
+                f'Saved {timezone.localtime():%Y-%m-%d %H:%M:%S} before {version.name}'[:100],
+                notes=f'Live routines saved automatically when "{version.name}" was activated.',
+            )
+
+        # A queryset delete would send post_delete (and queue an invalidation) for
+        # every routine; the timetables are invalidated once below instead
+        ClassRoutine.objects.all()._raw_delete(ClassRoutine.objects.db)
+        ClassRoutine.objects.bulk_create(
+            (ClassRoutine(class_name_id=class_id, day=day, period_id=period_id,
+                          subject_id=subject_id, teacher_id=teacher_id)
+             for class_id, day, period_id, subject_id, teacher_id
+             in version.entries.values_list(*SLOT_FIELDS).iterator(chunk_size=BATCH_SIZE)),
+            batch_size=BATCH_SIZE,
+        )
+
+        RoutineVersion.objects.exclude(pk=version.pk).filter(is_active=True).update(is_active=False)
+        RoutineVersion.objects.filter(pk=version.pk).update(is_active=True)
+        version.is_active = True
+        transaction.on_commit(invalidate_all_timetables)
+    return True
+
+
+def diff_versions(old, new):
+    """
+    Compare two versions slot by slot.
+
+    Each version is read with one query into a {(class, day, period): (subject, teacher)}
+    map; names are resolved afterwards with one query per referenced table.
+    Returns {'added': [...], 'removed': [...], 'changed': [...]}.
+    """
+    old_slots = {row[:3]: row[3:] for row in old.entries.values_list(*SLOT_FIELDS)}
+    new_slots = {row[:3]: row[3:] for row in new.entries.values_list(*SLOT_FIELDS)}
+
+    added = new_slots.keys() - old_slots.keys()
+    removed = old_slots.keys() - new_slots.keys()
+    changed = {slot for slot in old_slots.keys() & new_slots.keys() if old_slots[slot] != new_slots[slot]}
+
+    slots = added | removed | changed
+    assignments = [old_slots[slot] for slot in removed | changed] + [new_slots[slot] for slot in added | changed]
+    classes = Class.objects.in_bulk({slot[0] for slot in slots})
+    periods = RoutinePeriod.objects.in_bulk({slot[2] for slot in slots})
+    subjects = Subject.objects.in_bulk({subject_id for subject_id, teacher_id in assignments})
+    teachers = Teacher.objects.select_related('user').in_bulk({teacher_id for subject_id, teacher_id in assignments})
+
+    def describe_slot(slot):
+        class_id, day, period_id = slot
+        return {'class_id': class_id, 'class': str(classes[class_id]), 'day': day,
+                'period_id': period_id, 'period': str(periods[period_id])}
+
+    def describe_assignment(assignment):
+        subject_id, teacher_id = assignment
+        return {'subject': subjects[subject_id].name, 'teacher': teachers[teacher_id].user.get_full_name()}
+
+    def ordered(slot_set):
+        return sorted(slot_set, key=lambda slot: (str(classes[slot[0]]), slot[1], periods[slot[2]].order))
+
+    return {
+        'added': [dict(describe_slot(slot), new=describe_assignment(new_slots[slot])) for slot in ordered(added)],
+        'removed': [dict(describe_slot(slot), old=describe_assignment(old_slots[slot])) for slot in ordered(removed)],
+        'changed': [dict(describe_slot(slot), old=describe_assignment(old_slots[slot]),
+                         new=describe_assignment(new_slots[slot])) for slot in ordered(changed)],
+    }
@@ -0,0 +1,357 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Class, ClassRoutine, RoutinePeriod, Subject, Teacher
+
+
+ROUTINE_DAYS = [day for day, label in ClassRoutine.DAY_CHOICES]
+
+
+def routine_cell(routine):
+    """Template/JSON friendly data for one routine slot"""
+    return {
+        'subject': routine.subject.name,
+        'teacher': routine.teacher.user.get_full_name(),
+        'id': routine.id,
+    }
+
+
+def index_routines(routines):
+    """Index routines in memory by (class_id, day, period_id)"""
+    routines = routines.select_related('subject', 'teacher__user')
+    return {(routine.class_name_id, routine.day, routine.period_id): routine for routine in routines}
+
+
+def build_routine_matrix(routines, classes, periods, days=ROUTINE_DAYS):
+    """
+    Build {class_id: {day: {period_id: cell or None}}} from a routine queryset.
+
+    The routines are fetched once and looked up from an in-memory index,
+    so the query count does not depend on the number of classes or periods.
+    """
+    index = index_routines(routines)
+
+    routine_matrix = {}
+    for class_obj in classes:
+        routine_matrix[class_obj.id] = {}
+        for day in days:
+            routine_matrix[class_obj.id][day] = {}
+            for period in periods:
+                routine = index.get((class_obj.id, day, period.id))
+                routine_matrix[class_obj.id][day][period.id] = routine_cell(routine) if routine else None
+    return routine_matrix
+
+
+def serialize_period(period):
+    return {
+        'id': period.id,
+        'start_time': period.start_time.strftime('%H:%M'),
+        'end_time': period.end_time.strftime('%H:%M'),
+        'is_break': period.is_break,
+        'break_name': period.break_name or '',
+        'order': period.order,
+    }
+
+
+def build_routine_rows(routine_matrix, periods, days=ROUTINE_DAYS):
+    """
+    Turn the routine matrix into rows (one per period) for the routine table.
+
+    Each row has one cell per day holding the routines of every class in that slot.
+    """
+    rows = []
+    for period in periods:
+        cells = []
+        for day in days:
+            entries = []
+            for class_id, class_data in routine_matrix.items():
+                cell = class_data[day][period.id]
+                if cell:
+                    entries.append(dict(cell, class_id=class_id))
+            cells.append({'day': day, 'entries': entries})
+        rows.append({'period': period, 'cells': cells})
+    return rows
+
+
+# ✅ Cached timetables
+# Timetables are materialized in the (shared, see settings.CACHES) cache per
+# class and per teacher and are rebuilt when signals (see school/signals.py)
+# invalidate them. The timeout bounds how stale an entry can get if a writer
+# bypasses the signals or the cache is not shared between processes.
+TIMETABLE_CACHE_TIMEOUT = 60 * 60
+
+
+def timetable_key(kind, pk=''):
+    # Counters never expire; a lost one restarts at "now" so old keys are never reused
+    version = cache.get_or_set('timetable:version', time.time_ns, None)
+    return f'timetable:{version}:{kind}:{pk}'
+
+
+def get_routine_periods():
+    """All routine periods (breaks included), cached"""
+    return cache.get_or_set(timetable_key('periods'), lambda: list(RoutinePeriod.objects.all()),
+                            TIMETABLE_CACHE_TIMEOUT)
+
+
+def get_routine_classes():
+    """All classes, cached"""
+    return cache.get_or_set(timetable_key('classes'), lambda: list(Class.objects.all()),
+                            TIMETABLE_CACHE_TIMEOUT)
+
+
+def get_class_timetables(class_ids):
+    """
+    Weekly timetables {class_id: {day: {period_id: cell or None}}} for the given classes.
+
+    Cached classes are served without touching the database; the missing ones
+    are built together from a single routine query.
+    """
+    keys = {class_id: timetable_key('class', class_id) for class_id in class_ids}
+    cached = cache.get_many(keys.values())
+    timetables = {class_id: cached[key] for class_id, key in keys.items() if key in cached}
+
+    missing = [class_obj for class_obj in get_routine_classes()
+               if class_obj.id in keys and class_obj.id not in timetables]
+    if missing:
+        built = build_routine_matrix(
+            ClassRoutine.objects.filter(class_name__in=missing),
+            missing,
+            get_routine_periods(),
+        )
+        cache.set_many({keys[class_id]: timetable for class_id, timetable in built.items()},
+                       TIMETABLE_CACHE_TIMEOUT)
+        timetables.update(built)
+
+    return {class_id: timetables[class_id] for class_id in class_ids if class_id in timetables}
+
+
+def get_class_timetable(class_id):
+    """Weekly timetable of one class or None if the class does not exist"""
+    return get_class_timetables([class_id]).get(class_id)
+
+
+def get_school_timetable():
+    """School-wide routine matrix, assembled from the per-class timetables"""
+    return get_class_timetables([class_obj.id for class_obj in get_routine_classes()])
+
+
+def student_class_ids(student, classes):
+    """Ids of the classes a student attends (Student stores the class name and section as text)"""
+    class_ids = [class_obj.id for class_obj in classes
+                 if class_obj.name == student.class_name and class_obj.section == student.section]
+    return class_ids or [class_obj.id for class_obj in classes if class_obj.name == student.class_name]
+
+
+def get_teacher_timetable(teacher_id):
+    """Routine matrix {class_id: {day: {period_id: cell or None}}} of one teacher"""
+    key = timetable_key('teacher', teacher_id)
+    timetable = cache.get(key)
+    if timetable is None:
+        timetable = build_routine_matrix(
+            ClassRoutine.objects.filter(teacher_id=teacher_id),
+            get_routine_classes(),
+            get_routine_periods(),
+        )
+        cache.set(key, timetable, TIMETABLE_CACHE_TIMEOUT)
+    return timetable
+
+
+def routine_version():
+    """
+    Change counter of the routine data, used for ETag/Last-Modified.
+
+    It is the time of the last change in nanoseconds, so it never goes back
+    even if the cache is cleared (a missing counter restarts at "now").
+    """
+    version = cache.get('timetable:changed')
+    if version is None:
+        cache.add('timetable:changed', time.time_ns(), None)
+        version = cache.get('timetable:changed')
+    return version
+
+
+def routine_last_modified():
+    return datetime.fromtimestamp(routine_version() // 10 ** 9, tz=timezone.utc)
+
+
+def touch_routine_version():
+    cache.set('timetable:changed', time.time_ns(), None)
+
+
+def invalidate_class_timetables(*class_ids):
+    cache.delete_many([timetable_key(kind, class_id) for class_id in class_ids for kind in ('class', 'class-ics')])
+    touch_routine_version()
+
+
+def invalidate_teacher_timetables(*teacher_ids):
+    cache.delete_many([timetable_key(kind, teacher_id)
+                       for teacher_id in teacher_ids for kind in ('teacher', 'teacher-ics')])
+    touch_routine_version()
+
+
+def invalidate_class_list():
+    cache.delete(timetable_key('classes'))
+    touch_routine_version()
+
+
+def invalidate_all_timetables():
+    """Drop every cached timetable (e.g. when the periods change)"""
+    cache.set('timetable:version', time.time_ns(), None)
+    touch_routine_version()
+
+
+# ✅ Teacher double-booking detection
+class TeacherOccupancy:
+    """
+    In-memory (teacher_id, day, period_id) -> routine index.
+
+    Loaded with one query, after which every slot check is a dict lookup.
+    """
+
+    def __init__(self, rows=()):
+        self.slots = defaultdict(list)
+        for routine_id, class_id, teacher_id, day, period_id in rows:
+            self.add(teacher_id, day, period_id, routine_id, class_id)
+
+    @classmethod
+    def load(cls, teacher_ids=None, days=None):
+        routines = ClassRoutine.objects.all()
+        if teacher_ids is not None:
+            routines = routines.filter(teacher_id__in=teacher_ids)
+        if days is not None:
+            routines = routines.filter(day__in=days)
+        return cls(routines.values_list('id', 'class_name_id', 'teacher_id', 'day', 'period_id'))
+
+    def add(self, teacher_id, day, period_id, routine_id=None, class_id=None):
+        self.slots[(teacher_id, day, period_id)].append((routine_id, class_id))
+
+    def clash(self, teacher_id, day, period_id, exclude=None):
+        """(routine_id, class_id) already booked for the teacher in this slot, or None"""
+        for routine_id, class_id in self.slots.get((teacher_id, day, period_id), ()):
+            if routine_id is None or routine_id != exclude:
+                return routine_id, class_id
+        return None
+
+    def conflicts(self):
+        """Slots where a teacher is booked more than once"""
+        return {slot: bookings for slot, bookings in self.slots.items() if len(bookings) > 1}
+
+
+def find_teacher_clash(teacher, day, period, exclude=None):
+    """Class the teacher already teaches on this day and period, or None"""
+    clash = TeacherOccupancy.load([teacher.id], [day]).clash(teacher.id, day, period.id, exclude=exclude)
+    if clash:
+        return next((class_obj for class_obj in get_routine_classes() if class_obj.id == clash[1]), None)
+    return None
+
+
+def teacher_conflict_report():
+    """School-wide list of teacher double bookings"""
+    conflicts = TeacherOccupancy.load().conflicts()
+    if not conflicts:
+        return []
+
+    teachers = Teacher.objects.select_related('user').in_bulk({teacher_id for teacher_id, day, period_id in conflicts})
+    classes = {class_obj.id: class_obj for class_obj in get_routine_classes()}
+    periods = {period.id: period for period in get_routine_periods()}
+    day_order = {day: index for index, day in enumerate(ROUTINE_DAYS)}
+
+    report = []
+    for (teacher_id, day, period_id), bookings in conflicts.items():
+        report.append({
+            'teacher_id': teacher_id,
+            'teacher': teachers[teacher_id].user.get_full_name(),
+            'day': day,
+            'period_id': period_id,
+            'period': str(periods[period_id]),
+            'routines': [{'id': routine_id, 'class_id': class_id, 'class': str(classes[class_id])}
+                         for routine_id, class_id in bookings],
+        })
+    report.sort(key=lambda item: (item['teacher'], day_order.get(item['day'], 0), periods[item['period_id']].order))
+    return report
+
+
+# ✅ Bulk routine writer
+def write_routines(entries, replace=False):
+    """
+    Create many routines in a single transaction.
+
+    ``entries`` is an iterable of (class_obj, day, period, subject_name, teacher).
+    Existing slots, subjects and teacher bookings of the affected classes are
+    loaded once, missing subjects and the routines are inserted with batched
+    inserts. With ``replace`` the existing routines of those classes are
+    deleted first. Returns (created, conflicts) where conflicts lists the
+    slots that were skipped and why.
+    """
+    entries = [(class_obj, day, period, (subject_name or '').strip(), teacher)
+               for class_obj, day, period, subject_name, teacher in entries]
+    entries = [entry for entry in entries if entry[3] and entry[4]]
+    if not entries:
+        return [], []
+
+    class_ids = {class_obj.id for class_obj, day, period, subject_name, teacher in entries}
+    days = {day for class_obj, day, period, subject_name, teacher in entries}
+    conflicts = []
+
+    with transaction.atomic():
+        if replace:
+            ClassRoutine.objects.filter(class_name_id__in=class_ids).delete()
+
+        taken = set(ClassRoutine.objects.filter(class_name_id__in=class_ids, day__in=days)
+                    .values_list('class_name_id', 'day', 'period_id'))
+        subjects = {(subject.class_name_id, subject.name): subject
+                    for subject in Subject.objects.filter(class_name_id__in=class_ids)}
+        occupancy = TeacherOccupancy.load({entry[4].id for entry in entries}, days)
+        classes = {class_item.id: class_item for class_item in get_routine_classes()}
+
+        new_subjects = {}
+        slots = []
+        for class_obj, day, period, subject_name, teacher in entries:
+            if (class_obj.id, day, period.id) in taken:
+                conflicts.append({'class': class_obj, 'day': day, 'period': period,
+                                  'reason': f'A routine already exists for {class_obj} on {day} during {period}.'})
+                continue
+            clash = occupancy.clash(teacher.id, day, period.id)
+            if clash:
+                conflicts.append({'class': class_obj, 'day': day, 'period': period,
+                                  'reason': f'{teacher} is already teaching {classes.get(clash[1], "another class")} '
+                                            f'on {day} during {period}.'})
+                continue
+            taken.add((class_obj.id, day, period.id))
+            occupancy.add(teacher.id, day, period.id, class_id=class_obj.id)
+            key = (class_obj.id, subject_name)
+            if key not in subjects and key not in new_subjects:
+                new_subjects[key] = Subject(name=subject_name, class_name=class_obj, teacher=teacher)
+            slots.append((class_obj, day, period, key, teacher))
+
+        if new_subjects:
+            created_subjects = Subject.objects.bulk_create(new_subjects.values(), batch_size=500)
+            if any(subject.pk is None for subject in created_subjects):
+                # Backends without RETURNING support do not set primary keys on bulk insert
+                created_subjects = Subject.objects.filter(
+                    class_name_id__in={class_id for class_id, name in new_subjects},
+                    name__in={name for class_id, name in new_subjects},
+                )
+            subjects.update({(subject.class_name_id, subject.name): subject for subject in created_subjects})
+
+        created = ClassRoutine.objects.bulk_create([
+            ClassRoutine(class_name=class_obj, day=day, period=period, subject=subjects[key], teacher=teacher)
+            for class_obj, day, period, key, teacher in slots
+        ], batch_size=500)
+
+        # bulk_create does not send signals, so clear the cached timetables here
+        teacher_ids = {routine.teacher_id for routine in created}
+        transaction.on_commit(lambda: invalidate_class_timetables(*class_ids))
+        transaction.on_commit(lambda: invalidate_teacher_timetables(*teacher_ids))
+
+    return created, conflicts
+
+
+def write_bulk_routines(class_obj, entries):
+    """Create routines of one class from (day, period, subject_name, teacher) entries, see write_routines"""
+    return write_routines((class_obj, day, period, subject_name, teacher)
+                          for day, period, subject_name, teacher in entries)
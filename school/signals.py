@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .attendance import apply_attendance_changes
+from .dashboard import invalidate_notices, invalidate_student_dashboards
+from .models import Attendance, BookIssue, Class, ClassRoutine, Fee, Notice, Result, RoutinePeriod, Student, Subject, \
+    Teacher
+from .ranking import update_exam_ranks
+from .result_stats import invalidate_result_stats
+from . import routines
+
+
+def _on_commit(func, *args):
+    transaction.on_commit(lambda: func(*args))
+
+
+@receiver(pre_save, sender=ClassRoutine)
+def remember_routine_owners(sender, instance, **kwargs):
+    """Remember the old class/teacher so an edit that moves a routine clears both timetables"""
+    instance._previous_owners = None
+    if instance.pk:
+        instance._previous_owners = ClassRoutine.objects.filter(pk=instance.pk).values_list(
+            'class_name_id', 'teacher_id').first()
+
+
+@receiver(post_save, sender=ClassRoutine)
+@receiver(post_delete, sender=ClassRoutine)
+def routine_changed(sender, instance, **kwargs):
+    class_ids = {instance.class_name_id}
+    teacher_ids = {instance.teacher_id}
+    previous = getattr(instance, '_previous_owners', None)
+    if previous:
+        class_ids.add(previous[0])
+        teacher_ids.add(previous[1])
+    _on_commit(routines.invalidate_class_timetables, *class_ids)
+    _on_commit(routines.invalidate_teacher_timetables, *teacher_ids)
+
+
+@receiver(post_save, sender=RoutinePeriod)
+@receiver(post_delete, sender=RoutinePeriod)
+def period_changed(sender, instance, **kwargs):
+    _on_commit(routines.invalidate_all_timetables)
+
+
+@receiver(post_save, sender=Class)
+@receiver(post_delete, sender=Class)
+def class_changed(sender, instance, **kwargs):
+    _on_commit(routines.invalidate_class_list)
+    _on_commit(routines.invalidate_class_timetables, instance.id)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def subject_changed(sender, instance, **kwargs):
+    teacher_ids = set(ClassRoutine.objects.filter(subject=instance).values_list('teacher_id', flat=True))
+    _on_commit(routines.invalidate_class_timetables, instance.class_name_id)
+    _on_commit(routines.invalidate_teacher_timetables, *teacher_ids)
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_delete, sender=Teacher)
+def teacher_changed(sender, instance, **kwargs):
+    class_ids = set(ClassRoutine.objects.filter(teacher=instance).values_list('class_name_id', flat=True))
+    _on_commit(routines.invalidate_teacher_timetables, instance.id)
+    _on_commit(routines.invalidate_class_timetables, *class_ids)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_teacher_name(sender, instance, update_fields=None, **kwargs):
+    """Remember a teacher's stored name: it is baked into the cached timetable cells"""
+    instance._previous_name = None
+    if instance.pk and instance.user_type == 'teacher' and (
+            update_fields is None or {'first_name', 'last_name'} & set(update_fields)):
+        instance._previous_name = sender.objects.filter(pk=instance.pk).values_list(
+            'first_name', 'last_name').first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def teacher_renamed(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_name', None)
+    if previous and previous != (instance.first_name, instance.last_name):
+        teacher = Teacher.objects.filter(user=instance).first()
+        if teacher:
+            teacher_changed(Teacher, teacher)
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance(sender, instance, **kwargs):
+    """Remember the stored row so an edit moves the counts in the summaries and bitmaps"""
+    instance._previous_attendance = None
+    if instance.pk:
+        instance._previous_attendance = Attendance.objects.filter(pk=instance.pk).values_list(
+            'student_id', 'class_name_id', 'date', 'status').first()
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, **kwargs):
+    changes = [(instance.student_id, instance.class_name_id, instance.date, None, instance.status)]
+    previous = getattr(instance, '_previous_attendance', None)
+    if previous:
+        changes.insert(0, previous + (None,))
+    apply_attendance_changes(changes)
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, **kwargs):
+    apply_attendance_changes([(instance.student_id, instance.class_name_id, instance.date, instance.status, None)])
+
+
+@receiver(pre_save, sender=Result)
+def remember_result_exam(sender, instance, **kwargs):
+    """Remember the old exam / subject / class so moving a result updates both groups"""
+    instance._previous_exam = None
+    if instance.pk:
+        instance._previous_exam = Result.objects.filter(pk=instance.pk).values_list(
+            'exam_name', 'subject_id', 'subject__class_name__name').first()
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def result_changed(sender, instance, **kwargs):
+    """Re-rank only the exam and class the result belongs to and drop its subject statistics"""
+    exams = {(instance.exam_name, instance.subject_id, Subject.objects.filter(pk=instance.subject_id).values_list(
+        'class_name__name', flat=True).first())}
+    previous = getattr(instance, '_previous_exam', None)
+    if previous:
+        exams.add(previous)
+    for exam_name, subject_id, class_name in exams:
+        _on_commit(update_exam_ranks, exam_name, [class_name])
+    _on_commit(invalidate_result_stats, *{(subject_id, exam_name) for exam_name, subject_id, class_name in exams})
+    _on_commit(invalidate_student_dashboards, instance.student_id)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Fee)
+@receiver(post_save, sender=BookIssue)
+@receiver(post_delete, sender=Fee)
+@receiver(post_delete, sender=BookIssue)
+def student_data_changed(sender, instance, **kwargs):
+    """Drop the cached dashboard of the student (or of the student a fee / book issue belongs to)"""
+    _on_commit(invalidate_student_dashboards, instance.pk if sender is Student else instance.student_id)
+
+
+@receiver(post_save, sender=Notice)
+@receiver(post_delete, sender=Notice)
+def notice_changed(sender, instance, **kwargs):
+    _on_commit(invalidate_notices)
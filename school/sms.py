@@ -0,0 +1,68 @@
+"""
+Pluggable SMS sending, modelled on Django's email backends.
+
+settings.SCHOOL_SMS_BACKEND is the dotted path of a backend class; the
+console backend (the default) prints messages instead of sending them and the
+locmem backend keeps them in ``outbox`` for tests. A provider backend only
+needs ``send_messages``, and can keep one HTTP session open between
+``open()`` and ``close()``.
+"""
+import sys
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseSMSBackend:
+    def __init__(self, fail_silently=False, **kwargs):
+        self.fail_silently = fail_silently
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send_messages(self, messages):
+        """Send (phone, text) pairs; return the number sent"""
+        raise NotImplementedError('SMS backends must implement send_messages()')
+
+
+class ConsoleSMSBackend(BaseSMSBackend):
+    """Write messages to stdout instead of sending them (local stand-in)"""
+
+    def __init__(self, *args, stream=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stream = stream or sys.stdout
+        self._lock = threading.RLock()
+
+    def send_messages(self, messages):
+        with self._lock:
+            for phone, text in messages:
+                self.stream.write(f'SMS to {phone}: {text}\n{"-" * 79}\n')
+            self.stream.flush()
+        return len(messages)
+
+
+outbox = []
+
+
+class LocMemSMSBackend(BaseSMSBackend):
+    """Keep sent messages in ``school.sms.outbox`` (for tests)"""
+
+    def send_messages(self, messages):
+        outbox.extend(messages)
+        return len(messages)
+
+
+def get_sms_backend(backend=None, **kwargs):
+    path = backend or getattr(settings, 'SCHOOL_SMS_BACKEND', 'school.sms.ConsoleSMSBackend')
+    return import_string(path)(**kwargs)
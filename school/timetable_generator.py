@@ -0,0 +1,163 @@
+import random
+import time
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from .models import ClassRoutine, RoutinePeriod, Subject, TeacherUnavailability
+from .routines import ROUTINE_DAYS, invalidate_all_timetables
+
+
+def solve_timetable(lessons, slots, blocked=(), time_budget=5.0, seed=None):
+    """
+    Place weekly lessons into timetable slots.
+
+    ``lessons`` is a list of (class_id, subject_id, teacher_id, weekly_periods),
+    ``slots`` a list of (day, period_id) and ``blocked`` a set of
+    (teacher_id, day, period_id) in which a teacher cannot teach.
+
+    A class and a teacher are never booked twice in the same slot. A greedy pass
+    places the most constrained lessons first into the best scoring free slot
+    (spreading a subject over the week). Lessons that do not fit are then
+    forced into the least conflicting slot, evicting the lessons in the way,
+    which are queued again (a tabu list stops lessons from bouncing straight
+    back). The search stops when everything is placed or the time budget runs
+    out and the best timetable found is returned.
+
+    Returns (placements, unplaced): placements are
+    (class_id, subject_id, teacher_id, day, period_id) and unplaced counts the
+    missing periods per (class_id, subject_id, teacher_id).
+    """
+    rng = random.Random(seed)
+    deadline = time.monotonic() + time_budget
+    slot_day = [day for day, period_id in slots]
+
+    # Slots a teacher can use at all
+    blocked = set(blocked)
+    teacher_ids = {teacher_id for class_id, subject_id, teacher_id, count in lessons}
+    allowed = {
+        teacher_id: [index for index, (day, period_id) in enumerate(slots)
+                     if (teacher_id, day, period_id) not in blocked]
+        for teacher_id in teacher_ids
+    }
+
+    units = [(class_id, subject_id, teacher_id)
+             for class_id, subject_id, teacher_id, count in lessons
+             for _ in range(count)]
+    impossible = [unit for unit in units if not allowed[unit[2]]]
+    units = [unit for unit in units if allowed[unit[2]]]
+    teacher_load = Counter(teacher_id for class_id, subject_id, teacher_id in units)
+    class_load = Counter(class_id for class_id, subject_id, teacher_id in units)
+    units.sort(key=lambda unit: (len(allowed[unit[2]]) - teacher_load[unit[2]],
+                                 len(slots) - class_load[unit[0]],
+                                 rng.random()))
+
+    class_slots = defaultdict(dict)  # class_id -> {slot: unit}
+    teacher_slots = defaultdict(dict)  # teacher_id -> {slot: unit}
+    subject_days = Counter()  # (class_id, subject_id, day)
+    class_days = Counter()  # (class_id, day)
+
+    def book(unit, slot):
+        class_id, subject_id, teacher_id = unit
+        class_slots[class_id][slot] = unit
+        teacher_slots[teacher_id][slot] = unit
+        subject_days[class_id, subject_id, slot_day[slot]] += 1
+        class_days[class_id, slot_day[slot]] += 1
+
+    def unbook(unit, slot):
+        class_id, subject_id, teacher_id = unit
+        del class_slots[class_id][slot]
+        del teacher_slots[teacher_id][slot]
+        subject_days[class_id, subject_id, slot_day[slot]] -= 1
+        class_days[class_id, slot_day[slot]] -= 1
+
+    def score(unit, slot):
+        class_id, subject_id, teacher_id = unit
+        return subject_days[class_id, subject_id, slot_day[slot]], class_days[class_id, slot_day[slot]], rng.random()
+
+    def place(unit):
+        taken = class_slots[unit[0]]
+        busy = teacher_slots[unit[2]]
+        candidates = [slot for slot in allowed[unit[2]] if slot not in taken and slot not in busy]
+        if candidates:
+            book(unit, min(candidates, key=lambda slot: score(unit, slot)))
+            return True
+        return False
+
+    queue = [unit for unit in units if not place(unit)]
+    best = ([(unit, slot) for booked in class_slots.values() for slot, unit in booked.items()], list(queue))
+
+    tabu = {}
+    iteration = 0
+    while queue and time.monotonic() < deadline:
+        iteration += 1
+        unit = queue.pop(rng.randrange(len(queue)))
+        if not place(unit):
+            # Evict whatever blocks the least conflicting slot
+            taken = class_slots[unit[0]]
+            busy = teacher_slots[unit[2]]
+
+            def conflicts(slot):
+                evicted = {taken.get(slot), busy.get(slot)} - {None}
+                penalty = sum(tabu.get((other, slot), 0) > iteration for other in evicted)
+                return penalty, len(evicted), rng.random()
+
+            slot = min(allowed[unit[2]], key=conflicts)
+            for other in {taken.get(slot), busy.get(slot)} - {None}:
+                unbook(other, slot)
+                queue.append(other)
+                tabu[other, slot] = iteration + 10 + rng.randrange(10)
+            book(unit, slot)
+
+        if len(queue) < len(best[1]):
+            best = ([(unit, slot) for booked in class_slots.values() for slot, unit in booked.items()], list(queue))
+
+    placements, unplaced = best
+    return (
+        [unit + slots[slot] for unit, slot in placements],
+        Counter(unplaced + impossible),
+    )
+
+
+def generate_timetable(class_ids=None, time_budget=5.0, seed=None, commit=True):
+    """
+    Generate the routines of every class with weekly subject requirements.
+
+    Requirements come from ``Subject.weekly_periods`` (with the subject's
+    teacher), non-break periods are used as slots and ``TeacherUnavailability``
+    plus the routines of classes that are not regenerated keep teachers busy.
+    With ``commit`` the routines of the generated classes are replaced in one
+    transaction using a batched insert.
+    """
+    subjects = Subject.objects.filter(weekly_periods__gt=0)
+    if class_ids is not None:
+        subjects = subjects.filter(class_name_id__in=class_ids)
+    lessons = list(subjects.values_list('class_name_id', 'id', 'teacher_id', 'weekly_periods'))
+    class_ids = sorted({class_id for class_id, subject_id, teacher_id, count in lessons})
+
+    period_ids = list(RoutinePeriod.objects.filter(is_break=False).order_by('order', 'start_time')
+                      .values_list('id', flat=True))
+    slots = [(day, period_id) for day in ROUTINE_DAYS for period_id in period_ids]
+
+    blocked = set(TeacherUnavailability.objects.values_list('teacher_id', 'day', 'period_id'))
+    blocked.update(ClassRoutine.objects.exclude(class_name_id__in=class_ids)
+                   .values_list('teacher_id', 'day', 'period_id'))
+
+    placements, unplaced = solve_timetable(lessons, slots, blocked, time_budget=time_budget, seed=seed)
+    routines = [
+        ClassRoutine(class_name_id=class_id, subject_id=subject_id, teacher_id=teacher_id,
+                     day=day, period_id=period_id)
+        for class_id, subject_id, teacher_id, day, period_id in placements
+    ]
+
+    if commit and class_ids:
+        with transaction.atomic():
+            ClassRoutine.objects.filter(class_name_id__in=class_ids).delete()
+            ClassRoutine.objects.bulk_create(routines, batch_size=500)
+            transaction.on_commit(invalidate_all_timetables)
+
+    return {
+        'classes': class_ids,
+        'routines': routines,
+        'unplaced': unplaced,
+    }
@@ -7,9 +7,25 @@ urlpatterns = [
     path('teachers/', views.teacher_management, name='teacher_management'),
     path('notices/', views.notice_board, name='notice_board'),
     path('results/', views.results, name='results'),
+    path('results/export/', views.export_results, name='export_results'),
+    path('results/merit/', views.merit_list, name='merit_list'),
+    path('results/marks-entry/', views.marks_entry, name='marks_entry'),
+    path('results/api/marks/', views.save_marks_api, name='save_marks_api'),
+    path('results/api/stats/', views.result_stats_api, name='result_stats_api'),
     path('attendance/', views.attendance_tracking, name='attendance'),
+    path('mark-attendance/', views.mark_attendance_api, name='mark_attendance'),
+    path('attendance/report/', views.attendance_report, name='attendance_report'),
+    path('attendance/export/', views.export_attendance, name='export_attendance'),
     path('library/', views.library_management, name='library'),
+    path('library/autocomplete/', views.book_autocomplete, name='book_autocomplete'),
     path('fees/', views.fee_payment, name='fee_payment'),
+    path('fees/export/', views.export_fees, name='export_fees'),
+    path('fees/generate/', views.generate_fees, name='generate_fees'),
+    path('fees/reconcile/', views.fee_reconciliation, name='fee_reconciliation'),
+    path('fees/reconcile/<int:line_id>/', views.resolve_statement, name='resolve_statement'),
+    path('fees/<int:fee_id>/pay/', views.pay_fee, name='pay_fee'),
+    path('fees/webhook/', views.payment_webhook, name='payment_webhook'),
+    path('fees/mock-gateway/<str:reference>/', views.mock_gateway_checkout, name='mock_gateway_checkout'),
     path('admission/', views.online_admission, name='online_admission'),
     path('admission/success/<int:application_id>/', views.admission_success, name='admission_success'),
     path('add-notice/', views.add_notice, name='add_notice'),
@@ -24,6 +40,12 @@ urlpatterns = [
     path('routine/manage/', views.manage_class_routines, name='manage_class_routines'),
     path('routine/edit/<int:routine_id>/', views.edit_class_routine, name='edit_class_routine'),
     path('routine/delete/<int:routine_id>/', views.delete_class_routine, name='delete_class_routine'),
+    path('routine/export/', views.export_class_routines, name='export_class_routines'),
+    path('routine/import/', views.import_class_routines, name='import_class_routines'),
+    path('routine/versions/', views.routine_versions, name='routine_versions'),
+    path('routine/versions/<int:version_id>/activate/', views.activate_routine_version, name='activate_routine_version'),
+    path('routine/versions/diff/', views.routine_version_diff, name='routine_version_diff'),
+    path('routine/calendar/<str:token>/routine.ics', views.routine_calendar_feed, name='routine_calendar_feed'),
     path('routine/periods/', views.manage_routine_periods, name='manage_routine_periods'),
     path('routine/periods/edit/<int:period_id>/', views.edit_routine_period, name='edit_routine_period'),
     path('routine/periods/delete/<int:period_id>/', views.delete_routine_period, name='delete_routine_period'),
@@ -32,6 +54,12 @@ path('routine/create-default-periods/', views.create_default_periods, name='crea
     # API URLs
     path('routine/api/subjects/', views.get_subjects_by_class, name='get_subjects_by_class'),
     path('routine/api/existing-routines/', views.get_existing_routines, name='get_existing_routines'),
+    path('routine/api/conflicts/', views.get_routine_conflicts, name='get_routine_conflicts'),
+
+    # Timetable API (v1) - supports ETag / If-None-Match
+    path('api/v1/timetable/week/', views.api_week_timetable, name='api_week_timetable'),
+    path('api/v1/timetable/class/<int:class_id>/', views.api_class_timetable, name='api_class_timetable'),
+    path('api/v1/timetable/teacher/<int:teacher_id>/', views.api_teacher_timetable, name='api_teacher_timetable'),
 
     # New Pages
     path('about/', views.about, name='about'),
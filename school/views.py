@@ -1,10 +1,59 @@
+import json
+import uuid
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden, JsonResponse
+from django.core.paginator import Paginator
+from django.db import IntegrityError
+from django.db.models import Count, Q, Sum
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
 from .models import *
 from .forms import NoticeForm, ClassRoutineForm, GalleryForm, ContactForm, AdmissionForm, RoutinePeriodForm, \
-    BulkRoutineForm
+    BulkRoutineForm, RoutineImportForm, RoutineVersionForm, AttendanceReportForm, AttendanceFilterForm, \
+    MarksEntryForm, FeeRunForm, BankStatementForm
+from .attendance import mark_attendance, term_key
+from .attendance_bits import student_attendance_history
+from .attendance_reports import chronic_absentees, class_attendance_rates, class_attendance_totals
+from .book_search import autocomplete_books, search_books
+from .dashboard import student_dashboard_context
+from .exports import export_attendance_csv, export_fees_csv, export_results_csv
+from .fees import fee_ledger, generate_term_fees, top_defaulters
+from .marks import class_students, save_marks
+from .pagination import KeysetPage
+from .payments import (
+    MockGateway, apply_payment_event, create_payment_intent, mock_gateway_enabled, payment_gateway, process_webhook,
+)
+from .reconciliation import ignore_statement_line, import_bank_statement, resolve_statement_line
+from .result_stats import get_result_stats_many
+from .routine_io import ROUTINE_COLUMNS, export_routines_csv, export_routines_xlsx, import_routines
+from .routines import (
+    ROUTINE_DAYS, build_routine_rows, get_class_timetable, get_class_timetables,
+    find_teacher_clash, get_routine_classes, get_routine_periods, get_school_timetable, get_teacher_timetable,
+    routine_last_modified, routine_version, serialize_period, student_class_ids, teacher_conflict_report,
+    write_bulk_routines
+)
+from .routine_calendar import calendar_token, get_class_calendar, get_teacher_calendar, user_id_from_token
+from .routine_versions import activate_version, clone_version, diff_versions, snapshot_live_routines
+
+
+def routine_etag(request, *args, **kwargs):
+    """ETag of routine JSON responses, from the routine change counter (no routine queries)"""
+    return f'{request.get_full_path()}:{routine_version()}'
+
+
+def routine_last_modified_at(request, *args, **kwargs):
+    return routine_last_modified()
+
+
+# Answer If-None-Match / If-Modified-Since with 304 while routines are unchanged
+routine_conditional = condition(etag_func=routine_etag, last_modified_func=routine_last_modified_at)
 
 
 def home(request):
@@ -323,6 +372,8 @@ def add_class_routine(request):
             # Check for duplicate
             if ClassRoutine.objects.filter(class_name=class_name, day=day, period=period).exists():
                 messages.error(request, f'A routine already exists for {class_name} on {day} during {period}.')
+            elif clash := find_teacher_clash(teacher, day, period):
+                messages.error(request, f'{teacher} is already teaching {clash} on {day} during {period}.')
             else:
                 # ✅ Subject create বা get করুন
                 subject, created = Subject.objects.get_or_create(
@@ -348,45 +399,21 @@ def add_class_routine(request):
         bulk_form = BulkRoutineForm(request.POST)
         if bulk_form.is_valid():
             class_name = bulk_form.cleaned_data['class_name']
-            day = bulk_form.cleaned_data['day']
-
-            periods = RoutinePeriod.objects.filter(is_break=False).order_by('order')
-            routines_created = 0
-
-            for period in periods:
-                subject_field = f'period_{period.id}_subject'
-                teacher_field = f'period_{period.id}_teacher'
-
-                subject_name = bulk_form.cleaned_data.get(subject_field)  # ✅ Text input থেকে subject name
-                teacher = bulk_form.cleaned_data.get(teacher_field)
-
-                # Only create routine if both subject name and teacher are provided
-                if subject_name and teacher:  # ✅ subject_name check করুন (empty string check)
-                    subject_name = subject_name.strip()
-                    if subject_name:  # ✅ শুধু whitespace না হলে
-                        # Check for duplicate
-                        if not ClassRoutine.objects.filter(class_name=class_name, day=day, period=period).exists():
-                            # ✅ Subject create বা get করুন
-                            subject, created = Subject.objects.get_or_create(
-                                name=subject_name,
-                                class_name=class_name,
-                                defaults={'teacher': teacher}
-                            )
-
-                            ClassRoutine.objects.create(
-                                class_name=class_name,
-                                day=day,
-                                period=period,
-                                subject=subject,
-                                teacher=teacher
-                            )
-                            routines_created += 1
-
-            if routines_created > 0:
-                messages.success(request,
-                                 f'Successfully created {routines_created} routines for {class_name} on {day}!')
+
+            # Existing slots and subjects are loaded once and every cell is saved in one transaction
+            try:
+                created, conflicts = write_bulk_routines(class_name, bulk_form.get_entries())
+            except IntegrityError:
+                messages.error(request, 'Routines were changed by someone else while saving. Please try again.')
             else:
-                messages.warning(request, 'No routines were created. Please fill in at least one period.')
+                for conflict in conflicts:
+                    messages.error(request, conflict['reason'])
+
+                if created:
+                    messages.success(request,
+                                     f'Successfully created {len(created)} routines for {class_name}!')
+                elif not conflicts:
+                    messages.warning(request, 'No routines were created. Please fill in at least one cell.')
 
             return redirect('add_class_routine')
 
@@ -416,23 +443,29 @@ def edit_class_routine(request, routine_id):
             # ✅ Subject update করার logic
             subject_name = form.cleaned_data['subject']  # Text input থেকে subject name
             teacher = form.cleaned_data['teacher']
+            day = form.cleaned_data['day']
+            period = form.cleaned_data['period']
 
-            # Subject update বা create করুন
-            subject, created = Subject.objects.get_or_create(
-                name=subject_name,
-                class_name=routine.class_name,
-                defaults={'teacher': teacher}
-            )
-
-            # Routine update করুন
-            routine.subject = subject
-            routine.teacher = teacher
-            routine.day = form.cleaned_data['day']
-            routine.period = form.cleaned_data['period']
-            routine.save()
-
-            messages.success(request, 'Class routine updated successfully!')
-            return redirect('manage_class_routines')
+            clash = find_teacher_clash(teacher, day, period, exclude=routine.id)
+            if clash:
+                messages.error(request, f'{teacher} is already teaching {clash} on {day} during {period}.')
+            else:
+                # Subject update বা create করুন
+                subject, created = Subject.objects.get_or_create(
+                    name=subject_name,
+                    class_name=routine.class_name,
+                    defaults={'teacher': teacher}
+                )
+
+                # Routine update করুন
+                routine.subject = subject
+                routine.teacher = teacher
+                routine.day = day
+                routine.period = period
+                routine.save()
+
+                messages.success(request, 'Class routine updated successfully!')
+                return redirect('manage_class_routines')
     else:
         # Initial form load-এ current subject name set করুন
         form = ClassRoutineForm(instance=routine)
@@ -468,56 +501,46 @@ def delete_class_routine(request, routine_id):
 def class_routine(request):
     """Display class routine in Excel-like table"""
     try:
-        # Check if RoutinePeriod table exists
-        RoutinePeriod.objects.exists()
+        # Check if RoutinePeriod table exists (served from the timetable cache after the first hit)
+        periods = get_routine_periods()
     except:
         messages.error(request, 'Routine system is being set up. Please try again in a moment.')
         return render(request, 'school/class_routine.html', {
             'routine_matrix': {},
+            'routine_rows': [],
             'periods': [],
             'days': ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday'],
             'classes': Class.objects.all(),
         })
 
-    routines = ClassRoutine.objects.all().select_related('class_name', 'period', 'subject', 'teacher')
+    # Timetables are served from the cache and rebuilt only when routines change
+    days = ROUTINE_DAYS
+    classes = get_routine_classes()
+    calendar_url = None
 
     if request.user.user_type == 'student':
         try:
             student = Student.objects.get(user=request.user)
-            routines = routines.filter(class_name__name=student.class_name)
+            routine_matrix = get_class_timetables(student_class_ids(student, classes))
+            calendar_url = request.build_absolute_uri(
+                reverse('routine_calendar_feed', args=[calendar_token(request.user)]))
         except Student.DoesNotExist:
-            routines = ClassRoutine.objects.none()
+            routine_matrix = {}
     elif request.user.user_type == 'teacher':
         try:
             teacher = Teacher.objects.get(user=request.user)
-            routines = routines.filter(teacher=teacher)
+            routine_matrix = get_teacher_timetable(teacher.id)
+            calendar_url = request.build_absolute_uri(
+                reverse('routine_calendar_feed', args=[calendar_token(request.user)]))
         except Teacher.DoesNotExist:
-            routines = ClassRoutine.objects.none()
-
-    # Organize data for template
-    periods = RoutinePeriod.objects.all()
-    days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday']
-    classes = Class.objects.all()
-
-    # Create routine matrix
-    routine_matrix = {}
-    for class_obj in classes:
-        routine_matrix[class_obj.id] = {}
-        for day in days:
-            routine_matrix[class_obj.id][day] = {}
-            for period in periods:
-                try:
-                    routine = routines.get(class_name=class_obj, day=day, period=period)
-                    routine_matrix[class_obj.id][day][period.id] = {
-                        'subject': routine.subject.name,
-                        'teacher': routine.teacher.user.get_full_name(),
-                        'id': routine.id
-                    }
-                except ClassRoutine.DoesNotExist:
-                    routine_matrix[class_obj.id][day][period.id] = None
+            routine_matrix = {}
+    else:
+        routine_matrix = get_school_timetable()
 
     context = {
+        'calendar_url': calendar_url,
         'routine_matrix': routine_matrix,
+        'routine_rows': build_routine_rows(routine_matrix, periods, days),
         'periods': periods,
         'days': days,
         'classes': classes,
@@ -525,6 +548,31 @@ def class_routine(request):
     return render(request, 'school/class_routine.html', context)
 
 
+@cache_control(private=True, no_cache=True)
+@routine_conditional
+def routine_calendar_feed(request, token):
+    """iCalendar subscription feed of a student's class or a teacher's routine (token authenticated)"""
+    user = User.objects.filter(id=user_id_from_token(token), is_active=True).first()
+    if user is None:
+        return HttpResponseForbidden("Invalid calendar link.")
+
+    calendar = None
+    if user.user_type == 'student':
+        student = Student.objects.filter(user=user).first()
+        class_ids = student_class_ids(student, get_routine_classes()) if student else []
+        calendar = get_class_calendar(class_ids[0]) if class_ids else None
+    elif user.user_type == 'teacher':
+        teacher = Teacher.objects.select_related('user').filter(user=user).first()
+        calendar = get_teacher_calendar(teacher) if teacher else None
+
+    if calendar is None:
+        raise Http404("No routine found for this calendar link.")
+
+    response = HttpResponse(calendar, content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = 'inline; filename="routine.ics"'
+    return response
+
+
 @login_required
 def manage_class_routines(request):
     """Manage all class routines"""
@@ -547,28 +595,127 @@ def manage_class_routines(request):
 
 
 @login_required
+def export_class_routines(request):
+    """Download the whole school timetable as CSV or XLSX"""
+    if request.user.user_type not in ['admin', 'teacher']:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    if request.GET.get('format') == 'xlsx':
+        return export_routines_xlsx()
+    return export_routines_csv()
+
+
+@login_required
+def import_class_routines(request):
+    """Upload a whole school timetable from CSV or XLSX"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    if request.method == 'POST':
+        form = RoutineImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            created, errors = import_routines(form.cleaned_data['file'], replace=form.cleaned_data['replace'])
+            for error in errors[:20]:
+                messages.error(request, error)
+            if len(errors) > 20:
+                messages.error(request, f'... and {len(errors) - 20} more problems.')
+            if errors:
+                messages.error(request, 'Nothing was imported. Please fix these problems and upload the file again.')
+
+            if created:
+                messages.success(request, f'Successfully imported {len(created)} routines!')
+                return redirect('manage_class_routines')
+            if not errors:
+                messages.warning(request, 'The file did not contain any routines.')
+    else:
+        form = RoutineImportForm()
+
+    return render(request, 'school/import_class_routines.html', {'form': form, 'columns': ROUTINE_COLUMNS})
+
+
+@login_required
+def routine_versions(request):
+    """Saved timetable versions (terms): snapshot, clone and activate"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    if request.method == 'POST':
+        form = RoutineVersionForm(request.POST)
+        if form.is_valid():
+            source = form.cleaned_data['source']
+            if source:
+                version = clone_version(source, form.cleaned_data['name'], form.cleaned_data['notes'])
+            else:
+                version = snapshot_live_routines(form.cleaned_data['name'], form.cleaned_data['notes'])
+            messages.success(request, f'Routine version "{version}" saved!')
+            return redirect('routine_versions')
+    else:
+        form = RoutineVersionForm()
+
+    versions = RoutineVersion.objects.annotate(entry_count=Count('entries'))
+    context = {
+        'form': form,
+        'versions': versions,
+    }
+    return render(request, 'school/routine_versions.html', context)
+
+
+@login_required
+def activate_routine_version(request, version_id):
+    """Replace the live routines with a saved version"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    version = get_object_or_404(RoutineVersion, id=version_id)
+    if request.method == 'POST':
+        if activate_version(version):
+            messages.success(request, f'Routine version "{version}" is now active!')
+        else:
+            messages.info(request, f'Routine version "{version}" is already active.')
+    return redirect('routine_versions')
+
+
+@login_required
+def routine_version_diff(request):
+    """API endpoint comparing two routine versions (?from=<id>&to=<id>)"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    old_id = request.GET.get('from', '')
+    new_id = request.GET.get('to', '')
+    if not (old_id.isdigit() and new_id.isdigit()):
+        return JsonResponse({'error': 'Both from and to version ids are required.'}, status=400)
+
+    old = get_object_or_404(RoutineVersion, id=old_id)
+    new = get_object_or_404(RoutineVersion, id=new_id)
+    return JsonResponse(dict(diff_versions(old, new), **{'from': old.name, 'to': new.name}))
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@routine_conditional
 def get_routine_data(request):
     """API endpoint to get routine data for specific class and day"""
     class_id = request.GET.get('class_id')
     day = request.GET.get('day')
 
-    routines = ClassRoutine.objects.filter(
-        class_name_id=class_id,
-        day=day
-    ).select_related('period', 'subject', 'teacher')
-
     data = {}
-    for routine in routines:
-        data[routine.period.id] = {
-            'subject': routine.subject.name,
-            'teacher': routine.teacher.user.get_full_name(),
-            'routine_id': routine.id
-        }
+    timetable = get_class_timetable(int(class_id)) if class_id and class_id.isdigit() else None
+    if timetable and day in timetable:
+        for period_id, cell in timetable[day].items():
+            if cell:
+                data[period_id] = {
+                    'subject': cell['subject'],
+                    'teacher': cell['teacher'],
+                    'routine_id': cell['id']
+                }
 
     return JsonResponse(data)
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@routine_conditional
 def get_subjects_by_class(request):
     """API endpoint to get subjects by class"""
     class_id = request.GET.get('class_id')
@@ -582,27 +729,85 @@ def get_subjects_by_class(request):
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@routine_conditional
 def get_existing_routines(request):
     """API endpoint to get existing routines for a class and day"""
     class_id = request.GET.get('class_id')
     day = request.GET.get('day')
 
     routines = {}
-    if class_id and day:
-        existing_routines = ClassRoutine.objects.filter(
-            class_name_id=class_id,
-            day=day
-        ).select_related('period', 'subject', 'teacher')
-
-        for routine in existing_routines:
-            routines[str(routine.period.id)] = {
-                'subject_name': str(routine.subject.name),  # ✅ Subject name পাঠান
-                'teacher_name': str(routine.teacher.user.get_full_name()),
-            }
+    timetable = get_class_timetable(int(class_id)) if class_id and class_id.isdigit() else None
+    if timetable and day in timetable:
+        for period_id, cell in timetable[day].items():
+            if cell:
+                routines[str(period_id)] = {
+                    'subject_name': cell['subject'],  # ✅ Subject name পাঠান
+                    'teacher_name': cell['teacher'],
+                }
 
     return JsonResponse(routines)
 
 
+def timetable_payload(timetable, **extra):
+    payload = {
+        'version': str(routine_version()),
+        'days': ROUTINE_DAYS,
+        'periods': [serialize_period(period) for period in get_routine_periods()],
+    }
+    payload.update(extra)
+    payload['timetable'] = timetable
+    return payload
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@routine_conditional
+def api_class_timetable(request, class_id):
+    """JSON timetable of one class: {day: {period_id: routine or null}}"""
+    timetable = get_class_timetable(class_id)
+    if timetable is None:
+        return JsonResponse({'error': 'Class not found'}, status=404)
+
+    class_obj = next(class_obj for class_obj in get_routine_classes() if class_obj.id == class_id)
+    return JsonResponse(timetable_payload(
+        timetable, **{'class': {'id': class_obj.id, 'name': class_obj.name, 'section': class_obj.section}}))
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@routine_conditional
+def api_teacher_timetable(request, teacher_id):
+    """JSON timetable of one teacher: {class_id: {day: {period_id: routine or null}}}"""
+    teacher = get_object_or_404(Teacher.objects.select_related('user'), id=teacher_id)
+    timetable = {
+        class_id: week for class_id, week in get_teacher_timetable(teacher.id).items()
+        if any(cell for day_cells in week.values() for cell in day_cells.values())
+    }
+    return JsonResponse(timetable_payload(
+        timetable, teacher={'id': teacher.id, 'name': teacher.user.get_full_name()}))
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@routine_conditional
+def api_week_timetable(request):
+    """JSON timetable of the whole school: {class_id: {day: {period_id: routine or null}}}"""
+    classes = [{'id': class_obj.id, 'name': class_obj.name, 'section': class_obj.section}
+               for class_obj in get_routine_classes()]
+    return JsonResponse(timetable_payload(get_school_timetable(), classes=classes))
+
+
+@login_required
+def get_routine_conflicts(request):
+    """API endpoint to list teachers booked in two classes at the same time"""
+    if request.user.user_type not in ['admin', 'teacher']:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    conflicts = teacher_conflict_report()
+    return JsonResponse({'count': len(conflicts), 'conflicts': conflicts})
+
+
 @login_required
 def notice_board(request):
     notices = Notice.objects.all().order_by('-created_at')
@@ -616,11 +821,13 @@ def notice_board(request):
 @login_required
 def results(request):
     results = Result.objects.none()
+    ranks = []
 
     if request.user.user_type == 'student':
         try:
             student = Student.objects.get(user=request.user)
             results = Result.objects.filter(student=student)
+            ranks = list(ExamRank.objects.filter(student=student).order_by('-id'))
         except Student.DoesNotExist:
             pass
     elif request.user.user_type == 'teacher':
@@ -633,36 +840,330 @@ def results(request):
     else:
         results = Result.objects.all()
 
-    return render(request, 'school/results.html', {'results': results})
+    subject_stats = []
+    if request.user.user_type in ['admin', 'teacher']:
+        groups = list(results.order_by('subject__name', 'exam_name').values_list(
+            'subject_id', 'subject__name', 'exam_name').distinct())
+        stats = get_result_stats_many([(subject_id, exam_name) for subject_id, subject_name, exam_name in groups])
+        subject_stats = [
+            {'subject_id': subject_id, 'subject': subject_name, 'exam_name': exam_name,
+             'stats': stats[subject_id, exam_name]}
+            for subject_id, subject_name, exam_name in groups
+        ]
+
+    context = {
+        'results': results.select_related('subject'),
+        'ranks': ranks,
+        'latest_rank': ranks[0] if ranks else None,
+        'subject_stats': subject_stats,
+    }
+    return render(request, 'school/results.html', context)
+
+
+@login_required
+def result_stats_api(request):
+    """Mean, median, standard deviation, pass rate and histogram of a subject, per exam (or for ?exam=)"""
+    if request.user.user_type not in ['admin', 'teacher']:
+        return JsonResponse({'success': False, 'errors': ["You don't have permission to view statistics."]},
+                            status=403)
+
+    try:
+        subject = Subject.objects.select_related('teacher').get(id=int(request.GET.get('subject', '')))
+    except (ValueError, Subject.DoesNotExist):
+        return JsonResponse({'success': False, 'errors': ['Invalid subject.']}, status=400)
+    if request.user.user_type == 'teacher' and subject.teacher.user_id != request.user.id:
+        return JsonResponse({'success': False, 'errors': ["You can only view statistics of your own subjects."]},
+                            status=403)
+
+    exam_names = [request.GET['exam']] if request.GET.get('exam') else list(
+        Result.objects.filter(subject=subject).order_by('exam_name').values_list('exam_name', flat=True).distinct())
+    stats = get_result_stats_many([(subject.id, exam_name) for exam_name in exam_names])
+    return JsonResponse({
+        'success': True,
+        'subject': {'id': subject.id, 'name': subject.name},
+        'exams': [dict(stats[subject.id, exam_name], exam_name=exam_name) for exam_name in exam_names],
+    })
+
+
+@login_required
+def merit_list(request):
+    """Merit positions of an exam, per class or per section"""
+    if request.user.user_type not in ['admin', 'teacher']:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    exam_names = list(ExamRank.objects.order_by('exam_name').values_list('exam_name', flat=True).distinct())
+    class_names = sorted({class_obj.name for class_obj in get_routine_classes()})
+    exam_name = request.GET.get('exam') or (exam_names[-1] if exam_names else '')
+    class_name = request.GET.get('class') or (class_names[0] if class_names else '')
+
+    ranks = (ExamRank.objects.filter(exam_name=exam_name, class_name__name=class_name)
+             .select_related('student__user', 'class_name').order_by('class_rank', 'class_name__section', 'student_id'))
+
+    context = {
+        'exam_names': exam_names,
+        'class_names': class_names,
+        'exam_name': exam_name,
+        'class_name': class_name,
+        'ranks': ranks,
+    }
+    return render(request, 'school/merit_list.html', context)
+
+
+def filter_attendance(request, attendance, classes):
+    """Apply the date range / class / status filters of the attendance list"""
+    form = AttendanceFilterForm(request.GET)
+    form.fields['class_name'].queryset = classes
+    if form.is_valid():
+        if form.cleaned_data['start']:
+            attendance = attendance.filter(date__gte=form.cleaned_data['start'])
+        if form.cleaned_data['end']:
+            attendance = attendance.filter(date__lte=form.cleaned_data['end'])
+        if form.cleaned_data['class_name']:
+            attendance = attendance.filter(class_name=form.cleaned_data['class_name'])
+        if form.cleaned_data['status']:
+            attendance = attendance.filter(status=form.cleaned_data['status'])
+    return form, attendance
+
+
+@login_required
+def export_results(request):
+    """Download all results as CSV"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    return export_results_csv()
+
+
+@login_required
+def marks_entry(request):
+    """Spreadsheet-style marks entry for one exam of a subject"""
+    if request.user.user_type not in ['admin', 'teacher']:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    subjects = Subject.objects.select_related('class_name').order_by('class_name__name', 'class_name__section', 'name')
+    if request.user.user_type == 'teacher':
+        subjects = subjects.filter(teacher__user=request.user)
+
+    form = MarksEntryForm(request.GET or None)
+    form.fields['subject'].queryset = subjects
+
+    rows = []
+    if form.is_valid():
+        subject = form.cleaned_data['subject']
+        existing = dict(Result.objects.filter(subject=subject, exam_name=form.cleaned_data['exam_name'])
+                        .values_list('student_id', 'marks'))
+        rows = [{'student': student, 'marks': existing.get(student.id)}
+                for student in class_students(subject.class_name)]
+
+    context = {
+        'form': form,
+        'rows': rows,
+    }
+    return render(request, 'school/marks_entry.html', context)
+
+
+@login_required
+@require_POST
+def save_marks_api(request):
+    """
+    Bulk marks endpoint.
+
+    Accepts {"subject_id", "exam_name", "total_marks", "marks": [{"student_id", "marks"}, ...]}
+    and computes the grades from the grade scale. A blank or null mark clears the student's result.
+    """
+    if request.user.user_type not in ['admin', 'teacher']:
+        return JsonResponse({'success': False, 'errors': ["You don't have permission to enter marks."]}, status=403)
+
+    try:
+        payload = json.loads(request.body)
+        subject = Subject.objects.select_related('class_name', 'teacher__user').get(id=int(payload['subject_id']))
+        exam_name = str(payload['exam_name']).strip()
+        total_marks = payload.get('total_marks', 100)
+        marks = {int(row['student_id']): None if row.get('marks') in (None, '') else row['marks']
+                 for row in payload['marks']}
+    except (ValueError, TypeError, KeyError, AttributeError, Subject.DoesNotExist):
+        return JsonResponse({'success': False, 'errors': ['Invalid marks data.']}, status=400)
+    if not exam_name:
+        return JsonResponse({'success': False, 'errors': ['Exam name is required.']}, status=400)
+    if request.user.user_type == 'teacher' and subject.teacher.user_id != request.user.id:
+        return JsonResponse({'success': False, 'errors': ["You can only enter marks for your own subjects."]},
+                            status=403)
+
+    created, updated, cleared, errors = save_marks(subject, exam_name, total_marks, marks)
+    if errors:
+        return JsonResponse({'success': False, 'errors': errors}, status=400)
+    return JsonResponse({
+        'success': True,
+        'created': len(created),
+        'updated': len(updated),
+        'cleared': len(cleared),
+        'grades': {**{student_id: '' for student_id in cleared},
+                   **{result.student_id: result.grade for result in created + updated}},
+    })
 
 
 @login_required
 def attendance_tracking(request):
     attendance = Attendance.objects.none()
+    classes = Class.objects.none()
+    stats = None
 
     if request.user.user_type == 'student':
         try:
             student = Student.objects.get(user=request.user)
-            attendance = Attendance.objects.filter(student=student).order_by('-date')
+            attendance = Attendance.objects.filter(student=student)
+            # This year's totals and streaks from the monthly bitmaps (at most 12 rows)
+            stats = student_attendance_history(student.id)
         except Student.DoesNotExist:
             pass
     elif request.user.user_type == 'teacher':
-        try:
-            teacher = Teacher.objects.get(user=request.user)
-            classes = Class.objects.filter(class_teacher=teacher)
-            attendance = Attendance.objects.filter(class_name__in=classes)
-        except Teacher.DoesNotExist:
-            pass
+        classes = Class.objects.filter(class_teacher__user=request.user)
+        attendance = Attendance.objects.filter(class_name__in=classes)
     else:
+        classes = Class.objects.all()
         attendance = Attendance.objects.all()
 
-    return render(request, 'school/attendance.html', {'attendance': attendance})
+    form, attendance = filter_attendance(request, attendance, classes)
+    page = KeysetPage(attendance.select_related('class_name', 'student__user'), 'date',
+                      after=request.GET.get('after'), before=request.GET.get('before'))
+
+    # Page links keep the filters
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+
+    context = {
+        'attendance': page,
+        'form': form,
+        'stats': stats,
+        'filter_query': query.urlencode(),
+    }
+    return render(request, 'school/attendance.html', context)
+
+
+@login_required
+@require_POST
+def mark_attendance_api(request):
+    """
+    Bulk attendance endpoint.
+
+    Accepts a whole register {"date", "class_id", "records": [{"student_id", "status"}, ...]}
+    or a single row {"student_id", "date", "status"} (as sent by main.js).
+    """
+    if request.user.user_type not in ['admin', 'teacher']:
+        return JsonResponse({'success': False, 'errors': ["You don't have permission to mark attendance."]},
+                            status=403)
+
+    try:
+        payload = json.loads(request.body)
+        records = payload.get('records', [payload])
+        statuses = {int(record['student_id']): record['status'] for record in records}
+        date = parse_date(payload['date'])
+        class_id = payload.get('class_id')
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return JsonResponse({'success': False, 'errors': ['Invalid attendance data.']}, status=400)
+    if date is None:
+        return JsonResponse({'success': False, 'errors': ['Invalid date.']}, status=400)
+
+    class_obj = None
+    if class_id is not None:
+        class_obj = Class.objects.filter(id=class_id).first()
+        if class_obj is None:
+            return JsonResponse({'success': False, 'errors': ['Class not found.']}, status=400)
+
+    allowed_class_ids = None
+    if request.user.user_type == 'teacher':
+        allowed_class_ids = set(Class.objects.filter(class_teacher__user=request.user).values_list('id', flat=True))
+
+    saved, errors = mark_attendance(date, statuses, class_obj, allowed_class_ids)
+    if errors:
+        return JsonResponse({'success': False, 'errors': errors}, status=400)
+    return JsonResponse({'success': True, 'saved': saved})
+
+
+@login_required
+def export_attendance(request):
+    """Download attendance records (with the list filters) as CSV"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    form, attendance = filter_attendance(request, Attendance.objects.all(), Class.objects.all())
+    return export_attendance_csv(attendance)
+
+
+@login_required
+def attendance_report(request):
+    """Per-class attendance rates and chronic absentees"""
+    if request.user.user_type not in ['admin', 'teacher']:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    classes = Class.objects.all()
+    if request.user.user_type == 'teacher':
+        classes = classes.filter(class_teacher__user=request.user)
+
+    today = timezone.localdate()
+    form = AttendanceReportForm(request.GET or {
+        'start': today.replace(day=1), 'end': today, 'period': 'week', 'threshold': 75,
+    })
+    form.fields['class_name'].queryset = classes
+
+    context = {'form': form}
+    if form.is_valid():
+        start = form.cleaned_data['start']
+        end = form.cleaned_data['end']
+        selected = form.cleaned_data['class_name']
+        class_ids = [selected.id] if selected else None
+        if class_ids is None and request.user.user_type == 'teacher':
+            class_ids = list(classes.values_list('id', flat=True))
+
+        class_names = {class_obj.id: str(class_obj) for class_obj in classes}
+        rates = class_attendance_rates(start, end, form.cleaned_data['period'], class_ids)
+        totals = class_attendance_totals(start, end, class_ids)
+        absentees = chronic_absentees(start, end, form.cleaned_data['threshold'], class_ids)
+        for student in absentees:
+            student['class'] = class_names.get(student['class_name_id'], '')
+
+        context.update({
+            'class_reports': [
+                {'class': class_names.get(class_id, ''), 'rates': class_rates, 'total': totals.get(class_id)}
+                for class_id, class_rates in sorted(rates.items(), key=lambda item: class_names.get(item[0], ''))
+            ],
+            'absentees': absentees,
+        })
+    return render(request, 'school/attendance_report.html', context)
 
 
 @login_required
 def library_management(request):
-    books = Book.objects.all()
-    return render(request, 'school/library.html', {'books': books})
+    query = request.GET.get('q', '').strip()
+    books = search_books(query) if query else Book.objects.order_by('title', 'id')
+    page = Paginator(books, 24).get_page(request.GET.get('page'))
+
+    today = timezone.localdate()
+    context = {
+        'query': query,
+        'books': page,
+        'totals': Book.objects.aggregate(copies=Sum('quantity'), available=Sum('available')),
+        'issues': BookIssue.objects.filter(returned=False).aggregate(
+            issued=Count('id'), overdue=Count('id', filter=Q(return_date__lt=today))),
+    }
+    return render(request, 'school/library.html', context)
+
+
+@login_required
+def book_autocomplete(request):
+    """Search-as-you-type suggestions for the library search box"""
+    query = request.GET.get('q', '').strip()
+    if len(query) < 2:
+        return JsonResponse({'success': True, 'results': []})
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {'id': book.id, 'title': book.title, 'author': book.author, 'isbn': book.isbn,
+             'available': book.available}
+            for book in autocomplete_books(query)
+        ],
+    })
 
 
 @login_required
@@ -672,7 +1173,7 @@ def fee_payment(request):
     if request.user.user_type == 'student':
         try:
             student = Student.objects.get(user=request.user)
-            fees = Fee.objects.filter(student=student).order_by('-due_date')
+            fees = Fee.objects.filter(student=student)
         except Student.DoesNotExist:
             pass
     elif request.user.user_type == 'teacher':
@@ -680,7 +1181,167 @@ def fee_payment(request):
     else:
         fees = Fee.objects.all()
 
-    return render(request, 'school/fee_payment.html', {'fees': fees})
+    context = {
+        'fees': KeysetPage(fees.select_related('student__user'), 'due_date',
+                           after=request.GET.get('after'), before=request.GET.get('before')),
+        'ledger': fee_ledger(fees, breakdown=request.user.user_type == 'admin'),
+    }
+    if request.user.user_type == 'admin':
+        context['defaulters'] = top_defaulters(fees)
+        context['fee_run_form'] = FeeRunForm()
+    # Sent back with "Pay Now" so a double submit of this page reuses the same payment
+    context['payment_key'] = uuid.uuid4().hex
+    context['online_payments'] = payment_gateway() is not None
+    return render(request, 'school/fee_payment.html', context)
+
+
+@login_required
+@require_POST
+def pay_fee(request, fee_id):
+    """Start an online payment of a fee and send the payer to the gateway"""
+    fee = get_object_or_404(Fee.objects.select_related('student'), id=fee_id)
+    if request.user.user_type != 'admin' and fee.student.user_id != request.user.id:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    key = request.headers.get('Idempotency-Key') or request.POST.get('idempotency_key')
+    intent, error = create_payment_intent(fee, key, request.user)
+    if error:
+        messages.error(request, error)
+        return redirect('fee_payment')
+    if intent.status != 'pending':
+        messages.warning(request, f'This payment is already {intent.get_status_display().lower()}.')
+        return redirect('fee_payment')
+    return redirect(payment_gateway().checkout_url(intent))
+
+
+@csrf_exempt
+@require_POST
+def payment_webhook(request):
+    """Gateway callback; repeated deliveries of an event are applied once"""
+    outcome, error = process_webhook(request.body, request.headers.get('X-Payment-Signature'))
+    if error:
+        return JsonResponse({'success': False, 'errors': [error]}, status=400)
+    return JsonResponse({'success': True, 'outcome': outcome})
+
+
+@login_required
+def mock_gateway_checkout(request, reference):
+    """Checkout page of the local mock gateway: pay or fail a payment intent"""
+    if not mock_gateway_enabled():
+        raise Http404("The mock gateway is not enabled.")
+    intent = get_object_or_404(PaymentIntent.objects.select_related('fee__student__user'), gateway_reference=reference)
+    if request.user.user_type != 'admin' and intent.fee.student.user_id != request.user.id:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    if request.method == 'POST':
+        status = 'succeeded' if 'pay' in request.POST else 'failed'
+        event = MockGateway().event(intent, status)
+        outcome = apply_payment_event(event['id'], event['type'], intent.gateway_reference, intent.amount, event)
+        if outcome == 'succeeded':
+            messages.success(request, f'Payment of ₹{intent.amount} received. Thank you!')
+        elif outcome == 'duplicate':
+            messages.warning(request, 'This fee was already paid; the payment will be refunded.')
+        else:
+            messages.error(request, 'The payment was not completed.')
+        return redirect('fee_payment')
+
+    return render(request, 'school/mock_gateway_checkout.html', {'intent': intent})
+
+
+@login_required
+@require_POST
+def generate_fees(request):
+    """Create a term's fee invoices for every student or one class / section"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    form = FeeRunForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, 'Please enter a valid amount and due date.')
+        return redirect('fee_payment')
+
+    data = form.cleaned_data
+    term = data['term'] or term_key(data['due_date'])
+    count = generate_term_fees(term, data['amount'], data['due_date'], data['class_name'], data['section'])
+    if count:
+        messages.success(request, f'Created {count} fee invoices for {term}.')
+    else:
+        messages.warning(request, f'Every selected student already has an invoice for {term}.')
+    return redirect('fee_payment')
+
+
+@login_required
+def fee_reconciliation(request):
+    """Import bank statements and work through the lines that could not be matched to a fee"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    if request.method == 'POST':
+        form = BankStatementForm(request.POST, request.FILES)
+        if form.is_valid():
+            statement, errors = import_bank_statement(form.cleaned_data['file'], request.user)
+            for error in errors[:20]:
+                messages.error(request, error)
+            if len(errors) > 20:
+                messages.error(request, f'... and {len(errors) - 20} more problems.')
+            if errors:
+                messages.error(request, 'Nothing was imported. Please fix these problems and upload the file again.')
+            messages.success(request, f'{statement.matched} of {statement.lines} payments matched; '
+                                      f'{statement.review} need review, {statement.skipped} skipped.')
+            return redirect('fee_reconciliation')
+    else:
+        form = BankStatementForm()
+
+    queue = (StatementLine.objects.filter(status__in=['review', 'unmatched'])
+             .select_related('statement'))
+    lines = KeysetPage(queue, 'transaction_date', after=request.GET.get('after'), before=request.GET.get('before'))
+    candidate_ids = {fee_id for line in lines for fee_id in line.candidate_fee_ids}
+    candidates = Fee.objects.select_related('student__user').in_bulk(candidate_ids)
+    for line in lines:
+        line.candidates = [candidates[fee_id] for fee_id in line.candidate_fee_ids if fee_id in candidates]
+
+    context = {
+        'form': form,
+        'statements': BankStatement.objects.select_related('uploaded_by')[:10],
+        'lines': lines,
+        'queue_size': queue.count(),
+    }
+    return render(request, 'school/fee_reconciliation.html', context)
+
+
+@login_required
+@require_POST
+def resolve_statement(request, line_id):
+    """Settle a fee from a review-queue line, or ignore the line"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    line = get_object_or_404(StatementLine, id=line_id)
+    if 'ignore' in request.POST:
+        ignore_statement_line(line, request.POST.get('note', ''))
+        messages.success(request, f'Line {line.line_number} of {line.statement.file_name} ignored.')
+        return redirect('fee_reconciliation')
+
+    try:
+        fee = Fee.objects.get(id=int(request.POST.get('fee_id', '')))
+    except (ValueError, Fee.DoesNotExist):
+        messages.error(request, 'Please choose a valid fee.')
+        return redirect('fee_reconciliation')
+    error = resolve_statement_line(line, fee)
+    if error:
+        messages.error(request, error)
+    else:
+        messages.success(request, f'Fee of {fee.student} marked as paid.')
+    return redirect('fee_reconciliation')
+
+
+@login_required
+def export_fees(request):
+    """Download all fee records as CSV"""
+    if request.user.user_type != 'admin':
+        return HttpResponseForbidden("You don't have permission to access this page.")
+
+    return export_fees_csv()
 
 
 def online_admission(request):
@@ -740,33 +1401,9 @@ def student_dashboard(request):
         return HttpResponseForbidden("You don't have permission to access this page.")
 
     try:
-        student = Student.objects.get(user=request.user)
-
-        attendance_count = Attendance.objects.filter(student=student, status='Present').count()
-        total_days = Attendance.objects.filter(student=student).count()
-        attendance_percentage = (attendance_count / total_days * 100) if total_days > 0 else 0
-
-        recent_results = Result.objects.filter(student=student).order_by('-id')[:3]
-        recent_notices = Notice.objects.filter(target_audience__in=['Students', 'All']).order_by('-created_at')[:3]
-
-        total_fees = Fee.objects.filter(student=student).count()
-        paid_fees = Fee.objects.filter(student=student, paid=True).count()
-        pending_fees = total_fees - paid_fees
-
-        issued_books = BookIssue.objects.filter(student=student, returned=False).count()
-
-        context = {
-            'student': student,
-            'attendance_percentage': round(attendance_percentage, 2),
-            'attendance_count': attendance_count,
-            'total_days': total_days,
-            'recent_results': recent_results,
-            'recent_notices': recent_notices,
-            'total_books': issued_books,
-            'total_fees': total_fees,
-            'paid_fees': paid_fees,
-            'pending_fees': pending_fees,
-        }
+        student = Student.objects.select_related('user').get(user=request.user)
+        # KPIs, recent results and notices come from the cached dashboard service
+        context = student_dashboard_context(student)
         return render(request, 'school/student_dashboard.html', context)
     except Student.DoesNotExist:
         messages.error(request, 'Student profile not found!')
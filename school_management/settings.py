@@ -102,6 +102,17 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Cache shared by every worker process and management command, so signal-based
+# invalidation in one process is seen by the others (Django's default in-memory
+# cache is private to each process). Point CACHE_BACKEND / CACHE_LOCATION at
+# Redis or Memcached when the site runs on more than one host.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache')),
+    }
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -111,4 +122,9 @@ AUTH_USER_MODEL = 'accounts.User'
 # Login/Logout URLs
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
-LOGIN_URL = 'login'
\ No newline at end of file
+LOGIN_URL = 'login'
+
+# Online fee payments: the webhook secret is shared with the gateway. The mock
+# gateway marks fees paid without charging anything; enable it for local testing only.
+SCHOOL_PAYMENT_WEBHOOK_SECRET = config('SCHOOL_PAYMENT_WEBHOOK_SECRET', default='')
+SCHOOL_PAYMENT_MOCK_GATEWAY = config('SCHOOL_PAYMENT_MOCK_GATEWAY', default=False, cast=bool)
\ No newline at end of file
@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from school.attendance import attendance_summary, mark_attendance, rebuild_attendance_summaries
+from school.models import Attendance, AttendanceSummary, Class, Student
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AttendanceSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_obj = Class.objects.create(name='Class 9', section='A')
+        self.students = []
+        for number in range(1, 4):
+            user = User.objects.create_user(f'student{number}', password='x', user_type='student')
+            self.students.append(Student.objects.create(user=user, student_id=f'S{number}', class_name='Class 9',
+                                                        section='A', roll_number=number))
+
+    def counts(self, student, period_type='total', period=''):
+        summary = attendance_summary(student, period_type, period)
+        return summary.present, summary.absent
+
+    def snapshot(self):
+        return sorted(AttendanceSummary.objects.values_list('student_id', 'period_type', 'period', 'present', 'absent'))
+
+    def test_marking_counts_every_period(self):
+        first, second, third = self.students
+        saved, errors = mark_attendance(date(2026, 2, 3), {first.id: 'Present', second.id: 'Absent',
+                                                           third.id: 'Present'}, self.class_obj)
+        self.assertEqual((saved, errors), (3, []))
+        self.assertEqual(self.counts(first), (1, 0))
+        self.assertEqual(self.counts(first, 'month', '2026-02'), (1, 0))
+        self.assertEqual(self.counts(first, 'term', '2026-T1'), (1, 0))
+        self.assertEqual(self.counts(second), (0, 1))
+
+    def test_remarking_flips_present_and_absent(self):
+        first, second, third = self.students
+        day = date(2026, 2, 3)
+        mark_attendance(day, {first.id: 'Present', second.id: 'Absent'}, self.class_obj)
+        mark_attendance(day, {first.id: 'Absent', second.id: 'Present'}, self.class_obj)
+        self.assertEqual(self.counts(first), (0, 1))
+        self.assertEqual(self.counts(second), (1, 0))
+
+        # Saving the same register again changes nothing
+        mark_attendance(day, {first.id: 'Absent', second.id: 'Present'}, self.class_obj)
+        self.assertEqual(self.counts(first, 'month', '2026-02'), (0, 1))
+
+        # Editing one row through the model moves the counts too
+        record = Attendance.objects.get(student=first, date=day)
+        record.status = 'Present'
+        record.save()
+        self.assertEqual(self.counts(first), (1, 0))
+
+    def test_deleting_a_record_decrements_the_counts(self):
+        first, second, third = self.students
+        mark_attendance(date(2026, 2, 3), {first.id: 'Present'}, self.class_obj)
+        mark_attendance(date(2026, 2, 4), {first.id: 'Absent'}, self.class_obj)
+        self.assertEqual(self.counts(first), (1, 1))
+
+        Attendance.objects.get(student=first, date=date(2026, 2, 3)).delete()
+        self.assertEqual(self.counts(first), (0, 1))
+        self.assertEqual(self.counts(first, 'term', '2026-T1'), (0, 1))
+
+    def test_invalid_register_writes_nothing(self):
+        first = self.students[0]
+        saved, errors = mark_attendance(date(2026, 2, 3), {first.id: 'Present', 999: 'Present'}, self.class_obj)
+        self.assertEqual(saved, 0)
+        self.assertEqual(len(errors), 1)
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(AttendanceSummary.objects.exists())
+
+    def test_rebuild_matches_incremental_counts(self):
+        first, second, third = self.students
+        mark_attendance(date(2025, 12, 30), {first.id: 'Present', second.id: 'Absent'}, self.class_obj)
+        mark_attendance(date(2026, 1, 5), {first.id: 'Absent', second.id: 'Absent', third.id: 'Present'},
+                        self.class_obj)
+        mark_attendance(date(2026, 5, 2), {first.id: 'Present', third.id: 'Absent'}, self.class_obj)
+        mark_attendance(date(2026, 1, 5), {second.id: 'Present'}, self.class_obj)
+        Attendance.objects.get(student=third, date=date(2026, 5, 2)).delete()
+
+        incremental = [row for row in self.snapshot() if row[3] or row[4]]
+        rebuild_attendance_summaries()
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(self.counts(first, 'term', '2025-T3'), (1, 0))
@@ -0,0 +1,125 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from school.grading import assign_grades, grade_for, pass_percentage
+from school.marks import save_marks
+from school.models import Class, Result, Student, Subject, Teacher
+
+
+class GradingTests(SimpleTestCase):
+    def test_grade_boundaries(self):
+        percentages = [100, 80, 79.99, 70, 69.99, 60, 50, 49.99, 40, 33, 32.99, 0]
+        self.assertEqual(assign_grades(percentages),
+                         ['A+', 'A+', 'A', 'A', 'A-', 'A-', 'B', 'C', 'C', 'D', 'F', 'F'])
+
+    def test_grade_for_marks(self):
+        self.assertEqual(grade_for(Decimal('40'), Decimal('50')), 'A+')
+        self.assertEqual(grade_for(16, 50), 'F')
+        self.assertEqual(grade_for(10, 0), 'F')
+
+    def test_pass_percentage_is_the_lowest_passing_grade(self):
+        self.assertEqual(pass_percentage(), 33)
+
+    @override_settings(SCHOOL_GRADE_SCALE=[(0, 'Fail'), (90, 'Distinction'), (50, 'Pass')])
+    def test_custom_scale_in_any_order(self):
+        self.assertEqual(assign_grades([95, 90, 89.5, 50, 10]), ['Distinction', 'Distinction', 'Pass', 'Pass', 'Fail'])
+        self.assertEqual(pass_percentage(), 50)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SaveMarksTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher_user = User.objects.create_user('teacher', password='x', user_type='teacher')
+        teacher = Teacher.objects.create(user=teacher_user, teacher_id='T1', joining_date=date(2020, 1, 1))
+        self.class_obj = Class.objects.create(name='Class 9', section='A')
+        other_class = Class.objects.create(name='Class 10', section='A')
+        self.subject = Subject.objects.create(name='Mathematics', class_name=self.class_obj, teacher=teacher)
+        self.students = []
+        for number, class_name in enumerate(['Class 9', 'Class 9', 'Class 10'], start=1):
+            user = User.objects.create_user(f'student{number}', password='x', user_type='student')
+            self.students.append(Student.objects.create(user=user, student_id=f'S{number}', class_name=class_name,
+                                                        section='A', roll_number=number))
+        self.outsider = self.students.pop()
+
+    def results(self):
+        return {result.student_id: (result.marks, result.grade)
+                for result in Result.objects.filter(subject=self.subject, exam_name='Midterm')}
+
+    def test_creates_and_grades_results(self):
+        first, second = self.students
+        created, updated, cleared, errors = save_marks(self.subject, 'Midterm', 50, {first.id: 40, second.id: '12.5'})
+        self.assertEqual((len(created), updated, cleared, errors), (2, [], [], []))
+        self.assertEqual(self.results(), {first.id: (Decimal('40.00'), 'A+'), second.id: (Decimal('12.50'), 'F')})
+
+    def test_updates_and_clears_results(self):
+        first, second = self.students
+        save_marks(self.subject, 'Midterm', 50, {first.id: 40, second.id: 30})
+        created, updated, cleared, errors = save_marks(self.subject, 'Midterm', 50, {first.id: 25, second.id: None})
+        self.assertEqual((created, len(updated), cleared, errors), ([], 1, [second.id], []))
+        self.assertEqual(self.results(), {first.id: (Decimal('25.00'), 'B')})
+
+        # Clearing a student without a result is not an error
+        created, updated, cleared, errors = save_marks(self.subject, 'Midterm', 50, {second.id: None})
+        self.assertEqual((created, updated, cleared, errors), ([], [], [], []))
+
+    def test_invalid_rows_write_nothing(self):
+        first, second = self.students
+        created, updated, cleared, errors = save_marks(self.subject, 'Midterm', 50, {
+            first.id: 40, second.id: 51, self.outsider.id: 10, 999: 10})
+        self.assertEqual(created, [])
+        self.assertEqual(errors, ['Marks of S2 must be between 0 and 50.00.',
+                                  'Student S3 is not in Class 9 - A.',
+                                  'Unknown student 999.'])
+        self.assertFalse(Result.objects.exists())
+
+        self.assertEqual(save_marks(self.subject, 'Midterm', 50, {first.id: 'abc'})[3],
+                         ['Marks of S1 must be between 0 and 50.00.'])
+        self.assertEqual(save_marks(self.subject, 'Midterm', 0, {first.id: 0})[3],
+                         ['Total marks must be a positive number.'])
+        self.assertFalse(Result.objects.exists())
+
+
+class ResultRegradeTests(TestCase):
+    def setUp(self):
+        teacher_user = User.objects.create_user('teacher', password='x', user_type='teacher')
+        teacher = Teacher.objects.create(user=teacher_user, teacher_id='T1', joining_date=date(2020, 1, 1))
+        class_obj = Class.objects.create(name='Class 9', section='A')
+        subject = Subject.objects.create(name='Mathematics', class_name=class_obj, teacher=teacher)
+        user = User.objects.create_user('student', password='x', user_type='student')
+        student = Student.objects.create(user=user, student_id='S1', class_name='Class 9', section='A')
+        self.result = Result.objects.create(student=student, subject=subject, exam_name='Midterm', marks=85)
+
+    def test_blank_grade_is_computed(self):
+        self.assertEqual(self.result.grade, 'A+')
+
+    def test_changing_marks_regrades(self):
+        result = Result.objects.get(pk=self.result.pk)
+        result.marks = Decimal('55')
+        result.save()
+        self.assertEqual(Result.objects.get(pk=result.pk).grade, 'B')
+
+        result = Result.objects.get(pk=self.result.pk)
+        result.total_marks = Decimal('60')
+        result.save()
+        self.assertEqual(Result.objects.get(pk=result.pk).grade, 'A+')
+
+    def test_grade_edited_with_the_marks_is_kept(self):
+        result = Result.objects.get(pk=self.result.pk)
+        result.marks = Decimal('45')
+        result.grade = 'A'
+        result.save()
+        self.assertEqual(Result.objects.get(pk=result.pk).grade, 'A')
+
+    def test_unchanged_marks_keep_a_manual_grade(self):
+        result = Result.objects.get(pk=self.result.pk)
+        result.grade = 'B'
+        result.save()
+        result = Result.objects.get(pk=self.result.pk)
+        result.exam_name = 'Midterm 1'
+        result.save()
+        self.assertEqual(Result.objects.get(pk=result.pk).grade, 'B')
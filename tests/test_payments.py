@@ -0,0 +1,76 @@
+import json
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from school.models import Fee, PaymentEvent, PaymentIntent, Student
+from school.payments import MockGateway, create_payment_intent, process_webhook
+
+
+@override_settings(SCHOOL_PAYMENT_MOCK_GATEWAY=True, SCHOOL_PAYMENT_WEBHOOK_SECRET='test-secret',
+                   CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PaymentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('payer', password='x', user_type='student')
+        student = Student.objects.create(user=self.user, student_id='S1', class_name='Class 9', section='A')
+        self.fee = Fee.objects.create(student=student, amount=100, due_date=date(2026, 1, 31))
+
+    def test_same_idempotency_key_reuses_the_intent(self):
+        intent, error = create_payment_intent(self.fee, 'key-1', self.user)
+        self.assertIsNone(error)
+        again, error = create_payment_intent(self.fee, 'key-1', self.user)
+        self.assertIsNone(error)
+        self.assertEqual(again.pk, intent.pk)
+        self.assertEqual(PaymentIntent.objects.count(), 1)
+
+        other_user = User.objects.create_user('other', password='x', user_type='student')
+        other_fee = Fee.objects.create(student=Student.objects.create(user=other_user, student_id='S2'),
+                                       amount=50, due_date=date(2026, 1, 31))
+        intent, error = create_payment_intent(other_fee, 'key-1', other_user)
+        self.assertIsNone(intent)
+        self.assertEqual(error, 'This payment key was already used for another fee.')
+
+    def test_duplicate_event_is_applied_once(self):
+        intent, error = create_payment_intent(self.fee, 'key-1', self.user)
+        body, signature = MockGateway().webhook(intent, 'succeeded', event_id='evt_1')
+
+        self.assertEqual(process_webhook(body, signature), ('succeeded', None))
+        self.fee.refresh_from_db()
+        self.assertTrue(self.fee.paid)
+        paid_at = PaymentIntent.objects.get().paid_at
+
+        self.assertEqual(process_webhook(body, signature), ('duplicate', None))
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+        intent.refresh_from_db()
+        self.assertEqual((intent.status, intent.paid_at), ('succeeded', paid_at))
+
+    def test_second_payment_of_a_paid_fee_is_marked_duplicate(self):
+        first, error = create_payment_intent(self.fee, 'key-1', self.user)
+        second, error = create_payment_intent(self.fee, 'key-2', self.user)
+        self.assertEqual(process_webhook(*MockGateway().webhook(first, 'succeeded')), ('succeeded', None))
+        self.assertEqual(process_webhook(*MockGateway().webhook(second, 'succeeded')), ('duplicate', None))
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'duplicate')
+
+    def test_invalid_signature_is_rejected(self):
+        intent, error = create_payment_intent(self.fee, 'key-1', self.user)
+        body, signature = MockGateway().webhook(intent, 'succeeded')
+
+        self.assertEqual(process_webhook(body, 'not-the-signature'), (None, 'Invalid signature.'))
+        tampered = json.dumps(dict(json.loads(body), id='evt_other')).encode()
+        self.assertEqual(process_webhook(tampered, signature), (None, 'Invalid signature.'))
+        response = self.client.post(reverse('payment_webhook'), body, content_type='application/json',
+                                    HTTP_X_PAYMENT_SIGNATURE='not-the-signature')
+        self.assertEqual(response.status_code, 400)
+
+        self.assertFalse(PaymentEvent.objects.exists())
+        self.fee.refresh_from_db()
+        self.assertFalse(self.fee.paid)
+
+    @override_settings(SCHOOL_PAYMENT_WEBHOOK_SECRET='')
+    def test_webhooks_are_refused_without_a_secret(self):
+        self.assertEqual(process_webhook(b'{}', ''), (None, 'Payment webhooks are not configured.'))
@@ -0,0 +1,102 @@
+import re
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from school.models import Fee, StatementLine, Student
+from school.reconciliation import import_bank_statement
+
+
+def statement(*rows):
+    return SimpleUploadedFile('statement.csv', '\n'.join(('Date,Narration,Reference,Credit',) + rows).encode())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BankStatementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.students = {}
+        for student_id in ('STU-1', 'STU-2', 'STU-3'):
+            user = User.objects.create_user(student_id.lower(), password='x', user_type='student')
+            self.students[student_id] = Student.objects.create(user=user, student_id=student_id)
+        self.fee1 = Fee.objects.create(student=self.students['STU-1'], amount=500, due_date=date(2026, 1, 31))
+        self.fee2 = Fee.objects.create(student=self.students['STU-2'], amount=500, due_date=date(2026, 1, 31))
+        self.fee3 = Fee.objects.create(student=self.students['STU-3'], amount=300, due_date=date(2026, 1, 31))
+
+    def line(self, reference):
+        return StatementLine.objects.get(reference=reference)
+
+    def test_matches_and_settles_fees(self):
+        result, errors = import_bank_statement(statement('03/02/2026,Fee STU-1,R1,500.00'))
+        self.assertEqual(errors, [])
+        self.assertEqual((result.lines, result.matched, result.review), (1, 1, 0))
+        self.assertEqual((self.line('R1').status, self.line('R1').fee_id), ('matched', self.fee1.id))
+        self.fee1.refresh_from_db()
+        self.assertEqual((self.fee1.paid, self.fee1.payment_date), (True, date(2026, 2, 3)))
+
+    def test_reimported_lines_are_skipped(self):
+        rows = ('03/02/2026,Fee STU-1,R1,500.00', '04/02/2026,Fee STU-3,R3,300.00')
+        import_bank_statement(statement(*rows))
+        again, errors = import_bank_statement(statement(*rows, '05/02/2026,Fee STU-2,R2,500.00'))
+        self.assertEqual((again.lines, again.matched, again.skipped), (1, 1, 2))
+        self.assertEqual(StatementLine.objects.count(), 3)
+
+    def test_identical_lines_of_one_statement_are_kept(self):
+        Fee.objects.create(student=self.students['STU-1'], amount=500, due_date=date(2026, 2, 28))
+        result, errors = import_bank_statement(statement('03/02/2026,Fee STU-1,R1,500.00',
+                                                         '03/02/2026,Fee STU-1,R1,500.00'))
+        self.assertEqual((result.lines, result.matched), (2, 2))
+
+    def test_review_queue(self):
+        result, errors = import_bank_statement(statement(
+            '03/02/2026,Cash deposit,R0,500.00',
+            '03/02/2026,Fees STU-1 STU-2,R12,500.00',
+            '03/02/2026,Fee STU-3,R3,250.00',
+            'not a date,Fee STU-3,R4,300.00',
+        ))
+        self.assertEqual(errors, ['Line 5: unreadable date not a date.'])
+        self.assertEqual((result.lines, result.matched, result.review, result.skipped), (3, 0, 3, 1))
+
+        unmatched = self.line('R0')
+        self.assertEqual((unmatched.status, unmatched.note), ('unmatched', 'No Student ID found in the reference.'))
+        ambiguous = self.line('R12')
+        self.assertEqual(ambiguous.status, 'review')
+        self.assertEqual(sorted(ambiguous.candidate_fee_ids), sorted([self.fee1.id, self.fee2.id]))
+        wrong_amount = self.line('R3')
+        self.assertEqual((wrong_amount.status, wrong_amount.candidate_fee_ids, wrong_amount.note),
+                         ('review', [self.fee3.id], 'No unpaid fee of this amount for the student.'))
+        self.assertFalse(Fee.objects.filter(paid=True).exists())
+
+    def test_only_matched_fees_are_locked(self):
+        with CaptureQueriesContext(connection) as queries:
+            import_bank_statement(statement('03/02/2026,Fee STU-1,R1,500.00', '03/02/2026,Fee STU-3,R3,250.00'))
+        # The lock query is the only SELECT of fees by id (SQLite drops FOR UPDATE from it)
+        locks = [query['sql'] for query in queries.captured_queries
+                 if query['sql'].startswith('SELECT') and '"school_fee"."id" IN' in query['sql']]
+        self.assertEqual(len(locks), 1)
+        self.assertEqual(re.search(r'"school_fee"\."id" IN \(([^)]*)\)', locks[0]).group(1), str(self.fee1.id))
+
+    def test_fee_paid_during_the_import_goes_to_review(self):
+        select_for_update = QuerySet.select_for_update
+
+        def paid_by_a_webhook_first(queryset, *args, **kwargs):
+            Fee.objects.filter(pk=self.fee1.pk).update(paid=True, payment_date=date(2026, 2, 1))
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'select_for_update', paid_by_a_webhook_first):
+            result, errors = import_bank_statement(statement('03/02/2026,Fee STU-1,R1,500.00',
+                                                             '03/02/2026,Fee STU-2,R2,500.00'))
+        self.assertEqual((result.matched, result.review), (1, 1))
+        line = self.line('R1')
+        self.assertEqual((line.status, line.fee_id, line.candidate_fee_ids, line.note),
+                         ('review', None, [self.fee1.id], 'The matching fee was paid while the statement was imported.'))
+        self.fee1.refresh_from_db()
+        self.assertEqual(self.fee1.payment_date, date(2026, 2, 1))
+        self.assertEqual(self.line('R2').status, 'matched')